@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for intent dispatch: match latency over a command corpus as
+the number of registered intents grows.
+Usage: python benchmarks/bench_intent_dispatch.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.commands import register_all
+from core.intent_dispatcher import IntentDispatcher
+
+CORPUS = [
+    "play bohemian rhapsody on spotify",
+    "next track on spotify",
+    "pause the music",
+    "music volume 40",
+    "set the volume to 75",
+    "start screen monitoring",
+    "stop screen monitoring",
+    "open visual studio code",
+    "launch the calculator app",
+    "what's the weather like in london tomorrow",
+    "tell me a joke about programmers",
+    "how far away is the moon",
+]
+
+
+class NullController:
+    """Accepts any controller call so handlers can be registered without devices"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: True
+
+
+class NullJarvis:
+    spotify = NullController()
+    desktop = NullController()
+    screen_reader = NullController()
+    screen_monitoring_thread = None
+
+
+def build(extra_intents):
+    dispatcher = register_all(IntentDispatcher(), NullJarvis())
+    for i in range(extra_intents):
+        dispatcher.register(f"synthetic.{i}", [f"device{i} * on", f"switch off device{i} {{room?}}"],
+                            lambda slots: ("ok", False))
+    dispatcher.compile()
+    return dispatcher
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for extra in (0, 100, 1000, 10000):
+        dispatcher = build(extra)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for command in CORPUS:
+                dispatcher.match(command)
+        per_match = (time.perf_counter() - start) / (iterations * len(CORPUS)) * 1e6
+        print(f"{len(dispatcher.intents):>6} intents: {per_match:6.1f} us per command")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark semantic index inserts (add() and batched add_many(), the paths
+MemoryManager uses) and recall lookup latency as the index grows.
+Usage: python benchmarks/bench_semantic_index.py [max_rows]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.semantic_index import SemanticIndex
+
+
+class TextSource:
+    """Synthetic memories drawn from topics, so the IVF clusters have something to find"""
+
+    def __init__(self, rng, topics=512, vocabulary=20_000):
+        self.rng = rng
+        self.words = np.array([f"w{i}" for i in range(vocabulary)])
+        self.topics = rng.integers(0, vocabulary, (topics, 8))
+        self.produced = 0
+
+    def texts(self, n):
+        topic_words = self.topics[self.rng.integers(0, len(self.topics), n)]
+        chosen = np.take_along_axis(topic_words, self.rng.integers(0, 8, (n, 5)), axis=1)
+        noise = self.rng.integers(0, len(self.words), (n, 2))
+        out = [" ".join(self.words[np.concatenate([c, z])]) for c, z in zip(chosen, noise)]
+        self.produced += n
+        return out
+
+
+def fill(index, rows, source, batch=512):
+    """Append rows through add_many in MemoryManager's backfill batch size; returns rows/s"""
+    start = time.perf_counter()
+    for done in range(0, rows, batch):
+        n = min(batch, rows - done)
+        index.add_many([(text, {"speaker": "user"}) for text in source.texts(n)])
+    return rows / (time.perf_counter() - start) if rows else 0.0
+
+
+def single_adds(index, source, n=2000):
+    """Rows/s for one add() per memory, as add_interaction does"""
+    texts = source.texts(n)
+    start = time.perf_counter()
+    for text in texts:
+        index.add(text, {"speaker": "user"})
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(0)
+    source = TextSource(rng)
+    queries = [" ".join(source.words[source.topics[t][:3]]) for t in range(3)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Training is triggered explicitly below so its cost stays out of the insert timings
+        index = SemanticIndex(tmp, train_size=max_rows * 100)
+        for text in ["Remember the dentist appointment on Friday", "My favourite band is Radiohead"]:
+            index.add(text)
+        print(f"add():       {single_adds(index, source):9.0f} rows/s")
+
+        rows = 10_000
+        while rows <= max_rows:
+            rate = fill(index, rows - index.count, source)
+            index.train()
+            for q in queries:
+                index.search(q)  # warm the mapping
+            timings = []
+            for _ in range(50):
+                start = time.perf_counter()
+                index.search(queries[len(timings) % len(queries)], k=5)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{index.count:>9} vectors  add_many {rate:9.0f} rows/s  "
+                f"search p50 {np.percentile(timings, 50):6.2f} ms  p95 {np.percentile(timings, 95):6.2f} ms"
+            )
+            rows *= 10
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
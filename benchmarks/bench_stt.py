@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline speech-to-text on WAV fixtures: real-time factor and the
+delay from end of speech to final text, streaming (partials decoded while
+the utterance plays) versus decoding the whole utterance after it ends.
+The WAVs are played back in real time through the same capture path as the
+microphone. Without --whisper a fake decoder costing 0.3 s per second of
+audio stands in for the model.
+Usage: python benchmarks/bench_stt.py [--whisper MODEL] [--interval S] [file.wav ...]
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from interfaces.voice.audio_stream import AudioCapture, WavStream
+from interfaces.voice.streaming_stt import StreamingSession, WHISPER_RATE, get_transcriber, to_float32
+
+
+def fake_decode(audio):
+    time.sleep(0.3 * len(audio) / WHISPER_RATE)
+    return f"{len(audio) // WHISPER_RATE} seconds of speech"
+
+
+def synthetic_fixtures(directory):
+    """Utterances of 1, 2 and 4 s of tone between quiet noise"""
+    rng = np.random.default_rng(0)
+    paths = []
+    for seconds in (1, 2, 4):
+        speech = 3000 * np.sin(2 * np.pi * 220 * np.arange(seconds * WHISPER_RATE) / WHISPER_RATE)
+        quiet = rng.normal(0, 40, WHISPER_RATE)
+        samples = np.concatenate([quiet, speech, quiet]).astype(np.int16)
+        path = os.path.join(directory, f"utterance_{seconds}s.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(WHISPER_RATE)
+            f.writeframes(samples.tobytes())
+        paths.append(path)
+    return paths
+
+
+def run(path, decode, interval):
+    stream = WavStream(path, realtime=True)
+    capture = AudioCapture(stream)
+    session = StreamingSession(decode, stream.sample_rate, interval)
+    samples = capture.listen(on_audio=session.feed)
+    capture.stop()
+    if samples is None:
+        session.finish()
+        return None
+    text = session.finish(len(samples) - capture.trailing_silence)
+    streaming = session.metrics
+
+    # Batch baseline: nothing decoded until end of speech
+    start = time.perf_counter()
+    decode(to_float32(samples, stream.sample_rate))
+    batch_ms = (time.perf_counter() - start) * 1000
+    return text, streaming, batch_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming speech-to-text")
+    parser.add_argument("wavs", nargs="*", help="16-bit WAV fixtures (synthetic ones by default)")
+    parser.add_argument("--whisper", metavar="MODEL", help="decode with this Whisper model, e.g. base.en")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds of audio between partials")
+    args = parser.parse_args()
+
+    decode = get_transcriber(args.whisper).decode if args.whisper else fake_decode
+    with tempfile.TemporaryDirectory() as directory:
+        paths = args.wavs or synthetic_fixtures(directory)
+        print(f"{'fixture':<24}{'audio s':>8}{'RTF':>7}{'partials':>9}{'stream ms':>11}{'batch ms':>10}  text")
+        for path in paths:
+            result = run(path, decode, args.interval)
+            if result is None:
+                print(f"{os.path.basename(path):<24}  no speech detected")
+                continue
+            text, m, batch_ms = result
+            rtf = batch_ms / 1000 / m["audio_s"]
+            print(f"{os.path.basename(path):<24}{m['audio_s']:>8.2f}{rtf:>7.2f}{m['partials']:>9}"
+                  f"{m['final_latency_ms']:>11.0f}{batch_ms:>10.0f}  {text}")
+
+
+if __name__ == "__main__":
+    main()
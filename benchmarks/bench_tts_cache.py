@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the TTS phrase cache on a simulated session: startup and shutdown
+greetings plus command replies (cacheable) mixed with one-off LLM sentences
+(never stored), synthesized by a stand-in for Edge TTS with a fixed
+round-trip latency.
+The fixed phrases are pre-warmed at each startup (off the clock, as the
+background thread does) unless --no-prewarm is given.
+Prints time-to-audio for hits and misses, hit rate and bytes saved.
+Usage: python benchmarks/bench_tts_cache.py [--latency S] [--turns N] [--sessions N] [--no-prewarm]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.commands import canned_phrases
+from interfaces.voice.tts_cache import PhraseCache
+
+VOICE = "en-GB-RyanNeural"
+GREETING = "Jarvis AI Assistant is online and ready to assist you, sir."
+FAREWELL = "Shutting down. Goodbye, sir."
+
+
+def fake_synthesize(text, latency):
+    time.sleep(latency)
+    return os.urandom(16 * 1024 * max(1, len(text) // 20))  # ~16 KB of mp3 per 20 characters
+
+
+def time_to_audio(cache, text, latency):
+    start = time.perf_counter()
+    clip = cache.get(VOICE, text)
+    hit = clip is not None
+    if not hit:
+        synthesis_start = time.perf_counter()
+        audio = fake_synthesize(text, latency)
+        cache.put(VOICE, text, "+0%", audio, time.perf_counter() - synthesis_start)
+    return hit, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS phrase cache benchmark")
+    parser.add_argument("--latency", type=float, default=0.4, help="simulated Edge TTS round trip (s)")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--no-prewarm", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    directory = tempfile.mkdtemp()
+    timings = {True: [], False: []}
+    for session in range(args.sessions):
+        cache = PhraseCache(directory)  # a restart; the directory persists
+        if not args.no_prewarm:
+            for text in [GREETING, FAREWELL] + canned_phrases():
+                if not cache.contains(VOICE, text):
+                    cache.put(VOICE, text, "+0%", fake_synthesize(text, args.latency), args.latency, canned=True)
+        spoken = [GREETING]
+        for turn in range(args.turns):
+            if rng.random() < 0.5:
+                spoken.append(rng.choice(canned_phrases()))
+            else:
+                spoken.append(f"Here is a one-off answer number {session}-{turn}, sir.")
+        spoken.append(FAREWELL)
+        for text in spoken:
+            hit, ms = time_to_audio(cache, text, args.latency)
+            timings[hit].append(ms)
+        stats = cache.get_stats()
+        print(f"Session {session + 1}: hit rate {stats['hit_rate']:.0%}, {stats['bytes_saved'] / 1024:.0f} KB "
+              f"and {stats['synthesis_s_saved']:.1f} s of synthesis saved, {stats['entries']} clips cached")
+
+    for hit, label in ((True, "hits"), (False, "misses")):
+        values = sorted(timings[hit])
+        if values:
+            print(f"Time to audio, {label:<6} ({len(values):>3}): p50 {values[len(values) // 2]:7.2f} ms, "
+                  f"max {values[-1]:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark sentence-to-sentence gaps and CPU for streamed replies.
+Both runs use the fake synthesizer (fixed round trip) and the null sink
+(clips 'play' for as long as the text takes to say):
+1. The old queue worker: synthesize a sentence, then play it, polling
+   playback at 10 Hz, with a fresh event loop per worker.
+2. TTSWorker: one long-lived loop, next sentence synthesized during playback,
+   playback end awaited as an event.
+Usage: python benchmarks/bench_tts_worker.py [--latency S] [--sentences N] [--speed X]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from interfaces.voice.tts_worker import FakeSynthesizer, NullSink, TTSWorker
+
+REPLY = [
+    "Certainly, sir.",
+    "The forecast for this afternoon shows light rain moving in from the west.",
+    "Temperatures should stay around twelve degrees.",
+    "I'd suggest taking an umbrella if you're heading out after three.",
+]
+
+
+def summary(values):
+    values = sorted(values)
+    return f"p50 {values[len(values) // 2]:7.1f} ms, max {values[-1]:7.1f} ms" if values else "n/a"
+
+
+def run_sequential(sentences, synthesizer, sink):
+    """The previous design: synthesize, then play with get_busy() polling at 10 Hz"""
+    loop = asyncio.new_event_loop()
+    gaps, last_end = [], None
+    start_cpu = time.process_time()
+    for text in sentences:
+        clip = loop.run_until_complete(synthesizer(text))
+        started = time.perf_counter()
+        if last_end is not None:
+            gaps.append((started - last_end) * 1000)
+        ends = started + sink.play(sink.load(clip))
+        while time.perf_counter() < ends:  # pygame.mixer.music.get_busy()
+            time.sleep(0.1)
+        last_end = time.perf_counter()
+    loop.close()
+    return gaps, time.process_time() - start_cpu
+
+
+def run_worker(sentences, synthesizer, sink):
+    start_cpu = time.process_time()
+    worker = TTSWorker(synthesizer, sink)
+    for text in sentences:
+        worker.say(text)
+    worker.wait_until_done()
+    worker.close()
+    return worker.stats["gaps_ms"], time.process_time() - start_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS worker benchmark")
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated synthesis round trip (s)")
+    parser.add_argument("--sentences", type=int, default=12)
+    parser.add_argument("--speed", type=float, default=4.0, help="playback speed-up of the null sink")
+    args = parser.parse_args()
+
+    sentences = [REPLY[i % len(REPLY)] for i in range(args.sentences)]
+    audio_s = sum(len(s) for s in sentences) * 0.06 / args.speed
+    for name, run in (("sequential + polling", run_sequential), ("TTSWorker", run_worker)):
+        gaps, cpu_s = run(sentences, FakeSynthesizer(args.latency, 0.0), NullSink(0.06, args.speed))
+        print(f"{name:<22} gap between sentences {summary(gaps)}; "
+              f"CPU {cpu_s * 1000 / audio_s:.2f} ms per second of audio")
+
+
+if __name__ == "__main__":
+    main()
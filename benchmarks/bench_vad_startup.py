@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark voice detector startup: importing interfaces.voice.voice_detector
+and constructing a VoiceDetector, per VAD backend, each in a fresh Python
+process so import costs are cold. The target is well under 200 ms.
+Usage: python benchmarks/bench_vad_startup.py [runs]
+"""
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from interfaces.voice.voice_detector import VoiceDetector
+imported = time.perf_counter()
+from config.settings import VAD
+detector = VoiceDetector(lambda: None, config={**VAD, "backend": sys.argv[1]})
+ready = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "init_ms": (ready - imported) * 1000,
+                  "model": type(detector.model).__name__}))
+"""
+
+
+def measure(backend):
+    result = subprocess.run([sys.executable, "-c", CHILD, backend], cwd=ROOT, capture_output=True, text=True,
+                            timeout=300)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'backend':<8}{'import ms':>11}{'init ms':>10}{'total ms':>10}  model")
+    for backend in ("numpy", "onnx", "torch"):
+        samples = [measure(backend) for _ in range(runs)]
+        if any(s is None for s in samples):
+            print(f"{backend:<8}  unavailable here")
+            continue
+        median = lambda key: sorted(s[key] for s in samples)[len(samples) // 2]
+        total = sorted(s["import_ms"] + s["init_ms"] for s in samples)[len(samples) // 2]
+        print(f"{backend:<8}{median('import_ms'):>11.1f}{median('init_ms'):>10.1f}{total:>10.1f}  "
+              f"{samples[0]['model']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local wake-word gate.
+1. Frame decoding: struct.unpack_from per frame versus np.frombuffer.
+2. Over a labeled WAV corpus (path:1 if the file contains the wake word,
+   path:0 if not): false-accept and false-reject rates, the gate's CPU time
+   per second of audio, and how much speech still reaches full
+   transcription compared to transcribing every utterance.
+Usage: python benchmarks/bench_wake_gate.py [--sensitivity S] [file.wav:LABEL ...]
+"""
+import os
+import sys
+import time
+import struct
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import WAKE_WORD
+from interfaces.voice.audio_stream import AudioCapture, WavStream
+from interfaces.voice.wake_word import WakeWordDetector
+
+FRAME = 512
+
+
+def bench_decode(frames=20000):
+    pcm = np.random.default_rng(0).integers(-3000, 3000, FRAME, dtype=np.int16).tobytes()
+    fmt = "h" * FRAME
+    start = time.perf_counter()
+    for _ in range(frames):
+        struct.unpack_from(fmt, pcm)
+    unpack_us = (time.perf_counter() - start) / frames * 1e6
+    start = time.perf_counter()
+    for _ in range(frames):
+        np.frombuffer(pcm, dtype=np.int16)
+    frombuffer_us = (time.perf_counter() - start) / frames * 1e6
+    print(f"Frame decode ({FRAME} samples): struct.unpack_from {unpack_us:.2f} us, "
+          f"np.frombuffer {frombuffer_us:.2f} us ({unpack_us / frombuffer_us:.0f}x)")
+
+
+def replay(path, detector):
+    """Returns (audio seconds, utterances as (start, end), wake word positions)"""
+    stream = WavStream(path)
+    seconds = len(stream._samples) / stream.sample_rate
+    capture = AudioCapture(stream, buffer_seconds=seconds + 1)
+    detector.clear()
+    detector.attach(capture)
+    capture.start()
+    capture._thread.join()
+    utterances = []
+    while True:
+        samples = capture.listen(timeout=seconds + 1)
+        if samples is None:
+            break
+        utterances.append((capture.cursor - len(samples), capture.cursor))
+    capture.stop()
+    detections = list(detector.detections)
+    detector.clear()
+    return seconds, utterances, detections
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the wake-word gate")
+    parser.add_argument("wavs", nargs="*", help="16-bit 16 kHz WAVs as path:1 (wake word) or path:0")
+    parser.add_argument("--sensitivity", type=float, default=0.6)
+    args = parser.parse_args()
+
+    bench_decode()
+    if not args.wavs:
+        return
+    detector = WakeWordDetector(sensitivity=args.sensitivity, model_path=WAKE_WORD["model_path"])
+    if not detector.available:
+        print("Wake word engine unavailable (enroll the keyword spotter, or install pvporcupine "
+              "and set PICOVOICE_ACCESS_KEY)")
+        return
+
+    audio_s = 0.0
+    false_accepts = false_rejects = positives = negatives = 0
+    stt_before = stt_after = 0.0
+    for spec in args.wavs:
+        path, _, label = spec.rpartition(":")
+        seconds, utterances, detections = replay(path, detector)
+        rate = 16000
+        audio_s += seconds
+        if label == "1":
+            positives += 1
+            false_rejects += not detections
+        else:
+            negatives += 1
+            false_accepts += bool(detections)
+        stt_before += sum(end - start for start, end in utterances) / rate
+        # With the gate only the utterance following each detection is transcribed
+        for position in detections:
+            following = [(start, end) for start, end in utterances if end > position]
+            if following:
+                stt_after += (following[0][1] - max(following[0][0], position)) / rate
+
+    print(f"Corpus: {audio_s:.1f} s of audio, {positives} wake files, {negatives} other")
+    print(f"False rejects: {false_rejects}/{positives} ({false_rejects / max(positives, 1):.1%}), "
+          f"false accepts: {false_accepts}/{negatives} ({false_accepts / max(negatives, 1):.1%}), "
+          f"{false_accepts / (audio_s / 3600):.1f}/hour")
+    print(f"Gate CPU: {detector.cpu_s / audio_s * 1000:.1f} ms per second of audio over {detector.frames} frames")
+    print(f"Speech sent to full transcription: {stt_before:.1f} s without the gate, {stt_after:.1f} s with it "
+          f"({1 - stt_after / stt_before if stt_before else 0:.0%} saved)")
+    detector.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Replay recorded WAVs through the capture and endpointing path to tune
+end-of-utterance detection offline. Every configuration is compared with the
+old fixed 0.8 s pause / 10 s limit: utterances found (against the expected
+count, when given as file.wav:N), and endpoint latency, the silence waited
+after the last speech frame.
+Without WAVs, synthetic fixtures are used: a quick command and a long,
+slowly spoken request.
+Usage: python benchmarks/replay_endpointing.py [--grid gap_factor=1.5,2,2.5 ...] [file.wav[:N] ...]
+"""
+import os
+import sys
+import wave
+import argparse
+import itertools
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import STT
+from interfaces.voice.audio_stream import AudioCapture, WavStream
+from interfaces.voice.endpointing import Endpointer
+
+RATE = 16000
+
+
+def synthetic_fixtures(directory):
+    """(path, expected utterances): a quick command and a 17 s request with 0.45 s pauses"""
+    rng = np.random.default_rng(0)
+
+    def noise(seconds):
+        return rng.normal(0, 40, int(seconds * RATE))
+
+    def word(seconds):
+        return 3000 * np.sin(2 * np.pi * 220 * np.arange(int(seconds * RATE)) / RATE)
+
+    fixtures = {
+        "command.wav": [noise(1.0), word(0.3), noise(0.12), word(0.35), noise(2.0)],
+        "long_request.wav": [noise(1.0)] + [part for _ in range(12) for part in (word(1.0), noise(0.45))] + [noise(2.0)],
+    }
+    result = []
+    for name, parts in fixtures.items():
+        path = os.path.join(directory, name)
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(RATE)
+            f.writeframes(np.concatenate(parts).astype(np.int16).tobytes())
+        result.append((path, 1))
+    return result
+
+
+def replay(path, endpointer=None):
+    """Returns (utterance count, endpoint latencies in ms)"""
+    stream = WavStream(path)
+    seconds = len(stream._samples) / stream.sample_rate
+    capture = AudioCapture(stream, buffer_seconds=seconds + 1, endpointer=endpointer)
+    capture.start()
+    capture._thread.join()
+    latencies = []
+    while capture.listen(timeout=seconds + 1) is not None:
+        latencies.append(capture.trailing_silence / stream.sample_rate * 1000)
+    capture.stop()
+    return len(latencies), latencies
+
+
+def parse_grid(specs):
+    keys, values = [], []
+    for spec in specs:
+        key, _, options = spec.partition("=")
+        keys.append(key)
+        values.append([float(v) for v in options.split(",")])
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune endpointing on recorded WAVs")
+    parser.add_argument("wavs", nargs="*", help="16-bit WAVs, optionally path:expected_utterances")
+    parser.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2",
+                        help="Endpointer parameter values to sweep")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = []
+        for spec in args.wavs:
+            path, _, expected = spec.rpartition(":") if spec.rpartition(":")[2].isdigit() else (spec, "", "")
+            fixtures.append((path, int(expected) if expected else None))
+        fixtures = fixtures or synthetic_fixtures(directory)
+
+        configs = [("fixed 0.8 s / 10 s", None)]
+        for overrides in parse_grid(args.grid):
+            label = " ".join(f"{k}={v:g}" for k, v in overrides.items()) or "adaptive (settings)"
+            configs.append((label, {**STT["endpointing"], **overrides}))
+
+        print(f"{'config':<34}{'utterances':>11}{'wrong':>7}{'min ms':>8}{'p50 ms':>8}{'max ms':>8}")
+        for label, params in configs:
+            found, wrong, latencies = 0, 0, []
+            for path, expected in fixtures:
+                count, times = replay(path, Endpointer(**params) if params else None)
+                found += count
+                wrong += abs(count - expected) if expected is not None else 0
+                latencies += times
+            latencies = sorted(latencies) or [0.0]
+            p50 = latencies[(len(latencies) - 1) // 2]
+            print(f"{label:<34}{found:>11}{wrong:>7}{latencies[0]:>8.0f}{p50:>8.0f}{latencies[-1]:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
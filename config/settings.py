@@ -1,6 +1,7 @@
 """
 Settings for Jarvis AI Assistant.
 """
+import os
 
 # General settings
 DEBUG = True
@@ -8,10 +9,65 @@ LOG_LEVEL = "DEBUG"
 
 # Audio settings
 AUDIO = {
-    "sample_rate": 44100,  # Changed from 16000 to 44100
+    # The one microphone stream (audio bus); STT, VAD and wake word get it resampled to 16 kHz once
+    "sample_rate": 44100,
     "chunk_size": 1024
 }
 
+# Text-to-speech (interfaces/voice/text_to_speech.py). Synthesized phrases are kept in
+# cache_dir keyed by (voice, rate, text), least recently played evicted past cache_max_mb.
+TTS = {
+    "voice": "en-GB-RyanNeural",
+    "rate": "+0%",
+    "cache_dir": "data/cache/tts",
+    "cache_max_mb": 50,
+    "prefetch": 1  # sentences synthesized ahead of the one playing
+}
+
+# Speech-to-text (interfaces/voice/speech_to_text.py). "whisper" decodes offline and
+# streams partial results while you speak; "google" uses the online recognizer.
+# Whisper falls back to google if it can't be loaded.
+STT = {
+    "engine": "whisper",
+    "whisper_model": "base.en",
+    "device": None,
+    "language": "en",
+    "partial_interval": 0.5,
+    # End-of-utterance detection (interfaces/voice/endpointing.py); tune offline
+    # with `python benchmarks/replay_endpointing.py recording.wav ...`
+    "endpointing": {
+        "min_hangover": 0.25,
+        "max_hangover": 1.2,
+        "initial_hangover": 0.6,
+        "gap_factor": 2.0,
+        "max_utterance": 25.0
+    }
+}
+
+# Local wake-word gate (interfaces/voice/wake_word.py); speech is only transcribed
+# after the wake word. The offline NumPy spotter is used once enrolled with
+# `python -m interfaces.voice.keyword_spotter enroll jarvis1.wav ...`; otherwise
+# Porcupine (set PICOVOICE_ACCESS_KEY).
+WAKE_WORD = {
+    "enabled": True,
+    "keyword": "jarvis",
+    "sensitivity": 0.6,
+    "model_path": "data/models/wake_word.npz"
+}
+
+# Voice activity detection for the GUI (interfaces/voice/vad_model.py). "auto" uses
+# the Silero ONNX export on onnxruntime when available, else a NumPy spectral model.
+# The ONNX file (Silero VAD v5.1.2 release) is downloaded once and checked against the
+# pinned SHA-256 on every load; a download stalled longer than timeout seconds is given
+# up on so startup falls back to the NumPy model.
+VAD = {
+    "backend": "auto",
+    "model_path": "data/models/silero_vad.onnx",
+    "url": "https://raw.githubusercontent.com/snakers4/silero-vad/v5.1.2/src/silero_vad/data/silero_vad.onnx",
+    "sha256": "2623a2953f6ff3d2c1e61740c6cdb7168133479b267dfef114a4a3cc5bdd788f",
+    "timeout": 10.0
+}
+
 # AI Engine settings
 AI_ENGINE = {
     "model_name": "microsoft/phi-3-mini-4k-instruct",
@@ -20,5 +76,49 @@ AI_ENGINE = {
     "top_p": 0.9
 }
 
+# Shared local inference server (core/inference_server.py); front ends use it
+# when it is running and fall back to loading the model themselves otherwise
+INFERENCE_SERVER = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "connect_timeout": 0.5
+}
+
+# LLM backends (core/llm_backends.py), in order of preference. Backends that
+# can't load here (e.g. openai without OPENAI_API_KEY) are skipped. "timeout" is
+# how long a backend gets to its first token before the next one is started;
+# with "hedge" on, the next one starts after the primary's p95 latency instead.
+LLM_BACKENDS = {
+    "chain": ["phi3", "openai"],
+    "timeout": 8.0,
+    "hedge": False,
+    "hedge_quantile": 0.95,
+    "options": {}
+}
+
+# Cascaded routing (core/model_router.py): small talk gets a template answer,
+# easy turns go to the small model and only hard or low-confidence turns reach
+# the backends above. small_options.model_path is a smaller quantized GGUF, taken
+# from JARVIS_SMALL_MODEL when set; without the file the small tier is disabled.
+LLM_CASCADE = {
+    "enabled": True,
+    "templates": True,
+    "small_backend": "phi3-small",
+    "small_options": {
+        "model_path": os.environ.get("JARVIS_SMALL_MODEL", "data/models/qwen2.5-0.5b-instruct-q4_k_m.gguf"),
+        "max_tokens": 80
+    },
+    "easy_threshold": 0.35,
+    "min_confidence": 0.6
+}
+
+# Offline intent classifier (core/intent_classifier.py) for commands the
+# dispatcher's patterns miss; retrain with `python -m core.intent_classifier train`
+INTENT_CLASSIFIER = {
+    "model_path": "data/models/intent_classifier.npz",
+    "examples": "config/intent_examples.json",
+    "threshold": 0.75
+}
+
 # Personality file location
 PERSONALITY_FILE = "config/personality.json"
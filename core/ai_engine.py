@@ -5,13 +5,20 @@ import os
 import json
 import time
 import openai
+from core.llm_backends import LLMBackend
+from core.response_cache import ResponseCache
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-class AIEngine:
+FALLBACK_RESPONSE = "I apologize, sir."
+
+class AIEngine(LLMBackend):
     """AI Engine using GPT-3.5-turbo via OpenAI's API for natural language processing"""
     
+    name = "openai"
+    failure_reply = FALLBACK_RESPONSE
+    
     def __init__(self, memory_manager):
         """Initialize the AI Engine using the OpenAI API"""
         logger.info("Initializing AI Engine with GPT-3.5-turbo...")
@@ -23,6 +30,10 @@ class AIEngine:
         # Set the model name to GPT-3.5-turbo
         self.model_name = "gpt-3.5-turbo"
         
+        # Skip the API round trip for repeated small talk
+        self.response_cache = ResponseCache()
+        self.cache_context = f"openai:{self.model_name}:{json.dumps(self.personality, sort_keys=True)}"
+        
         # Set up OpenAI API key (should be in your environment variables)
         openai.api_key = os.environ.get("OPENAI_API_KEY")
         if not openai.api_key:
@@ -52,18 +63,30 @@ class AIEngine:
                 ]
             }
     
-    def process(self, text):
+    def process(self, text, history=None):
         """Process user input and generate a response using GPT-3.5-turbo"""
         start_time = time.time()
         
         # Retrieve recent conversation history (last 3 interactions)
-        history = self.memory_manager.get_recent_interactions(3)
+        if history is None:
+            history = self.memory_manager.get_recent_interactions(3)
+        else:
+            history = history[-3:]
+        
+        # Answer from the cache when the same question was asked before
+        previous = history[:-1] if history and history[-1]["text"] == text else history
+        cached = self.response_cache.get(text, self.cache_context, previous)
+        if cached is not None:
+            logger.debug("AI response served from cache")
+            return cached
         
         # Prepare messages for the ChatCompletion API
         messages = self._prepare_messages(text, history)
         
         # Get response from OpenAI
         response = self._generate_response(messages)
+        if response != FALLBACK_RESPONSE:
+            self.response_cache.put(text, response, self.cache_context, previous)
         
         processing_time = time.time() - start_time
         logger.debug(f"AI response generated in {processing_time:.2f} seconds")
@@ -115,7 +138,11 @@ class AIEngine:
             return response
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
-            return "I apologize, sir."
+            return FALLBACK_RESPONSE
+    
+    def close(self):
+        """Flush the persistent response cache"""
+        self.response_cache.close()
     
     def fine_tune(self, training_data):
         """Placeholder for fine-tuning functionality (not applicable with OpenAI API)"""
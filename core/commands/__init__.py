@@ -0,0 +1,19 @@
+"""
+Command intents for Jarvis, one module per integration.
+Each module exposes register(dispatcher, jarvis) and PHRASES, its fixed replies.
+"""
+from core.commands import desktop, screen, spotify
+
+MODULES = [spotify, screen, desktop]
+
+
+def register_all(dispatcher, jarvis):
+    """Register every command module's intents with the dispatcher"""
+    for module in MODULES:
+        module.register(dispatcher, jarvis)
+    return dispatcher
+
+
+def canned_phrases():
+    """Every command's fixed replies, for pre-warming the TTS phrase cache"""
+    return [phrase for module in MODULES for phrase in module.PHRASES]
@@ -0,0 +1,29 @@
+"""
+Desktop application commands.
+"""
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FILLER = {"the", "app", "application"}
+
+# Fixed replies, synthesized ahead of time by the TTS phrase cache
+PHRASES = ["Which application would you like me to open, sir?"]
+
+
+def register(dispatcher, jarvis):
+    """Register desktop control intents"""
+
+    def open_application(slots):
+        app_name = slots.get("app")
+        if not app_name:
+            return "Which application would you like me to open, sir?", True
+        try:
+            jarvis.desktop.open_application(app_name)
+            return f"Opening {app_name} for you, sir.", False
+        except Exception as e:
+            logger.error(f"Error opening application: {str(e)}")
+            return f"I couldn't open {app_name}, sir.", False
+
+    dispatcher.register("desktop.open", ["open {app?}", "launch {app?}", "start {app?}"],
+                        open_application, priority=1, strip_words=FILLER)
@@ -0,0 +1,39 @@
+"""
+Screen monitoring commands.
+"""
+import threading
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fixed replies, synthesized ahead of time by the TTS phrase cache
+PHRASES = [
+    "Screen monitoring is already running.", "Continuous screen monitoring started.",
+    "Continuous screen monitoring stopped.", "Screen monitoring is not running.",
+]
+
+
+def register(dispatcher, jarvis):
+    """Register screen reader intents"""
+
+    def start_monitoring(slots):
+        if jarvis.screen_monitoring_thread and jarvis.screen_monitoring_thread.is_alive():
+            return "Screen monitoring is already running.", False
+        def monitor_callback(screenshot):
+            ocr_text = jarvis.screen_reader.read_text_from_screen()
+            logger.info("Monitored Screen OCR: %s", ocr_text)
+        def monitor():
+            jarvis.screen_reader.monitor_for_changes(callback=monitor_callback)
+        jarvis.screen_monitoring_thread = threading.Thread(target=monitor, daemon=True)
+        jarvis.screen_monitoring_thread.start()
+        return "Continuous screen monitoring started.", False
+
+    def stop_monitoring(slots):
+        if jarvis.screen_monitoring_thread and jarvis.screen_monitoring_thread.is_alive():
+            jarvis.screen_reader.stop_monitoring()
+            jarvis.screen_monitoring_thread.join()
+            return "Continuous screen monitoring stopped.", False
+        return "Screen monitoring is not running.", False
+
+    dispatcher.register("screen.start_monitoring", ["start screen monitoring"], start_monitoring)
+    dispatcher.register("screen.stop_monitoring", ["stop screen monitoring"], stop_monitoring)
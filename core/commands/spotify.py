@@ -0,0 +1,86 @@
+"""
+Spotify and volume commands.
+"""
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FILLER = {"play", "spotify", "music", "on", "the"}
+VOLUME_STEP = 20
+
+# Fixed replies, synthesized ahead of time by the TTS phrase cache
+PHRASES = [
+    "Playing next track, sir.", "I couldn't skip to the next track, sir.",
+    "Playing previous track, sir.", "I couldn't go to the previous track, sir.",
+    "Paused music, sir.", "I couldn't pause the music, sir.",
+    "Do you want me to play music on Spotify? Please specify the song name.",
+    "Please specify a volume level between 0 and 100, sir.", "I couldn't set the volume, sir.",
+    "I couldn't find Spotify's volume, sir.",
+]
+
+
+def register(dispatcher, jarvis):
+    """Register Spotify intents"""
+    spotify = jarvis.spotify
+
+    def next_track(slots):
+        if spotify.next_track():
+            return "Playing next track, sir.", False
+        return "I couldn't skip to the next track, sir.", False
+
+    def previous_track(slots):
+        if spotify.previous_track():
+            return "Playing previous track, sir.", False
+        return "I couldn't go to the previous track, sir.", False
+
+    def pause(slots):
+        if spotify.pause():
+            return "Paused music, sir.", False
+        return "I couldn't pause the music, sir.", False
+
+    def play(slots):
+        song_name = slots.get("song")
+        if not song_name:
+            return "Do you want me to play music on Spotify? Please specify the song name.", True
+        if spotify.search_and_play(song_name):
+            return f"Playing {song_name} on Spotify, sir.", False
+        return f"I couldn't play {song_name}, sir.", False
+
+    def volume(slots):
+        level = slots.get("level")
+        if level is None:
+            return "Please specify a volume level between 0 and 100, sir.", False
+        if spotify.set_volume(level):
+            return f"Set Spotify volume to {level}%, sir.", False
+        return "I couldn't set the volume, sir.", False
+
+    def change_volume(step):
+        def handler(slots):
+            current = spotify.get_volume()
+            if current is None:
+                return "I couldn't find Spotify's volume, sir.", False
+            level = max(0, min(100, current + step))
+            if spotify.set_volume(level):
+                return f"Set Spotify volume to {level}%, sir.", False
+            return "I couldn't set the volume, sir.", False
+        return handler
+
+    dispatcher.register("spotify.next", [
+        "spotify * next", "next * spotify", "music * next", "next * music", "next track", "next song",
+    ], next_track)
+    dispatcher.register("spotify.previous", [
+        "spotify * previous", "previous * spotify", "music * previous", "previous * music",
+        "previous track", "previous song",
+    ], previous_track)
+    dispatcher.register("spotify.pause", [
+        "spotify * pause", "pause * spotify", "music * pause", "pause * music",
+    ], pause)
+    dispatcher.register("spotify.play", [
+        "play {song?} on spotify", "play {song?} on music", "spotify {song?}", "music {song?}",
+        "play music", "play spotify",
+    ], play, strip_words=FILLER)
+    dispatcher.register("spotify.volume", ["volume {level?:int}"], volume)
+    dispatcher.register("spotify.volume_up", ["volume up", "louder"], change_volume(VOLUME_STEP),
+                        priority=1)
+    dispatcher.register("spotify.volume_down", ["volume down", "quieter"], change_volume(-VOLUME_STEP),
+                        priority=1)
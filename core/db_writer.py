@@ -0,0 +1,189 @@
+"""
+SQLite connection layer for Jarvis long-term memory.
+Keeps one long-lived WAL connection for reads and a background writer
+thread that groups queued inserts into batched transactions.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+
+class SQLiteWriter:
+    """Pooled SQLite access with write-behind batching"""
+
+    def __init__(self, db_path, max_queue=1000, batch_size=64, busy_timeout=5.0):
+        """
+        Initialize the connection layer
+        Args:
+            db_path (str): Path to the SQLite database
+            max_queue (int): Maximum number of pending writes before callers block
+            batch_size (int): Maximum number of statements per transaction
+            busy_timeout (float): Seconds to wait on a locked database
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "max_queue_depth": 0,
+            "batches": 0,
+            "statements": 0,
+            "errors": 0,
+            "blocked_puts": 0,
+            "last_commit_ms": 0.0,
+            "max_commit_ms": 0.0,
+            "total_commit_ms": 0.0,
+        }
+
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer_loop, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        """Open a WAL-mode connection; transactions are managed explicitly"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def execute(self, sql, params=()):
+        """Queue a write statement; blocks only when the queue is full"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("SQLiteWriter is closed")
+
+        item = (sql, params)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._metrics_lock:
+                self._metrics["blocked_puts"] += 1
+            self._queue.put(item)
+
+        depth = self._queue.qsize()
+        with self._metrics_lock:
+            if depth > self._metrics["max_queue_depth"]:
+                self._metrics["max_queue_depth"] = depth
+
+    def execute_now(self, sql, params=()):
+        """Run a statement synchronously on the read connection (schema changes, migrations)"""
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    def executescript(self, script):
+        """Run a SQL script synchronously on the read connection"""
+        with self._read_lock:
+            self._read_conn.executescript(script)
+
+    def query(self, sql, params=()):
+        """Run a read query and return all rows"""
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    def flush(self, timeout=None):
+        """Block until every write queued so far has been committed"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush pending writes, stop the writer thread and close connections"""
+        if self._closed:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._closed = True
+        with self._read_lock:
+            self._read_conn.close()
+
+    def get_metrics(self):
+        """Return queue depth and commit latency statistics"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics["queue_depth"] = self._queue.qsize()
+        batches = metrics["batches"]
+        metrics["avg_commit_ms"] = metrics["total_commit_ms"] / batches if batches else 0.0
+        return metrics
+
+    def _writer_loop(self):
+        """Drain the queue into batched transactions"""
+        conn = self._connect()
+        running = True
+        try:
+            while running:
+                item = self._queue.get()
+                batch = []
+                waiters = []
+                while True:
+                    if item is _STOP:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if not running or len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self._commit_batch(conn, batch)
+                for waiter in waiters:
+                    waiter.set()
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn, batch):
+        """Write one batch of statements inside a single transaction"""
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN")
+            for sql, params in batch:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.error(f"Database error in batched write, retrying row by row: {str(e)}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            self._commit_individually(conn, batch)
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._metrics_lock:
+            self._metrics["batches"] += 1
+            self._metrics["statements"] += len(batch)
+            self._metrics["last_commit_ms"] = elapsed_ms
+            self._metrics["total_commit_ms"] += elapsed_ms
+            if elapsed_ms > self._metrics["max_commit_ms"]:
+                self._metrics["max_commit_ms"] = elapsed_ms
+
+    def _commit_individually(self, conn, batch):
+        """Fallback for a failed batch so one bad statement doesn't drop its neighbours"""
+        for sql, params in batch:
+            try:
+                conn.execute(sql, params)
+            except sqlite3.Error as e:
+                logger.error(f"Database error: {str(e)}")
+                with self._metrics_lock:
+                    self._metrics["errors"] += 1
@@ -0,0 +1,425 @@
+"""
+Event-driven turn pipeline for Jarvis.
+Capture, transcription, routing, generation and speech run as asyncio
+stages joined by bounded queues, so the next utterance can be captured and
+transcribed while the previous reply is still generating or playing.
+Routing waits for the previous reply, because it reads the conversation
+state (follow-ups, last response) that reply leaves behind.
+Blocking work (STT, pyautogui, sqlite, llama.cpp) runs in executors;
+llama.cpp gets its own single thread because it isn't thread-safe. Capture
+reads run on daemon threads, so a microphone read that never returns can't
+keep the process alive at exit.
+"""
+import asyncio
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from core.speech_pipeline import StreamingResponder
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_END = object()
+
+
+class Turn:
+    """One utterance travelling through the pipeline"""
+
+    def __init__(self, turn_id, item):
+        self.id = turn_id
+        self.item = item  # raw capture: text or audio for the transcriber
+        self.text = None
+        self.reply = None
+        self.expecting_followup = False
+        self.routed_to = None  # "command" or "llm"
+        self.sentences = 0
+        self.marks = {"captured": time.perf_counter()}
+
+    def mark(self, name):
+        self.marks.setdefault(name, time.perf_counter())
+
+    def elapsed_ms(self, start, end):
+        if start in self.marks and end in self.marks:
+            return (self.marks[end] - self.marks[start]) * 1000
+        return None
+
+
+class MicrophoneSource:
+    """Live capture through SpeechToText.capture(); silence comes back as """""
+
+    def __init__(self, stt, is_running=lambda: True, wake=None, awake=lambda: True, on_wake=None):
+        """
+        Args:
+            stt: SpeechToText
+            is_running (callable): False once Jarvis is shutting down
+            wake: WakeWordDetector attached to stt.audio; when set, nothing is captured
+                or transcribed until it fires
+            awake (callable): True while a conversation is open and no wake word is needed
+            on_wake (callable): Called when the wake word opens a conversation
+        """
+        self.stt = stt
+        self.is_running = is_running
+        self.wake = wake
+        self.awake = awake
+        self.on_wake = on_wake
+
+    def read(self):
+        if not self.is_running():
+            return None
+        if self.wake and not self.awake():
+            # The wake word listens on the capture thread, so it has to run before capture()
+            self.stt.audio.start()
+            # Detections inside audio that was already handled are stale
+            self.wake.clear(before=self.stt.audio.cursor)
+            position = None
+            while position is None:
+                if not self.is_running():
+                    return None
+                position = self.wake.wait(0.5)
+            if self.on_wake:
+                self.on_wake()
+            # Transcribe what follows the wake word, not the wake word itself
+            self.stt.audio.skip_to(position)
+        audio = self.stt.capture()
+        return audio if audio is not None else ""
+
+
+class TextSource:
+    """Replays typed or scripted utterances (headless mode)"""
+
+    def __init__(self, lines, interval=0.0):
+        self.lines = [line.strip() for line in lines if line.strip()]
+        self.interval = interval
+        self._index = 0
+
+    def read(self):
+        if self._index >= len(self.lines):
+            return None
+        if self.interval and self._index:
+            time.sleep(self.interval)
+        line = self.lines[self._index]
+        self._index += 1
+        return line
+
+
+class WavSource:
+    """Replays WAV files as captured utterances (headless mode)"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._index = 0
+
+    def read(self):
+        if self._index >= len(self.paths):
+            return None
+        path = self.paths[self._index]
+        self._index += 1
+        with wave.open(path, "rb") as f:
+            return {
+                "path": path,
+                "pcm": f.readframes(f.getnframes()),
+                "sample_rate": f.getframerate(),
+                "sample_width": f.getsampwidth(),
+                "channels": f.getnchannels(),
+            }
+
+
+class NullSpeaker:
+    """Speech sink that plays nothing; playback 'starts' as soon as a sentence is queued"""
+
+    def __init__(self):
+        self.sentences = []
+
+    def speak_queued(self, text, on_start=None):
+        self.sentences.append(text)
+        if on_start:
+            on_start()
+
+    def speak(self, text):
+        self.sentences.append(text)
+
+    def prewarm(self, phrases):
+        pass
+
+    def wait_until_done(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def cleanup(self):
+        pass
+
+
+class _TurnEngine:
+    """Adapts generate() to StreamingResponder for one turn, marking its first token"""
+
+    def __init__(self, generate, turn):
+        self.generate = generate
+        self.turn = turn
+
+    def process_stream(self, text):
+        try:
+            for token in self.generate(text):
+                self.turn.mark("first_token")
+                yield token
+        except Exception as e:
+            # End the reply here; what was generated so far is still spoken
+            logger.error(f"Generation error: {str(e)}")
+
+
+class _QueueSpeaker:
+    """Hands StreamingResponder's sentences from the LLM thread to the speak stage"""
+
+    def __init__(self, loop, out, turn):
+        self.loop = loop
+        self.out = out
+        self.turn = turn
+
+    def speak_queued(self, text, on_start=None):
+        # Blocks while the queue is full: back-pressure on generation
+        asyncio.run_coroutine_threadsafe(self.out.put((self.turn, text)), self.loop).result()
+
+
+class TurnPipeline:
+    """Asyncio stages: capture -> transcribe -> route -> generate -> speak"""
+
+    def __init__(self, source, transcribe, route, generate, speaker, on_reply=None,
+                 queue_size=4, half_duplex=True, io_workers=4, min_sentence_chars=10):
+        """
+        Initialize the pipeline
+        Args:
+            source: Object with a blocking read() returning the next utterance (text or
+                audio), "" for silence, or None when input has ended
+            transcribe (callable): transcribe(item) -> text
+            route (callable): route(text) -> (reply, expecting_followup) for commands,
+                None to send the turn to the LLM, or False to drop it (no wake word)
+            generate (callable): generate(text) -> iterator of reply tokens
+            speaker: Object with speak_queued(text, on_start=None) and wait_until_done()
+            on_reply (callable): on_reply(turn) after a reply is spoken (memory, follow-ups)
+            queue_size (int): Capacity of each inter-stage queue
+            half_duplex (bool): Pause capture while Jarvis is speaking (live microphone)
+            io_workers (int): Threads for blocking I/O (STT, commands, sqlite)
+            min_sentence_chars (int): Fragments shorter than this are merged with the next sentence
+        """
+        self.source = source
+        self.transcribe = transcribe
+        self.route = route
+        self.generate = generate
+        self.speaker = speaker
+        self.on_reply = on_reply
+        self.queue_size = queue_size
+        self.half_duplex = half_duplex
+        self.min_sentence_chars = min_sentence_chars
+
+        self.io_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="jarvis-io")
+        self.llm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-llm")
+        self.turns = []
+        self.running = False
+        self._started = None
+        self._finished = None
+
+    async def run(self):
+        """Run every stage until the source ends (or stop() is called); returns the report"""
+        self.running = True
+        self._loop = asyncio.get_running_loop()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._replied = asyncio.Event()  # the previous routed turn is finished
+        self._replied.set()
+        self._started = time.perf_counter()
+
+        captured = asyncio.Queue(self.queue_size)
+        transcribed = asyncio.Queue(self.queue_size)
+        routed = asyncio.Queue(self.queue_size)
+        spoken = asyncio.Queue(self.queue_size * 8)  # sentences, not turns
+
+        await asyncio.gather(
+            self._capture(captured),
+            self._transcribe(captured, transcribed),
+            self._route(transcribed, routed),
+            self._generate(routed, spoken),
+            self._speak(spoken),
+        )
+        self._finished = time.perf_counter()
+        self.running = False
+        return self.report()
+
+    def stop(self):
+        """Stop capturing; turns already in flight finish"""
+        self.running = False
+
+    def close(self):
+        self.io_executor.shutdown(wait=False, cancel_futures=True)
+        self.llm_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _read_source(self):
+        """source.read() on a daemon thread (executor workers are joined at interpreter exit)"""
+        future = self._loop.create_future()
+
+        def deliver(result, error):
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        def read():
+            result, error = None, None
+            try:
+                result = self.source.read()
+            except Exception as e:
+                error = e
+            try:
+                self._loop.call_soon_threadsafe(deliver, result, error)
+            except RuntimeError:
+                pass  # the loop already closed
+
+        threading.Thread(target=read, name="jarvis-capture", daemon=True).start()
+        return await future
+
+    async def _capture(self, out):
+        turn_id = 0
+        while self.running:
+            if self.half_duplex:
+                # Don't listen to ourselves
+                await self._idle.wait()
+            item = await self._read_source()
+            if item is None:
+                break
+            if self.half_duplex:
+                # Held until this turn is dropped or its reply has been spoken
+                self._idle.clear()
+            turn_id += 1
+            await out.put(Turn(turn_id, item))
+        await out.put(_END)
+
+    async def _transcribe(self, inbox, out):
+        while True:
+            turn = await inbox.get()
+            if turn is _END:
+                await out.put(_END)
+                return
+            if isinstance(turn.item, str):
+                turn.text = turn.item
+            else:
+                try:
+                    turn.text = await self._loop.run_in_executor(self.io_executor, self.transcribe, turn.item)
+                except Exception as e:
+                    logger.error(f"Transcription error: {str(e)}")
+                    turn.text = ""
+            turn.mark("transcribed")
+            await out.put(turn)
+
+    async def _route(self, inbox, out):
+        while True:
+            turn = await inbox.get()
+            if turn is _END:
+                await out.put(_END)
+                return
+            # Follow-up state and the last response come from the previous reply
+            await self._replied.wait()
+            self._replied.clear()
+            try:
+                result = await self._loop.run_in_executor(self.io_executor, self.route, turn.text or "")
+            except Exception as e:
+                logger.error(f"Error routing command: {str(e)}")
+                result = ("I'm sorry, sir, something went wrong with that command.", False)
+            turn.mark("routed")
+            if result is False:
+                self._idle.set()
+                self._replied.set()
+                continue
+            if result is None:
+                turn.routed_to = "llm"
+            else:
+                turn.routed_to = "command"
+                turn.reply, turn.expecting_followup = result
+            self.turns.append(turn)
+            await out.put(turn)
+
+    async def _generate(self, inbox, out):
+        while True:
+            turn = await inbox.get()
+            if turn is _END:
+                await out.put((_END, None))
+                return
+            if turn.routed_to == "command":
+                turn.mark("first_token")
+                if turn.reply:
+                    await out.put((turn, turn.reply))
+            else:
+                await self._loop.run_in_executor(self.llm_executor, self._stream_reply, turn, out)
+            turn.mark("generated")
+            await out.put((turn, _END))
+
+    def _stream_reply(self, turn, out):
+        """Runs on the LLM thread: tokens -> sentences -> speech queue (with back-pressure)"""
+        responder = StreamingResponder(
+            _TurnEngine(self.generate, turn), _QueueSpeaker(self._loop, out, turn), self.min_sentence_chars
+        )
+        turn.reply, _ = responder.respond(turn.text)
+
+    async def _speak(self, inbox):
+        while True:
+            turn, sentence = await inbox.get()
+            if turn is _END:
+                return
+            if sentence is _END:
+                # Reply complete: wait for playback, then let capture resume
+                await self._loop.run_in_executor(self.io_executor, self.speaker.wait_until_done)
+                turn.mark("spoken")
+                if self.on_reply and turn.reply:
+                    try:
+                        await self._loop.run_in_executor(self.io_executor, self.on_reply, turn)
+                    except Exception as e:
+                        logger.error(f"Error finishing turn: {str(e)}")
+                self._log_turn(turn)
+                self._idle.set()
+                self._replied.set()
+                continue
+
+            def on_start(turn=turn):
+                self._loop.call_soon_threadsafe(turn.mark, "first_audio")
+
+            turn.sentences += 1
+            await self._loop.run_in_executor(
+                self.io_executor, self.speaker.speak_queued, sentence, on_start if turn.sentences == 1 else None
+            )
+
+    def _log_turn(self, turn):
+        ttfa = turn.elapsed_ms("transcribed", "first_audio")
+        ttfa = f"{ttfa:.0f} ms" if ttfa is not None else "n/a"
+        logger.info(
+            f"Turn {turn.id} ({turn.routed_to}): first audio {ttfa} after transcription, "
+            f"total {turn.elapsed_ms('captured', 'spoken'):.0f} ms"
+        )
+
+    def report(self):
+        """Turn throughput and per-stage latency percentiles"""
+        def percentiles(values):
+            values = sorted(v for v in values if v is not None)
+            if not values:
+                return None
+            return {
+                "p50": values[len(values) // 2],
+                "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max": values[-1],
+            }
+
+        done = [t for t in self.turns if "spoken" in t.marks]
+        wall = ((self._finished or time.perf_counter()) - self._started) if self._started else 0.0
+        return {
+            "turns": len(done),
+            "commands": sum(1 for t in done if t.routed_to == "command"),
+            "llm": sum(1 for t in done if t.routed_to == "llm"),
+            "wall_s": wall,
+            "turns_per_s": len(done) / wall if wall else 0.0,
+            "transcribe_ms": percentiles(t.elapsed_ms("captured", "transcribed") for t in done),
+            "route_ms": percentiles(t.elapsed_ms("transcribed", "routed") for t in done),
+            "first_token_ms": percentiles(t.elapsed_ms("routed", "first_token") for t in done),
+            "first_audio_ms": percentiles(t.elapsed_ms("transcribed", "first_audio") for t in done),
+            "total_ms": percentiles(t.elapsed_ms("captured", "spoken") for t in done),
+        }
@@ -0,0 +1,81 @@
+"""
+Fake streaming engine for exercising the response pipeline without a GGUF model.
+"""
+import re
+import time
+from core.llm_backends import LLMBackend
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FakeStreamingEngine(LLMBackend):
+    """Deterministic stand-in for Phi3Engine that streams canned replies token by token"""
+
+    name = "fake"
+
+    def __init__(self, replies=None, first_token_delay=0.0, token_delay=0.0):
+        """
+        Initialize the fake engine
+        Args:
+            replies (dict|str): Reply per input text, or one reply for every input
+            first_token_delay (float): Seconds before the first token (prompt processing)
+            token_delay (float): Seconds between tokens (generation speed)
+        """
+        self.replies = replies if replies is not None else (
+            "Certainly, sir. I have looked into that for you. Shall I proceed?"
+        )
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = []
+        self.recalled = []  # recalled memories passed with each call
+
+    def _reply_for(self, text):
+        if isinstance(self.replies, dict):
+            return self.replies.get(text, "I'm not sure, sir.")
+        return self.replies
+
+    def process(self, text, history=None, recalled=None):
+        """Return the full reply, like Phi3Engine.process"""
+        return "".join(self.process_stream(text, history, recalled))
+
+    def process_stream(self, text, history=None, recalled=None):
+        """Yield the reply in small word-piece tokens, like Phi3Engine.process_stream"""
+        self.calls.append(text)
+        self.recalled.append(recalled)
+        reply = self._reply_for(text)
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for i, token in enumerate(re.findall(r"\s*\S+", reply)):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield token
+
+
+class MockBackend(FakeStreamingEngine):
+    """Offline backend with a scripted latency profile, for routing tests and benchmarks"""
+
+    def __init__(self, name="mock", replies=None, latencies=(0.0,), fail_every=0, token_delay=0.0):
+        """
+        Initialize the mock backend
+        Args:
+            name (str): Backend name reported to the router
+            replies (dict|str): Reply per input text, or one reply for every input
+            latencies (list): Seconds before the first token, cycled call by call
+            fail_every (int): Raise on every n-th call (0 never fails)
+            token_delay (float): Seconds between tokens
+        """
+        super().__init__(replies, token_delay=token_delay)
+        self.name = name
+        self.latencies = list(latencies) or [0.0]
+        self.fail_every = fail_every
+
+    def process_stream(self, text, history=None, recalled=None):
+        call = len(self.calls)
+        self.first_token_delay = self.latencies[call % len(self.latencies)]
+        if self.fail_every and (call + 1) % self.fail_every == 0:
+            self.calls.append(text)
+            self.recalled.append(recalled)
+            time.sleep(self.first_token_delay)
+            raise RuntimeError(f"{self.name}: simulated failure")
+        yield from super().process_stream(text, history, recalled)
@@ -0,0 +1,134 @@
+"""
+Thin client for the shared Jarvis inference server.
+Exposes the same process()/process_stream() API as Phi3Engine.
+"""
+import os
+import json
+import urllib.request
+import urllib.error
+from config.settings import INFERENCE_SERVER
+from core.llm_backends import LLMBackend
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+SERVER_ERROR_RESPONSE = "I'm having trouble reaching my language model, sir."
+
+
+class InferenceClient(LLMBackend):
+    """Engine stand-in that forwards requests to the inference server"""
+
+    name = "server"
+    failure_reply = SERVER_ERROR_RESPONSE
+
+    def __init__(self, memory_manager, host=None, port=None, client_id=None, history_turns=20, timeout=120):
+        """
+        Initialize the client
+        Args:
+            memory_manager (MemoryManager): Local memory; recent turns and recalled memories
+                are sent with each request
+            host (str): Server host (defaults to config.settings.INFERENCE_SERVER)
+            port (int): Server port
+            client_id (str): Identity used for fair scheduling (defaults to the process id)
+            history_turns (int): Number of recent interactions sent as context
+            timeout (float): Seconds to wait for a reply
+        """
+        self.memory_manager = memory_manager
+        host = host or INFERENCE_SERVER["host"]
+        port = port or INFERENCE_SERVER["port"]
+        self.base_url = f"http://{host}:{port}"
+        self.client_id = client_id or f"pid-{os.getpid()}"
+        self.history_turns = history_turns
+        self.timeout = timeout
+
+    def is_available(self, timeout=None):
+        """Return True when the server answers its health check"""
+        try:
+            health = self._get("/health", timeout or INFERENCE_SERVER["connect_timeout"])
+            return health.get("status") == "ok"
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+
+    def health(self):
+        return self._get("/health", self.timeout)
+
+    def metrics(self):
+        return self._get("/metrics", self.timeout)
+
+    def _get(self, path, timeout):
+        with urllib.request.urlopen(self.base_url + path, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    def _post(self, path, text, history=None):
+        if history is None:
+            history = self.memory_manager.get_recent_interactions(self.history_turns)
+        history = [
+            {"timestamp": entry["timestamp"], "speaker": entry["speaker"], "text": entry["text"]}
+            for entry in history[-self.history_turns:]
+        ]
+        # Recall here: the server has no access to this process's memory
+        recalled = [
+            {"timestamp": r["timestamp"], "speaker": r["speaker"], "text": r["text"], "score": float(r["score"])}
+            for r in self.memory_manager.recall(text, k=3, exclude=[text] + [entry["text"] for entry in history])
+        ]
+        body = json.dumps({
+            "text": text, "client": self.client_id, "history": history, "recalled": recalled
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            self.base_url + path, data=body, headers={"Content-Type": "application/json"}
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def process(self, text, history=None):
+        """Generate a full reply on the server"""
+        logger.info(f"Processing input via inference server: {text}")
+        try:
+            with self._post("/v1/process", text, history) as response:
+                payload = json.loads(response.read())
+            return payload["reply"]
+        except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+            logger.error(f"Inference server error: {str(e)}")
+            return SERVER_ERROR_RESPONSE
+
+    def process_stream(self, text, history=None):
+        """Yield reply tokens as the server streams them"""
+        logger.info(f"Processing input via inference server (streaming): {text}")
+        yielded = False
+        failed = False
+        try:
+            with self._post("/v1/stream", text, history) as response:
+                for line in response:
+                    if not line.strip():
+                        continue
+                    message = json.loads(line)
+                    if "token" in message:
+                        yielded = True
+                        yield message["token"]
+                    elif "error" in message:
+                        logger.error(f"Inference server error: {message['error']}")
+                        failed = True
+                    elif message.get("done"):
+                        logger.debug(f"Inference server timing: {message.get('timing')}")
+                        break
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.error(f"Inference server error: {str(e)}")
+            failed = True
+        # After part of a reply was spoken, just end it; an apology would be spliced onto it
+        if failed and not yielded:
+            yield SERVER_ERROR_RESPONSE
+
+    def close(self):
+        """Nothing to release; the server owns the model"""
+        pass
+
+
+def connect_or_load(memory_manager):
+    """Use the shared inference server when it is running, otherwise load Phi-3 locally"""
+    client = InferenceClient(memory_manager)
+    if client.is_available():
+        logger.info(f"Using shared inference server at {client.base_url}")
+        return client
+    logger.info("Inference server not running; loading Phi-3 in this process.")
+    from core.phi3_engine import Phi3Engine
+    return Phi3Engine(memory_manager)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Shared local inference server for Jarvis.
+Owns a single engine (one Llama instance) behind a fair request queue so
+main.py and gui_main.py can share the model instead of each loading it.
+The server keeps no memory of its own: clients send their recent turns and
+the memories they recalled with each request, so only the Jarvis processes
+ever open the data/memory directory.
+
+Endpoints (localhost HTTP, JSON):
+    POST /v1/process   {"text", "client", "history", "recalled"} -> {"reply", "timing"}
+    POST /v1/stream    same body -> newline-delimited JSON: {"token"}... then {"done", "timing"}
+    GET  /health       -> {"status", "queue_depth", "clients"}
+    GET  /metrics      -> request counts and latency percentiles
+"""
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_END = object()
+
+
+class InferenceJob:
+    """One queued generation request"""
+
+    def __init__(self, client, text, history=None, stream=False, recalled=None):
+        self.client = client
+        self.text = text
+        self.history = history
+        self.recalled = recalled
+        self.stream = stream
+        self.output = queue.Queue()
+        self.cancelled = threading.Event()  # the client went away; stop generating
+        self.submitted = time.perf_counter()
+        self.timing = {}
+
+
+class FairScheduler:
+    """Per-client FIFO queues served round-robin, so one busy client can't starve another"""
+
+    def __init__(self, max_pending_per_client=16):
+        self.max_pending_per_client = max_pending_per_client
+        self._queues = OrderedDict()  # client -> deque of jobs, in round-robin order
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def submit(self, job):
+        """Queue a job; raises queue.Full when the client already has too many pending"""
+        with self._cond:
+            pending = self._queues.setdefault(job.client, deque())
+            if len(pending) >= self.max_pending_per_client:
+                raise queue.Full(f"too many pending requests for client {job.client}")
+            pending.append(job)
+            self._cond.notify()
+
+    def next_job(self, timeout=None):
+        """Pop the next job from the client whose turn it is (None on timeout or close)"""
+        with self._cond:
+            while not self._closed and not self._queues:
+                if not self._cond.wait(timeout):
+                    return None
+            if self._closed:
+                return None
+            client, pending = self._queues.popitem(last=False)
+            job = pending.popleft()
+            if pending:
+                # Re-queue the client at the back of the rotation
+                self._queues[client] = pending
+            return job
+
+    def depth(self):
+        with self._cond:
+            return sum(len(p) for p in self._queues.values())
+
+    def clients(self):
+        with self._cond:
+            return list(self._queues.keys())
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class InferenceServer:
+    """HTTP front for a single engine with a dedicated inference thread"""
+
+    def __init__(self, engine, host="127.0.0.1", port=8765, max_pending_per_client=16, latency_window=500):
+        """
+        Initialize the server
+        Args:
+            engine: Object with process(text, history=None, recalled=None) and
+                process_stream(text, history=None, recalled=None)
+            host (str): Interface to bind (keep this on localhost)
+            port (int): Port to bind (0 picks a free port)
+            max_pending_per_client (int): Back-pressure limit per client
+            latency_window (int): Number of recent requests kept for latency percentiles
+        """
+        self.engine = engine
+        self.scheduler = FairScheduler(max_pending_per_client)
+        self.latencies = deque(maxlen=latency_window)
+        self.counters = {"requests": 0, "streams": 0, "errors": 0, "rejected": 0, "cancelled": 0}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+        self._worker = threading.Thread(target=self._worker_loop, name="inference-worker", daemon=True)
+        self._http_thread = None
+
+    def start(self):
+        """Start the worker and serve HTTP on a background thread"""
+        self._worker.start()
+        self._http_thread = threading.Thread(target=self.httpd.serve_forever, name="inference-http", daemon=True)
+        self._http_thread.start()
+        logger.info(f"Inference server listening on http://{self.host}:{self.port}")
+
+    def serve_forever(self):
+        """Start the worker and serve HTTP on the calling thread"""
+        self._worker.start()
+        logger.info(f"Inference server listening on http://{self.host}:{self.port}")
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """Stop accepting requests and shut the worker down"""
+        self.scheduler.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def submit(self, job):
+        try:
+            self.scheduler.submit(job)
+        except queue.Full:
+            with self._lock:
+                self.counters["rejected"] += 1
+            raise
+
+    def _worker_loop(self):
+        """The only thread that touches the engine"""
+        while True:
+            job = self.scheduler.next_job()
+            if job is None:
+                return
+            if job.cancelled.is_set():
+                with self._lock:
+                    self.counters["cancelled"] += 1
+                continue
+            start = time.perf_counter()
+            job.timing["queue_ms"] = (start - job.submitted) * 1000
+            try:
+                if job.stream:
+                    tokens = self.engine.process_stream(job.text, history=job.history, recalled=job.recalled)
+                    try:
+                        for token in tokens:
+                            if job.cancelled.is_set():
+                                logger.info(f"Client {job.client} disconnected; generation cancelled")
+                                with self._lock:
+                                    self.counters["cancelled"] += 1
+                                break
+                            if "ttft_ms" not in job.timing:
+                                job.timing["ttft_ms"] = (time.perf_counter() - job.submitted) * 1000
+                            job.output.put(("token", token))
+                    finally:
+                        if hasattr(tokens, "close"):
+                            tokens.close()
+                else:
+                    job.output.put(("reply", self.engine.process(job.text, history=job.history, recalled=job.recalled)))
+            except Exception as e:
+                logger.error(f"Inference error for client {job.client}: {str(e)}")
+                with self._lock:
+                    self.counters["errors"] += 1
+                job.output.put(("error", str(e)))
+            job.timing["generation_ms"] = (time.perf_counter() - start) * 1000
+            job.timing["total_ms"] = (time.perf_counter() - job.submitted) * 1000
+            with self._lock:
+                self.counters["streams" if job.stream else "requests"] += 1
+                self.latencies.append(dict(job.timing))
+            job.output.put((_END, None))
+
+    def health(self):
+        return {
+            "status": "ok",
+            "queue_depth": self.scheduler.depth(),
+            "clients": self.scheduler.clients(),
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    def metrics(self):
+        """Request counters and p50/p95 latency over the recent window"""
+        with self._lock:
+            samples = list(self.latencies)
+            result = dict(self.counters)
+        for key in ("queue_ms", "ttft_ms", "generation_ms", "total_ms"):
+            values = sorted(s[key] for s in samples if key in s)
+            if values:
+                result[key] = {
+                    "p50": values[len(values) // 2],
+                    "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                    "max": values[-1],
+                }
+        result["queue_depth"] = self.scheduler.depth()
+        return result
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug("inference-server: " + format % args)
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_chunk(self, payload):
+                data = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._send_json(200, server.health())
+                elif self.path == "/metrics":
+                    self._send_json(200, server.metrics())
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                if self.path not in ("/v1/process", "/v1/stream"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    text = request["text"]
+                except (ValueError, KeyError):
+                    self._send_json(400, {"error": "expected JSON body with 'text'"})
+                    return
+
+                stream = self.path == "/v1/stream"
+                client = request.get("client") or self.client_address[0]
+                job = InferenceJob(client, text, request.get("history"), stream, request.get("recalled"))
+                try:
+                    server.submit(job)
+                except queue.Full as e:
+                    self._send_json(429, {"error": str(e)})
+                    return
+
+                if not stream:
+                    kind, value = job.output.get()
+                    job.output.get()  # end marker
+                    if kind == "error":
+                        self._send_json(500, {"error": value})
+                    else:
+                        self._send_json(200, {"reply": value, "timing": job.timing})
+                    return
+
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    while True:
+                        kind, value = job.output.get()
+                        if kind is _END:
+                            break
+                        if kind == "token":
+                            self._write_chunk({"token": value})
+                        else:
+                            self._write_chunk({"error": value})
+                    self._write_chunk({"done": True, "timing": job.timing})
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Nobody is reading: free the model for the other clients
+                    job.cancelled.set()
+                    self.close_connection = True
+
+        return Handler
+
+
+def main():
+    """Load the Phi-3 model once and serve it to every Jarvis front end"""
+    from config.settings import INFERENCE_SERVER
+    from core.phi3_engine import Phi3Engine
+    from utils.logger import setup_logger
+
+    setup_logger()
+    # No MemoryManager: history and recalled memories arrive with each request
+    engine = Phi3Engine(None)
+    server = InferenceServer(engine, INFERENCE_SERVER["host"], INFERENCE_SERVER["port"])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Inference server shutting down...")
+    finally:
+        server.stop()
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Offline intent classifier for Jarvis commands.
+Hashed word/char n-gram features feed a softmax linear model in NumPy, so
+paraphrased commands ("skip this song", "turn it down") reach the Spotify,
+desktop and screen handlers without a trip through the LLM.
+
+Usage:
+    python -m core.intent_classifier train [--examples FILE] [--db FILE] [--out FILE]
+    python -m core.intent_classifier eval [--examples FILE] [--db FILE] [--threshold T]
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import numpy as np
+from core.semantic_index import HashingVectorizer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+NO_INTENT = "none"
+_NUMBER = re.compile(r"\d+")
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over hashed n-gram features"""
+
+    def __init__(self, dim=4096, threshold=0.75):
+        """
+        Initialize the classifier
+        Args:
+            dim (int): Hashed feature dimension
+            threshold (float): Minimum probability for a prediction to be acted on
+        """
+        self.dim = dim
+        self.threshold = threshold
+        self.vectorizer = HashingVectorizer(dim)
+        self.labels = []
+        self.weights = None
+        self.bias = None
+
+    def _features(self, text):
+        # Any number is the same feature: "volume 30" and "volume 70" are one pattern
+        return self.vectorizer.transform(_NUMBER.sub(" 0 ", text))
+
+    def _matrix(self, texts):
+        return np.stack([self._features(t) for t in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+    def fit(self, texts, labels, epochs=400, learning_rate=10.0, l2=1e-4):
+        """
+        Train on labeled utterances with full-batch gradient descent
+        Args:
+            texts (list): Utterances
+            labels (list): Intent name per utterance ("none" for chat)
+            epochs (int): Gradient steps
+            learning_rate (float): Step size
+            l2 (float): Weight decay
+        """
+        self.labels = sorted(set(labels))
+        index = {label: i for i, label in enumerate(self.labels)}
+        x = self._matrix(texts)
+        y = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        y[np.arange(len(texts)), [index[label] for label in labels]] = 1.0
+
+        # Weight classes inversely to their size so "none" doesn't swamp small intents
+        class_weight = len(texts) / (len(self.labels) * y.sum(axis=0))
+        sample_weight = (y @ class_weight)[:, None] / len(texts)
+
+        self.weights = np.zeros((self.dim, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+        for _ in range(epochs):
+            probs = self._softmax(x @ self.weights + self.bias)
+            grad = (probs - y) * sample_weight
+            self.weights -= learning_rate * (x.T @ grad + l2 * self.weights)
+            self.bias -= learning_rate * grad.sum(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(logits):
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict_proba(self, text):
+        """Return {intent: probability} for an utterance"""
+        probs = self._softmax(self._features(text) @ self.weights + self.bias)
+        return dict(zip(self.labels, probs.tolist()))
+
+    def predict(self, text):
+        """
+        Classify an utterance
+        Returns:
+            tuple: (intent name or None, confidence); None when it's chat or below the threshold
+        """
+        probs = self._softmax(self._features(text) @ self.weights + self.bias)
+        best = int(np.argmax(probs))
+        confidence = float(probs[best])
+        label = self.labels[best]
+        if label == NO_INTENT or confidence < self.threshold:
+            return None, confidence
+        return label, confidence
+
+    def evaluate(self, texts, labels):
+        """
+        Accuracy, per-intent precision/recall and prediction latency
+        Args:
+            texts (list): Held-out utterances
+            labels (list): Their intent names
+        Returns:
+            dict: Evaluation report
+        """
+        timings = []
+        predicted = []
+        for text in texts:
+            start = time.perf_counter()
+            intent, _ = self.predict(text)
+            timings.append((time.perf_counter() - start) * 1000)
+            predicted.append(intent or NO_INTENT)
+
+        per_intent = {}
+        for label in sorted(set(labels) | set(predicted)):
+            tp = sum(1 for p, t in zip(predicted, labels) if p == label and t == label)
+            fp = sum(1 for p, t in zip(predicted, labels) if p == label and t != label)
+            fn = sum(1 for p, t in zip(predicted, labels) if p != label and t == label)
+            per_intent[label] = {
+                "precision": tp / (tp + fp) if tp + fp else 0.0,
+                "recall": tp / (tp + fn) if tp + fn else 0.0,
+                "support": tp + fn,
+            }
+        timings.sort()
+        # Commands sent to the LLM by mistake are cheap to recover from; chat
+        # executed as a command is not, so that's reported separately
+        false_actions = sum(1 for p, t in zip(predicted, labels) if p != NO_INTENT and p != t)
+        return {
+            "accuracy": sum(1 for p, t in zip(predicted, labels) if p == t) / len(labels) if labels else 0.0,
+            "false_action_rate": false_actions / len(labels) if labels else 0.0,
+            "per_intent": per_intent,
+            "latency_ms": {
+                "p50": timings[len(timings) // 2] if timings else 0.0,
+                "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))] if timings else 0.0,
+                "max": timings[-1] if timings else 0.0,
+            },
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, weights=self.weights, bias=self.bias, labels=np.array(self.labels),
+                 dim=self.dim, threshold=self.threshold)
+        os.replace(tmp_path, path)
+        logger.info(f"Intent classifier saved to {path}")
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        classifier = cls(int(data["dim"]), float(data["threshold"]))
+        classifier.weights = data["weights"]
+        classifier.bias = data["bias"]
+        classifier.labels = [str(label) for label in data["labels"]]
+        return classifier
+
+
+def load_examples(examples_path):
+    """Read {intent: [utterances]} from the labeled examples file"""
+    with open(examples_path, "r", encoding="utf-8") as f:
+        examples = json.load(f)
+    texts, labels = [], []
+    for intent, utterances in examples.items():
+        for text in utterances:
+            texts.append(text)
+            labels.append(intent)
+    return texts, labels
+
+
+def load_logged_commands(db_path, dispatcher, limit=5000):
+    """
+    Weakly label logged user turns from long_term.db: utterances the
+    rule-based dispatcher matched become examples of that intent
+    """
+    if not db_path or not os.path.exists(db_path):
+        return [], []
+    try:
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            "SELECT DISTINCT text FROM interactions WHERE lower(speaker) = 'user' ORDER BY id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Database error reading logged commands: {str(e)}")
+        return [], []
+    texts, labels = [], []
+    for (text,) in rows:
+        match = dispatcher.match(text or "")
+        if match is not None:
+            texts.append(text)
+            labels.append(match.name)
+    return texts, labels
+
+
+def build_training_set(examples_path, db_path=None):
+    texts, labels = load_examples(examples_path)
+    if db_path:
+        from core.commands import register_all
+        from core.intent_dispatcher import IntentDispatcher
+        dispatcher = register_all(IntentDispatcher(), _NullJarvis())
+        logged_texts, logged_labels = load_logged_commands(db_path, dispatcher)
+        logger.info(f"Adding {len(logged_texts)} logged commands to the intent training set")
+        texts += logged_texts
+        labels += logged_labels
+    return texts, labels
+
+
+def load_or_train(config=None):
+    """Load the saved model, training and saving one from the examples file if there is none"""
+    if config is None:
+        from config.settings import INTENT_CLASSIFIER
+        config = INTENT_CLASSIFIER
+    # A model older than the examples file misses the examples added since
+    if os.path.exists(config["model_path"]) and (
+        not os.path.exists(config["examples"])
+        or os.path.getmtime(config["model_path"]) >= os.path.getmtime(config["examples"])
+    ):
+        try:
+            classifier = IntentClassifier.load(config["model_path"])
+            classifier.threshold = config.get("threshold", classifier.threshold)
+            return classifier
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f"Error loading intent classifier, retraining: {str(e)}")
+    texts, labels = build_training_set(config["examples"])
+    classifier = IntentClassifier(config.get("dim", 4096), config.get("threshold", 0.75)).fit(texts, labels)
+    try:
+        classifier.save(config["model_path"])
+    except OSError as e:
+        logger.error(f"Error saving intent classifier: {str(e)}")
+    return classifier
+
+
+class _NullJarvis:
+    """Lets command modules register their intents without any devices attached"""
+    spotify = desktop = screen_reader = screen_monitoring_thread = None
+
+
+def _split(texts, labels, holdout=0.25):
+    """Deterministic stratified split: every 4th example of each intent is held out"""
+    train, test = ([], []), ([], [])
+    seen = {}
+    for text, label in zip(texts, labels):
+        seen[label] = seen.get(label, 0) + 1
+        target = test if seen[label] % round(1 / holdout) == 0 else train
+        target[0].append(text)
+        target[1].append(label)
+    return train, test
+
+
+def holdout_report(texts, labels, threshold):
+    """Fit on three quarters of the examples and score the held-out quarter"""
+    (train_texts, train_labels), (test_texts, test_labels) = _split(texts, labels)
+    classifier = IntentClassifier(threshold=threshold).fit(train_texts, train_labels)
+    return classifier.evaluate(test_texts, test_labels), len(test_texts)
+
+
+def print_report(report):
+    print(f"Accuracy: {report['accuracy']:.1%}   false actions: {report['false_action_rate']:.1%}")
+    latency = report["latency_ms"]
+    print(f"Latency: p50 {latency['p50'] * 1000:.0f} us, p95 {latency['p95'] * 1000:.0f} us, "
+          f"max {latency['max'] * 1000:.0f} us")
+    print(f"{'intent':<26}{'precision':>10}{'recall':>10}{'support':>9}")
+    for intent, stats in report["per_intent"].items():
+        print(f"{intent:<26}{stats['precision']:>10.2f}{stats['recall']:>10.2f}{stats['support']:>9}")
+
+
+def main():
+    from config.settings import INTENT_CLASSIFIER
+
+    parser = argparse.ArgumentParser(description="Train or evaluate the Jarvis intent classifier")
+    parser.add_argument("command", choices=["train", "eval"])
+    parser.add_argument("--examples", default=INTENT_CLASSIFIER["examples"])
+    parser.add_argument("--db", default="data/memory/long_term.db", help="long_term.db with logged interactions")
+    parser.add_argument("--model", "--out", dest="model", default=INTENT_CLASSIFIER["model_path"])
+    parser.add_argument("--threshold", type=float, default=INTENT_CLASSIFIER["threshold"])
+    args = parser.parse_args()
+
+    texts, labels = build_training_set(args.examples, args.db)
+    # Scoring the examples a model was trained on says nothing, so both commands
+    # report on a held-out split
+    report, held_out = holdout_report(texts, labels, args.threshold)
+    print(f"Held-out evaluation ({held_out} of {len(texts)} examples):")
+    print_report(report)
+    if args.command == "train":
+        IntentClassifier(threshold=args.threshold).fit(texts, labels).save(args.model)
+        print(f"Saved model trained on {len(texts)} examples to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
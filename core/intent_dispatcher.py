@@ -0,0 +1,295 @@
+"""
+Intent dispatcher for Jarvis commands.
+Intents are declared as word patterns with slots ("volume {level:int}",
+"play {song} on spotify", "open {app?}"). Every literal phrase of every
+pattern is compiled into one word-level Aho-Corasick automaton, so matching
+scans the input once no matter how many commands are registered; only the
+patterns whose literals all occurred are then checked for slot filling.
+"""
+import re
+from collections import deque
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SLOT = re.compile(r"\{(\w+)(\?)?(?::(\w+))?\}")
+_WORD = re.compile(r"[a-z0-9']+")
+_INT = re.compile(r"\d+")
+
+# Words that never belong in a slot value when slots are guessed for a classified command
+FALLBACK_FILLER = {
+    "a", "an", "the", "some", "something", "me", "my", "i", "you", "it", "can", "could", "would", "will",
+    "please", "want", "like", "to", "for", "by", "on", "up", "just", "now", "let's", "lets", "put", "fire",
+    "bring", "pull", "load", "run", "get", "give", "show", "turn", "set", "change", "make", "hear", "listen",
+    "queue", "percent", "level",
+}
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+class Pattern:
+    """One compiled pattern: literal phrases (in order) separated by slots or gaps"""
+
+    def __init__(self, intent, source):
+        self.intent = intent
+        self.source = source
+        self.parts = []  # ("literal", (words...)) or ("slot", name, optional, kind) or ("gap",)
+        literal = []
+        for piece in source.split():
+            slot = _SLOT.fullmatch(piece)
+            if slot or piece == "*":
+                if literal:
+                    self.parts.append(("literal", tuple(literal)))
+                    literal = []
+                if slot:
+                    name, optional, kind = slot.groups()
+                    self.parts.append(("slot", name, bool(optional), kind or "text"))
+                else:
+                    self.parts.append(("gap",))
+            else:
+                literal.extend(tokenize(piece))
+        if literal:
+            self.parts.append(("literal", tuple(literal)))
+        self.literals = [p[1] for p in self.parts if p[0] == "literal"]
+        if not self.literals:
+            raise ValueError(f"pattern '{source}' needs at least one literal word")
+        self.literal_words = sum(len(lit) for lit in self.literals)
+        self.typed_slots = sum(1 for p in self.parts if p[0] == "slot" and p[3] != "text")
+
+    def bind(self, words, occurrences):
+        """
+        Fit the pattern to the input
+        Args:
+            words (list): Input tokens
+            occurrences (dict): literal -> sorted start positions found by the automaton
+        Returns:
+            dict: Slot values, or None if the pattern doesn't fit
+        """
+        # Place literals left to right at their earliest positions after the previous one
+        spans = []
+        cursor = 0
+        for literal in self.literals:
+            start = next((s for s in occurrences[literal] if s >= cursor), None)
+            if start is None:
+                return None
+            spans.append((start, start + len(literal)))
+            cursor = start + len(literal)
+
+        slots = {}
+        literal_index = 0
+        prev_end = 0
+        for part in self.parts:
+            if part[0] == "literal":
+                prev_end = spans[literal_index][1]
+                literal_index += 1
+                continue
+            if part[0] == "gap":
+                continue
+            # A slot spans from the previous literal to the next one (or the end of input)
+            next_start = spans[literal_index][0] if literal_index < len(spans) else len(words)
+            value_words = words[prev_end:next_start]
+            _, name, optional, kind = part
+            value = self.intent.convert(name, kind, value_words)
+            if value is None and not optional:
+                return None
+            slots[name] = value
+        return slots
+
+
+class Intent:
+    """A named command with its patterns and handler"""
+
+    def __init__(self, name, patterns, handler, priority=0, strip_words=()):
+        """
+        Initialize the intent
+        Args:
+            name (str): Intent name, e.g. "spotify.play"
+            patterns (list): Pattern strings; {slot}, {slot?} (optional), {slot:int}, * (any words)
+            handler (callable): handler(slots) -> (response, expecting_followup)
+            priority (int): Tie-breaker between intents matching the same input
+            strip_words (iterable): Filler words removed from text slots ("the", "app")
+        """
+        self.name = name
+        self.handler = handler
+        self.priority = priority
+        self.strip_words = set(strip_words)
+        self.patterns = [Pattern(self, p) for p in patterns]
+
+    def convert(self, name, kind, value_words):
+        if kind == "int":
+            match = _INT.search(" ".join(value_words))
+            return int(match.group()) if match else None
+        value = " ".join(w for w in value_words if w not in self.strip_words)
+        return value or None
+
+    def guess_slots(self, text):
+        """
+        Best-effort slots for an utterance none of the patterns matched (classifier
+        fallback): integers are taken from anywhere, and a single text slot gets
+        whatever is left after the intent's own words and filler are removed
+        Returns:
+            dict: Slot values (None where nothing was found)
+        """
+        kinds = {}
+        for pattern in self.patterns:
+            for part in pattern.parts:
+                if part[0] == "slot":
+                    kinds.setdefault(part[1], part[3])
+        words = tokenize(text)
+        slots = {name: self.convert(name, kind, words) for name, kind in kinds.items() if kind != "text"}
+        text_slots = [name for name, kind in kinds.items() if kind == "text"]
+        if len(text_slots) == 1:
+            known = {w for pattern in self.patterns for literal in pattern.literals for w in literal}
+            rest = [w for w in words if w not in known and w not in FALLBACK_FILLER and not _INT.fullmatch(w)]
+            slots[text_slots[0]] = self.convert(text_slots[0], "text", rest)
+        else:
+            slots.update((name, None) for name in text_slots)
+        return slots
+
+
+class IntentMatch:
+    """Result of matching an utterance"""
+
+    def __init__(self, intent, pattern, slots, score):
+        self.intent = intent
+        self.pattern = pattern
+        self.slots = slots
+        self.score = score
+
+    @property
+    def name(self):
+        return self.intent.name
+
+    def __repr__(self):
+        return f"IntentMatch({self.name!r}, {self.slots!r})"
+
+
+class IntentDispatcher:
+    """Registry of intents compiled into one multi-pattern automaton"""
+
+    def __init__(self, classifier=None):
+        """
+        Initialize the dispatcher
+        Args:
+            classifier: Optional model with predict(text) -> (intent, confidence), tried
+                when no pattern matches (see core.intent_classifier)
+        """
+        self.intents = {}
+        self.classifier = classifier
+        self._compiled = False
+
+    def register(self, name, patterns, handler, priority=0, strip_words=()):
+        """Register an intent (see Intent); replaces any intent with the same name"""
+        self.intents[name] = Intent(name, patterns, handler, priority, strip_words)
+        self._compiled = False
+
+    def intent(self, name, patterns, priority=0, strip_words=()):
+        """Decorator form of register()"""
+        def decorator(handler):
+            self.register(name, patterns, handler, priority, strip_words)
+            return handler
+        return decorator
+
+    def compile(self):
+        """Build the word-level Aho-Corasick automaton over every literal phrase"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        by_literal = {}  # literal -> patterns containing it
+
+        for intent in self.intents.values():
+            for pattern in intent.patterns:
+                for literal in set(pattern.literals):
+                    if literal not in by_literal:
+                        by_literal[literal] = []
+                        self._insert(literal)
+                    by_literal[literal].append(pattern)
+
+        # Each pattern is only looked at when its rarest literal occurs, so common
+        # words like "on" don't drag every pattern using them into the candidates
+        self._anchored = {}
+        for intent in self.intents.values():
+            for pattern in intent.patterns:
+                anchor = min(pattern.literals, key=lambda lit: (len(by_literal[lit]), -len(lit)))
+                self._anchored.setdefault(anchor, []).append(pattern)
+
+        # Breadth-first failure links
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for word, child in self._goto[state].items():
+                pending.append(child)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._compiled = True
+        logger.debug(f"Compiled {len(self.intents)} intents, {len(by_literal)} literals, {len(self._goto)} states")
+
+    def _insert(self, literal):
+        state = 0
+        for word in literal:
+            if word not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][word] = len(self._goto) - 1
+            state = self._goto[state][word]
+        self._out[state] = self._out[state] + [literal]
+
+    def match(self, text):
+        """
+        Find the best intent for an utterance
+        Returns:
+            IntentMatch or None
+        """
+        if not self._compiled:
+            self.compile()
+        words = tokenize(text)
+
+        # One pass over the input collects every literal occurrence
+        occurrences = {}
+        state = 0
+        for i, word in enumerate(words):
+            while state and word not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word, 0)
+            for literal in self._out[state]:
+                occurrences.setdefault(literal, []).append(i - len(literal) + 1)
+
+        # Only patterns whose literals all occurred are candidates
+        best = None
+        for literal in occurrences:
+            for pattern in self._anchored.get(literal, ()):
+                if any(lit not in occurrences for lit in pattern.literals):
+                    continue
+                slots = pattern.bind(words, occurrences)
+                if slots is None:
+                    continue
+                # Most specific pattern wins; priority breaks ties
+                score = (pattern.literal_words + pattern.typed_slots, pattern.intent.priority)
+                if best is None or score > best.score:
+                    best = IntentMatch(pattern.intent, pattern, slots, score)
+        return best
+
+    def dispatch(self, text):
+        """
+        Run the handler of the best matching intent
+        Returns:
+            tuple: (response, expecting_followup), or None when nothing matched
+        """
+        match = self.match(text)
+        if match is not None:
+            logger.debug(f"Intent {match.name} {match.slots}")
+            return match.intent.handler(match.slots)
+
+        if self.classifier is not None:
+            intent, confidence = self.classifier.predict(text)
+            if intent in self.intents:
+                slots = self.intents[intent].guess_slots(text)
+                logger.debug(f"Intent {intent} {slots} (classifier, {confidence:.2f})")
+                return self.intents[intent].handler(slots)
+        return None
@@ -0,0 +1,332 @@
+"""
+Pluggable LLM backends for Jarvis.
+Every engine (Phi-3 via llama.cpp, OpenAI, the shared inference server, the
+offline mock) exposes process()/process_stream(); a registry builds them by
+name and FallbackRouter chains them with latency-driven fallback and optional
+hedged requests.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FAILURE_RESPONSE = "I apologize, sir. I couldn't come up with an answer just now."
+
+
+class BackendUnavailable(Exception):
+    """Raised by a backend factory when the backend can't be used here"""
+    pass
+
+
+class LLMBackend:
+    """Common interface for text generation backends"""
+
+    name = "backend"
+    # Reply a backend returns instead of raising when generation fails
+    failure_reply = None
+
+    def process(self, text, history=None):
+        """
+        Generate a full reply
+        Args:
+            text (str): User input
+            history (list): Recent interactions to use instead of the backend's own memory
+        Returns:
+            str: Reply text
+        """
+        raise NotImplementedError
+
+    def process_stream(self, text, history=None):
+        """Yield the reply in pieces; backends without streaming yield it whole"""
+        yield self.process(text, history=history)
+
+    def close(self):
+        pass
+
+
+_REGISTRY = {}
+
+
+def register_backend(name, factory):
+    """
+    Register a backend factory
+    Args:
+        name (str): Backend name used in settings
+        factory (callable): factory(memory_manager, **options) -> backend
+    """
+    _REGISTRY[name] = factory
+
+
+def available_backends():
+    return sorted(_REGISTRY)
+
+
+def create_backend(name, memory_manager, **options):
+    """Build a registered backend; raises BackendUnavailable if it can't be used"""
+    if name not in _REGISTRY:
+        raise BackendUnavailable(f"unknown backend '{name}'")
+    return _REGISTRY[name](memory_manager, **options)
+
+
+def _create_phi3(memory_manager, **options):
+    # Shared inference server when it is running, otherwise an in-process model
+    from core.inference_client import connect_or_load
+    return connect_or_load(memory_manager)
+
+
+def _create_phi3_small(memory_manager, model_path=None, max_tokens=80, **options):
+    # Smaller/faster quantized model for the easy tier of the cascade
+    import os
+    if not model_path or not os.path.exists(model_path):
+        raise BackendUnavailable(f"small model not found at {model_path} (set JARVIS_SMALL_MODEL to its path)")
+    from core.phi3_engine import Phi3Engine
+    engine = Phi3Engine(memory_manager, model_path=model_path, max_tokens=max_tokens,
+                        cache_name="prompt_states_small")
+    engine.name = "phi3-small"
+    return engine
+
+
+def _create_openai(memory_manager, **options):
+    import os
+    if not os.environ.get("OPENAI_API_KEY"):
+        raise BackendUnavailable("OPENAI_API_KEY is not set")
+    from core.ai_engine import AIEngine
+    return AIEngine(memory_manager)
+
+
+def _create_mock(memory_manager, **options):
+    from core.fake_engine import MockBackend
+    return MockBackend(**options)
+
+
+register_backend("phi3", _create_phi3)
+register_backend("phi3-small", _create_phi3_small)
+register_backend("openai", _create_openai)
+register_backend("mock", _create_mock)
+
+
+def build_engine(memory_manager, config=None):
+    """
+    Build the configured engine chain (config.settings.LLM_BACKENDS)
+    Returns:
+        The single backend, or a FallbackRouter when more than one is available
+    """
+    if config is None:
+        from config.settings import LLM_BACKENDS
+        config = LLM_BACKENDS
+    options = config.get("options", {})
+
+    backends = []
+    for name in config["chain"]:
+        try:
+            backends.append(create_backend(name, memory_manager, **options.get(name, {})))
+        except BackendUnavailable as e:
+            logger.info(f"Skipping LLM backend '{name}': {str(e)}")
+        except Exception as e:
+            logger.error(f"Error loading LLM backend '{name}': {str(e)}")
+
+    if not backends:
+        raise BackendUnavailable("no LLM backend could be loaded")
+    if len(backends) == 1:
+        return backends[0]
+    return FallbackRouter(
+        backends,
+        timeout=config.get("timeout"),
+        hedge=config.get("hedge", False),
+        hedge_quantile=config.get("hedge_quantile", 0.95),
+    )
+
+
+class _Attempt:
+    """One backend's run inside a routed request"""
+
+    def __init__(self, backend, reason):
+        self.backend = backend
+        self.reason = reason  # "primary", "failover", "timeout" or "hedge"
+        self.started = time.perf_counter()
+        self.tokens = queue.Queue()
+        self.cancelled = threading.Event()
+
+
+class FallbackRouter(LLMBackend):
+    """Chains backends: fails over on errors or slow answers, optionally hedges with the next one"""
+
+    name = "router"
+
+    def __init__(self, backends, timeout=None, hedge=False, hedge_quantile=0.95,
+                 min_samples=5, latency_window=100):
+        """
+        Initialize the router
+        Args:
+            backends (list): Backends in order of preference
+            timeout (float): Seconds a backend gets (to its first token when streaming)
+                before the next one is started; None waits indefinitely
+            hedge (bool): Start the next backend early, after the primary's p95 latency
+            hedge_quantile (float): Latency quantile used as the hedge delay
+            min_samples (int): Latency samples needed before hedging kicks in
+            latency_window (int): Number of recent latencies kept per backend
+        """
+        self.backends = list(backends)
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.failure_reply = FAILURE_RESPONSE
+
+        self._busy = {id(b): threading.Lock() for b in self.backends}
+        self._lock = threading.Lock()
+        self.latencies = {b.name: deque(maxlen=latency_window) for b in self.backends}
+        self.stats = {
+            b.name: {"launches": 0, "wins": 0, "failures": 0, "hedges": 0, "timeouts": 0}
+            for b in self.backends
+        }
+
+    def latency_quantile(self, backend, q):
+        with self._lock:
+            samples = sorted(self.latencies[backend.name])
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+    def _patience(self, backend):
+        """
+        How long to wait on a backend before starting the next one
+        Returns:
+            tuple: (seconds or None to wait indefinitely, "hedge" or "timeout")
+        """
+        if self.hedge and len(self.latencies[backend.name]) >= self.min_samples:
+            delay = self.latency_quantile(backend, self.hedge_quantile)
+            if self.timeout is None or delay < self.timeout:
+                return delay, "hedge"
+        return self.timeout, "timeout"
+
+    def _is_failure(self, backend, reply):
+        return not reply or not reply.strip() or (
+            backend.failure_reply is not None and reply.strip() == backend.failure_reply
+        )
+
+    def _launch(self, attempt, text, history, events):
+        def run():
+            try:
+                stream = attempt.backend.process_stream(text, history=history)
+                first = True
+                try:
+                    for token in stream:
+                        if not token or (first and not token.strip()):
+                            continue
+                        if first:
+                            first = False
+                            if self._is_failure(attempt.backend, token):
+                                events.put(("failed", attempt, "failure reply"))
+                                return
+                            latency = time.perf_counter() - attempt.started
+                            with self._lock:
+                                self.latencies[attempt.backend.name].append(latency)
+                            events.put(("first", attempt, latency))
+                        attempt.tokens.put(token)
+                        if attempt.cancelled.is_set():
+                            break
+                finally:
+                    if hasattr(stream, "close"):
+                        stream.close()
+                if first:
+                    events.put(("failed", attempt, "empty reply"))
+            except Exception as e:
+                events.put(("failed", attempt, str(e)))
+            finally:
+                attempt.tokens.put(None)
+                self._busy[id(attempt.backend)].release()
+
+        threading.Thread(target=run, name=f"llm-{attempt.backend.name}", daemon=True).start()
+
+    def _route(self, text, history):
+        """Race backends until one produces a first token; returns the winning attempt or None"""
+        events = queue.Queue()
+        candidates = list(self.backends)
+        running = []
+        reason = "primary"
+
+        while True:
+            # Start the next idle backend
+            while candidates and reason:
+                backend = candidates.pop(0)
+                if not self._busy[id(backend)].acquire(blocking=False):
+                    logger.debug(f"LLM backend '{backend.name}' is busy, skipping")
+                    continue
+                attempt = _Attempt(backend, reason)
+                with self._lock:
+                    self.stats[backend.name]["launches"] += 1
+                    if reason in ("hedge", "timeout"):
+                        self.stats[backend.name][reason + "s"] += 1
+                if reason != "primary":
+                    logger.info(f"Starting LLM backend '{backend.name}' ({reason})")
+                self._launch(attempt, text, history, events)
+                running.append(attempt)
+                reason = None
+            if not running:
+                return None
+
+            # Once every backend is running, just wait for the first answer
+            wait, trigger = None, None
+            if candidates:
+                newest = running[-1]
+                wait, trigger = self._patience(newest.backend)
+                if wait is not None:
+                    wait = max(0.0, wait - (time.perf_counter() - newest.started))
+            try:
+                kind, attempt, value = events.get(timeout=wait)
+            except queue.Empty:
+                reason = trigger
+                continue
+
+            if kind == "failed":
+                logger.error(f"LLM backend '{attempt.backend.name}' failed: {value}")
+                with self._lock:
+                    self.stats[attempt.backend.name]["failures"] += 1
+                running.remove(attempt)
+                reason = "failover"
+                continue
+
+            # First answer wins; cancel the rest
+            with self._lock:
+                self.stats[attempt.backend.name]["wins"] += 1
+            for other in running:
+                if other is not attempt:
+                    other.cancelled.set()
+            return attempt
+
+    def process_stream(self, text, history=None):
+        """Yield tokens from whichever backend answers first"""
+        attempt = self._route(text, history)
+        if attempt is None:
+            yield self.failure_reply
+            return
+        try:
+            while True:
+                token = attempt.tokens.get()
+                if token is None:
+                    return
+                yield token
+        finally:
+            attempt.cancelled.set()
+
+    def process(self, text, history=None):
+        return "".join(self.process_stream(text, history=history)).strip()
+
+    def get_stats(self):
+        """Per-backend launch/win/failure counters and latency percentiles"""
+        result = {}
+        for backend in self.backends:
+            with self._lock:
+                stats = dict(self.stats[backend.name])
+            stats["p50"] = self.latency_quantile(backend, 0.5)
+            stats["p95"] = self.latency_quantile(backend, 0.95)
+            result[backend.name] = stats
+        return result
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
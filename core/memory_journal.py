@@ -0,0 +1,258 @@
+"""
+Append-only journal for Jarvis short-term memory.
+Each change is written as one JSON line; a background compaction folds the
+journal back into the snapshot file with an atomic rename.
+Several processes (main.py, gui_main.py) may open the same memory directory,
+so writes and compactions hold an inter-process lock file, and each process
+first catches up on what the others wrote: sequence numbers stay unique and
+a compaction folds in every process's entries before truncating the journal.
+"""
+import os
+import json
+import threading
+from utils.helpers import FileLock, atomic_write_text
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ShortTermJournal:
+    """Snapshot + append-only journal persistence for a JSON-like state dict"""
+
+    SEQ_KEY = "journal_seq"
+
+    def __init__(self, snapshot_path, default_state, compact_every=200):
+        """
+        Initialize the journal
+        Args:
+            snapshot_path (str): Path of the JSON snapshot (the journal sits next to it)
+            default_state (dict): State used when no snapshot exists yet
+            compact_every (int): Number of journal entries that triggers a background compaction
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.rotated_path = snapshot_path + ".journal.1"  # left behind by older versions
+        self.lock_path = snapshot_path + ".lock"
+        self.compact_every = compact_every
+        self.default_state = default_state
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compact_thread = None
+        self._seq = 0
+        self._entries = 0
+        self._closed = False
+        self._offset = 0  # end of the last complete journal line seen
+        self._torn = False  # journal ends in a partial line (a writer crashed mid-entry)
+        self._snapshot_stamp = None
+
+        self._file_lock = FileLock(self.lock_path)
+        with self._file_lock:
+            self.state = self._recover(default_state)
+        self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+
+    def _recover(self, default_state):
+        """Rebuild state from the snapshot plus any journal entries written after it"""
+        state = None
+        self._snapshot_stamp = None
+        self._torn = False
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                self._snapshot_stamp = self._stamp(f.fileno())
+                state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            logger.error(f"Short-term snapshot is corrupt, starting from journal only: {str(e)}")
+
+        if not isinstance(state, dict):
+            state = json.loads(json.dumps(default_state))
+        for key, value in default_state.items():
+            state.setdefault(key, json.loads(json.dumps(value)))
+
+        self._seq = state.pop(self.SEQ_KEY, 0)
+        replayed, _ = self._replay(self.rotated_path, state)
+        count, self._offset = self._replay(self.journal_path, state)
+        replayed += count
+        if replayed:
+            logger.info(f"Replayed {replayed} short-term memory journal entries.")
+        self._entries = replayed
+        return state
+
+    def _replay(self, path, state, offset=0):
+        """
+        Apply journal entries newer than the current sequence number
+        Args:
+            path (str): Journal file
+            state (dict): State to apply the entries to
+            offset (int): Byte offset to start reading at
+        Returns:
+            tuple: (entries applied, offset just past the last complete line)
+        """
+        replayed = 0
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        # A torn trailing line; the next write starts on a fresh line
+                        logger.warning(f"Ignoring truncated journal entry in {path}")
+                        self._torn = True
+                        break
+                    offset += len(raw)
+                    line = raw.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        logger.warning(f"Ignoring corrupt journal entry in {path}")
+                        continue
+                    if entry.get("seq", 0) <= self._seq:
+                        continue
+                    self._apply(state, entry)
+                    self._seq = entry["seq"]
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        return replayed, offset
+
+    @staticmethod
+    def _stamp(fd=None, path=None):
+        """Identity of a snapshot file version (changes whenever it is rewritten)"""
+        try:
+            st = os.fstat(fd) if fd is not None else os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _sync(self):
+        """Catch up on entries other processes wrote (caller holds both locks)"""
+        if self._stamp(path=self.snapshot_path) != self._snapshot_stamp:
+            # Another process compacted: its snapshot plus the journal is the whole state
+            fresh = self._recover(self.default_state)
+            for key, value in fresh.items():
+                current = self.state.get(key)
+                if hasattr(current, "to_list") and hasattr(current, "clear"):
+                    # Keep bounded containers (InteractionRing) and their capacity
+                    current.clear()
+                    for item in value:
+                        current.append(item)
+                else:
+                    self.state[key] = value
+            return
+        replayed, self._offset = self._replay(self.journal_path, self.state, self._offset)
+        self._entries += replayed
+
+    @staticmethod
+    def _apply(state, entry):
+        """Apply a single journal entry to the state"""
+        op = entry["op"]
+        if op == "append":
+            items = state.setdefault(entry["path"], [])
+            items.append(entry["value"])
+            # Bounded containers (e.g. InteractionRing) trim themselves
+            max_len = entry.get("max_len")
+            if max_len and isinstance(items, list) and len(items) > max_len:
+                del items[:len(items) - max_len]
+        elif op == "set":
+            state.setdefault(entry["path"], {})[entry["key"]] = entry["value"]
+        elif op == "replace":
+            state[entry["path"]] = entry["value"]
+        else:
+            logger.warning(f"Unknown journal operation: {op}")
+
+    def append(self, path, value, max_len=None):
+        """Append a value to a list in the state"""
+        entry = {"op": "append", "path": path, "value": value}
+        if max_len:
+            entry["max_len"] = max_len
+        self._record(entry)
+
+    def set(self, path, key, value):
+        """Set a key in a dict in the state"""
+        self._record({"op": "set", "path": path, "key": key, "value": value})
+
+    def replace(self, path, value):
+        """Replace a top-level value in the state"""
+        self._record({"op": "replace", "path": path, "value": value})
+
+    def _record(self, entry):
+        """Apply an entry in memory and write only that delta to the journal"""
+        with self._lock:
+            try:
+                with self._file_lock:
+                    self._sync()
+                    self._seq += 1
+                    entry["seq"] = self._seq
+                    self._apply(self.state, entry)
+                    line = json.dumps(entry, separators=(",", ":")) + "\n"
+                    if self._torn:
+                        line = "\n" + line
+                    self._journal_file.write(line)
+                    self._journal_file.flush()
+                    self._torn = False
+                    self._offset = os.fstat(self._journal_file.fileno()).st_size
+            except Exception as e:
+                logger.error(f"Error writing short-term memory journal: {str(e)}")
+            self._entries += 1
+            should_compact = self._entries >= self.compact_every
+
+        if should_compact:
+            self.compact_async()
+
+    def compact_async(self):
+        """Start a background compaction unless one is already running"""
+        with self._lock:
+            if self._compact_thread and self._compact_thread.is_alive():
+                return
+            self._compact_thread = threading.Thread(target=self.compact, name="journal-compactor", daemon=True)
+            self._compact_thread.start()
+
+    def compact(self):
+        """Fold the journal (every process's entries) into a fresh snapshot"""
+        with self._compact_lock:
+            if self._closed:
+                return
+            with self._lock:
+                try:
+                    with self._file_lock:
+                        # Re-read first so entries other processes appended aren't dropped
+                        self._sync()
+                        snapshot = dict(self.state)
+                        snapshot[self.SEQ_KEY] = self._seq
+                        atomic_write_text(self.snapshot_path, json.dumps(snapshot, indent=2, default=_to_json))
+                        self._snapshot_stamp = self._stamp(path=self.snapshot_path)
+                        # Truncate in place: other processes keep their append handles open
+                        os.truncate(self.journal_path, 0)
+                        self._offset = 0
+                        self._torn = False
+                        self._entries = 0
+                        if os.path.exists(self.rotated_path):
+                            os.remove(self.rotated_path)
+                except Exception as e:
+                    logger.error(f"Error compacting short-term memory: {str(e)}")
+
+    def wait_for_compaction(self):
+        """Wait for a running background compaction to finish"""
+        thread = self._compact_thread
+        if thread and thread.is_alive():
+            thread.join()
+
+    def close(self):
+        """Compact and close the journal file"""
+        if self._closed:
+            return
+        self.wait_for_compaction()
+        self.compact()
+        with self._lock:
+            self._journal_file.close()
+            self._file_lock.close()
+            self._closed = True
+
+
+def _to_json(value):
+    """JSON fallback for state containers that know how to serialize themselves"""
+    if hasattr(value, "to_list"):
+        return value.to_list()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
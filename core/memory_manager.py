@@ -2,144 +2,288 @@
 Memory Manager for Jarvis AI
 """
 import os
+import re
 import json
 import time
 import sqlite3
+import threading
 from datetime import datetime
+from core.db_writer import SQLiteWriter
+from core.memory_journal import ShortTermJournal
+from core.ring_buffer import InteractionRing
+from core.semantic_index import SemanticIndex
+from utils.helpers import atomic_write_text
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Bump when the long-term schema gains a migration
+SCHEMA_VERSION = 1
+
+SEARCH_MODES = ("all", "any", "phrase", "prefix")
+
 class MemoryManager:
     """Manages both short-term and long-term memory for Jarvis"""
     
-    def __init__(self):
-        """Initialize the memory systems"""
+    def __init__(self, memory_dir="data/memory", short_term_capacity=50):
+        """
+        Initialize the memory systems
+        Args:
+            memory_dir (str): Directory holding short_term.json and long_term.db
+            short_term_capacity (int): Number of recent interactions kept in short-term memory
+        """
         logger.info("Initializing Memory Manager...")
         
         # Ensure directories exist
-        os.makedirs("data/memory", exist_ok=True)
+        os.makedirs(memory_dir, exist_ok=True)
         
-        # Initialize short-term memory (JSON-based)
-        self.short_term_file = "data/memory/short_term.json"
-        self.short_term_memory = self._load_short_term_memory()
+        # Initialize short-term memory (JSON snapshot + append-only journal)
+        self.short_term_file = os.path.join(memory_dir, "short_term.json")
+        self.short_term_capacity = short_term_capacity
+        self.journal = self._load_short_term_memory()
+        self.short_term_memory = self.journal.state
+        self.short_term_memory["interactions"] = InteractionRing.from_list(
+            self.short_term_memory["interactions"], short_term_capacity
+        )
         
-        # Initialize long-term memory (SQLite-based)
-        self.long_term_db = "data/memory/long_term.db"
+        # Initialize long-term memory (SQLite-based, one pooled WAL connection
+        # plus a background writer that batches inserts)
+        self.long_term_db = os.path.join(memory_dir, "long_term.db")
+        self.db = SQLiteWriter(self.long_term_db)
         self._initialize_long_term_memory()
         
+        # Initialize semantic recall (hashed n-gram vectors, memory-mapped)
+        self.semantic_index = SemanticIndex(os.path.join(memory_dir, "semantic"))
+        self._backfill_thread = None
+        self._backfill_semantic_index()
+        
         logger.info("Memory Manager initialized successfully.")
     
     def _load_short_term_memory(self):
-        """Load short-term memory from JSON file"""
-        try:
-            with open(self.short_term_file, "r") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+        """Load short-term memory by replaying the snapshot and its journal"""
+        if not os.path.exists(self.short_term_file):
             logger.info("Creating new short-term memory file.")
-            return {
+        return ShortTermJournal(
+            self.short_term_file,
+            {
                 "interactions": [],
                 "user_preferences": {},
                 "active_tasks": []
             }
+        )
     
     def _initialize_long_term_memory(self):
         """Initialize long-term memory database"""
         try:
-            conn = sqlite3.connect(self.long_term_db)
-            cursor = conn.cursor()
-            
             # Create tables if they don't exist
-            cursor.execute('''
+            self.db.executescript('''
                 CREATE TABLE IF NOT EXISTS interactions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT,
                     speaker TEXT,
                     text TEXT
-                )
-            ''')
-            
-            cursor.execute('''
+                );
+                
                 CREATE TABLE IF NOT EXISTS user_preferences (
                     key TEXT PRIMARY KEY,
                     value TEXT,
                     timestamp TEXT
-                )
-            ''')
-            
-            cursor.execute('''
+                );
+                
                 CREATE TABLE IF NOT EXISTS learned_facts (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     fact TEXT,
                     source TEXT,
                     timestamp TEXT
-                )
+                );
+                
+                CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions(timestamp);
+                CREATE INDEX IF NOT EXISTS idx_learned_facts_timestamp ON learned_facts(timestamp);
             ''')
             
-            conn.commit()
-            conn.close()
-            
         except sqlite3.Error as e:
             logger.error(f"Database error: {str(e)}")
+        
+        self.fts_enabled = self._initialize_search_index()
+    
+    def _initialize_search_index(self):
+        """Create the FTS5 index and triggers, backfilling existing rows once"""
+        try:
+            version = self.db.query("PRAGMA user_version")[0][0]
+            self.db.executescript('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts USING fts5(
+                    text, content='interactions', content_rowid='id', tokenize='unicode61'
+                );
+                
+                CREATE VIRTUAL TABLE IF NOT EXISTS learned_facts_fts USING fts5(
+                    fact, content='learned_facts', content_rowid='id', tokenize='unicode61'
+                );
+                
+                CREATE TRIGGER IF NOT EXISTS interactions_fts_ai AFTER INSERT ON interactions BEGIN
+                    INSERT INTO interactions_fts(rowid, text) VALUES (new.id, new.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS interactions_fts_ad AFTER DELETE ON interactions BEGIN
+                    INSERT INTO interactions_fts(interactions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS interactions_fts_au AFTER UPDATE ON interactions BEGIN
+                    INSERT INTO interactions_fts(interactions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                    INSERT INTO interactions_fts(rowid, text) VALUES (new.id, new.text);
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS learned_facts_fts_ai AFTER INSERT ON learned_facts BEGIN
+                    INSERT INTO learned_facts_fts(rowid, fact) VALUES (new.id, new.fact);
+                END;
+                CREATE TRIGGER IF NOT EXISTS learned_facts_fts_ad AFTER DELETE ON learned_facts BEGIN
+                    INSERT INTO learned_facts_fts(learned_facts_fts, rowid, fact) VALUES ('delete', old.id, old.fact);
+                END;
+                CREATE TRIGGER IF NOT EXISTS learned_facts_fts_au AFTER UPDATE ON learned_facts BEGIN
+                    INSERT INTO learned_facts_fts(learned_facts_fts, rowid, fact) VALUES ('delete', old.id, old.fact);
+                    INSERT INTO learned_facts_fts(rowid, fact) VALUES (new.id, new.fact);
+                END;
+            ''')
+            
+            if version < SCHEMA_VERSION:
+                # One-time backfill for databases created before the index existed
+                logger.info("Building full-text index over existing memory...")
+                self.db.executescript(f'''
+                    INSERT INTO interactions_fts(interactions_fts) VALUES ('rebuild');
+                    INSERT INTO learned_facts_fts(learned_facts_fts) VALUES ('rebuild');
+                    PRAGMA user_version = {SCHEMA_VERSION};
+                ''')
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Full-text search unavailable, falling back to LIKE queries: {str(e)}")
+            return False
+    
+    # Tables indexed by the semantic backfill, in order, as (id, timestamp, speaker, text) rows
+    BACKFILL_QUERIES = {
+        "interactions": "SELECT id, timestamp, speaker, text FROM interactions "
+                        "WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+        "learned_facts": "SELECT id, timestamp, 'fact', fact FROM learned_facts "
+                         "WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+    }
+
+    def _backfill_semantic_index(self, batch_size=512):
+        """
+        Index long-term memory that predates the semantic index
+        The id high-water mark of each table is recorded when the index is created,
+        along with how far indexing has got (backfill.json next to the index), so
+        an interrupted backfill resumes where it stopped; anything newer is indexed
+        by its own add. Batches are embedded and inserted on a background thread.
+        """
+        self._backfill_path = os.path.join(self.semantic_index.index_dir, "backfill.json")
+        self._backfill_stop = threading.Event()
+        try:
+            with self.semantic_index.exclusive():
+                state = self._read_backfill_state()
+                if state is None:
+                    if len(self.semantic_index) > 0:
+                        return  # built before progress was recorded
+                    state = {}
+                    for table in self.BACKFILL_QUERIES:
+                        target = self.db.query(f"SELECT COALESCE(MAX(id), 0) FROM {table}")[0][0]
+                        state[table] = [0, target]
+                    atomic_write_text(self._backfill_path, json.dumps(state))
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.error(f"Error preparing the semantic backfill: {str(e)}")
+            return
+        if all(done >= target for done, target in state.values()):
+            return
+
+        def backfill():
+            start = time.perf_counter()
+            indexed = 0
+            try:
+                while not self._backfill_stop.is_set():
+                    count = self._backfill_batch(batch_size)
+                    if count is None:
+                        break
+                    indexed += count
+            except Exception as e:
+                logger.error(f"Error indexing stored memories: {str(e)}")
+                return
+            logger.info(f"Indexed {indexed} stored memories in {time.perf_counter() - start:.2f}s")
+
+        logger.info("Indexing stored memories for semantic recall in the background...")
+        self._backfill_thread = threading.Thread(target=backfill, name="semantic-backfill", daemon=True)
+        self._backfill_thread.start()
+
+    def _read_backfill_state(self):
+        try:
+            with open(self._backfill_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _backfill_batch(self, batch_size):
+        """
+        Index the next batch past the recorded progress and move the progress on
+        Returns:
+            int: Rows indexed, or None once every table is done
+        """
+        # Claimed under the index lock, so processes sharing the memory split the work
+        with self.semantic_index.exclusive():
+            state = self._read_backfill_state()
+            table = next((t for t in self.BACKFILL_QUERIES if state[t][0] < state[t][1]), None)
+            if table is None:
+                return None
+            done, target = state[table]
+            rows = self.db.query(self.BACKFILL_QUERIES[table], (done, target, batch_size))
+            self.semantic_index.add_many(
+                [(text, {"timestamp": timestamp, "speaker": speaker}) for _, timestamp, speaker, text in rows]
+            )
+            state[table][0] = rows[-1][0] if rows else target
+            atomic_write_text(self._backfill_path, json.dumps(state))
+            return len(rows)
+
+    def wait_for_indexing(self, timeout=None):
+        """Wait for the background semantic backfill, if one is running"""
+        if self._backfill_thread:
+            self._backfill_thread.join(timeout)
     
     def add_interaction(self, speaker, text):
         """Add a new interaction to memory"""
         timestamp = datetime.now().isoformat()
         
-        # Add to short-term memory
-        self.short_term_memory["interactions"].append({
+        # Add to short-term memory, keeping it at a reasonable size; only the
+        # new entry is written to the journal
+        self.journal.append("interactions", {
             "timestamp": timestamp,
             "speaker": speaker,
             "text": text
-        })
+        }, max_len=self.short_term_capacity)
         
-        # Keep short-term memory at a reasonable size
-        if len(self.short_term_memory["interactions"]) > 50:
-            self.short_term_memory["interactions"] = self.short_term_memory["interactions"][-50:]
-        
-        # Save to short-term memory file
-        self._save_short_term_memory()
-        
-        # Add to long-term memory
+        # Add to long-term memory (committed in the background)
         try:
-            conn = sqlite3.connect(self.long_term_db)
-            cursor = conn.cursor()
-            cursor.execute(
+            self.db.execute(
                 "INSERT INTO interactions (timestamp, speaker, text) VALUES (?, ?, ?)",
                 (timestamp, speaker, text)
             )
-            conn.commit()
-            conn.close()
         except sqlite3.Error as e:
             logger.error(f"Database error: {str(e)}")
+        
+        self.semantic_index.add(text, {"timestamp": timestamp, "speaker": speaker})
     
     def get_recent_interactions(self, count=5):
         """Get the most recent interactions"""
-        return self.short_term_memory["interactions"][-count:]
+        return self.short_term_memory["interactions"].tail(count)
     
     def save_user_preference(self, key, value):
         """Save a user preference"""
         timestamp = datetime.now().isoformat()
         
         # Update in short-term memory
-        self.short_term_memory["user_preferences"][key] = {
+        self.journal.set("user_preferences", key, {
             "value": value,
             "timestamp": timestamp
-        }
-        
-        # Save to short-term memory file
-        self._save_short_term_memory()
+        })
         
         # Update in long-term memory
         try:
-            conn = sqlite3.connect(self.long_term_db)
-            cursor = conn.cursor()
-            cursor.execute(
+            self.db.execute(
                 "INSERT OR REPLACE INTO user_preferences (key, value, timestamp) VALUES (?, ?, ?)",
                 (key, json.dumps(value), timestamp)
             )
-            conn.commit()
-            conn.close()
         except sqlite3.Error as e:
             logger.error(f"Database error: {str(e)}")
     
@@ -154,43 +298,102 @@ class MemoryManager:
         timestamp = datetime.now().isoformat()
         
         try:
-            conn = sqlite3.connect(self.long_term_db)
-            cursor = conn.cursor()
-            cursor.execute(
+            self.db.execute(
                 "INSERT INTO learned_facts (fact, source, timestamp) VALUES (?, ?, ?)",
                 (fact, source, timestamp)
             )
-            conn.commit()
-            conn.close()
             logger.info(f"Learned new fact: {fact}")
         except sqlite3.Error as e:
             logger.error(f"Database error: {str(e)}")
+        
+        self.semantic_index.add(fact, {"timestamp": timestamp, "speaker": "fact"})
     
     def _save_short_term_memory(self):
-        """Save short-term memory to JSON file"""
+        """Fold the short-term journal into an atomically written snapshot"""
         try:
-            with open(self.short_term_file, "w") as f:
-                json.dump(self.short_term_memory, f, indent=2)
+            self.journal.compact()
         except Exception as e:
             logger.error(f"Error saving short-term memory: {str(e)}")
     
-    def search_memory(self, query, limit=10):
-        """Search long-term memory for relevant information"""
+    @staticmethod
+    def _build_match_query(query, mode="all"):
+        """
+        Turn free text into an FTS5 MATCH expression
+        Args:
+            query (str): Text typed or spoken by the user
+            mode (str): "all" terms, "any" term, exact "phrase", or "prefix" match on every term
+        Returns:
+            str: MATCH expression, or "" when the query has no searchable terms
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        # Quoting every term keeps user punctuation from being read as FTS syntax
+        terms = [f'"{term}"' for term in re.findall(r"\w+", query)]
+        if not terms:
+            return ""
+        if mode == "phrase":
+            return '"' + " ".join(term.strip('"') for term in terms) + '"'
+        if mode == "prefix":
+            return " ".join(f"{term}*" for term in terms)
+        if mode == "any":
+            return " OR ".join(terms)
+        return " ".join(terms)
+    
+    @staticmethod
+    def _time_bound(value):
+        """Normalise a datetime or ISO string time bound"""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+    
+    def search_memory(self, query, limit=10, since=None, until=None, mode="all"):
+        """
+        Search long-term memory for relevant information
+        Args:
+            query (str): Search text
+            limit (int): Maximum number of results
+            since (datetime|str): Only return interactions at or after this time
+            until (datetime|str): Only return interactions at or before this time
+            mode (str): One of "all", "any", "phrase" or "prefix"
+        Returns:
+            list: Interaction dicts ordered by BM25 relevance
+        """
         try:
-            conn = sqlite3.connect(self.long_term_db)
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT timestamp, speaker, text FROM interactions WHERE text LIKE ? ORDER BY timestamp DESC LIMIT ?",
-                (f"%{query}%", limit)
-            )
-            results = cursor.fetchall()
-            conn.close()
+            # Make sure queued writes are visible before reading
+            self.db.flush()
+            
+            if not self.fts_enabled:
+                results = self.db.query(
+                    "SELECT timestamp, speaker, text, 0.0 FROM interactions WHERE text LIKE ? ORDER BY timestamp DESC LIMIT ?",
+                    (f"%{query}%", limit)
+                )
+            else:
+                match = self._build_match_query(query, mode)
+                if not match:
+                    return []
+                sql = (
+                    "SELECT i.timestamp, i.speaker, i.text, bm25(interactions_fts) AS score "
+                    "FROM interactions_fts JOIN interactions i ON i.id = interactions_fts.rowid "
+                    "WHERE interactions_fts MATCH ?"
+                )
+                params = [match]
+                if since is not None:
+                    sql += " AND i.timestamp >= ?"
+                    params.append(self._time_bound(since))
+                if until is not None:
+                    sql += " AND i.timestamp <= ?"
+                    params.append(self._time_bound(until))
+                sql += " ORDER BY score LIMIT ?"
+                params.append(limit)
+                results = self.db.query(sql, params)
             
             return [
                 {
                     "timestamp": row[0],
                     "speaker": row[1],
-                    "text": row[2]
+                    "text": row[2],
+                    "score": row[3]
                 }
                 for row in results
             ]
@@ -198,7 +401,94 @@ class MemoryManager:
             logger.error(f"Database error: {str(e)}")
             return []
     
+    def search_facts(self, query, limit=10, since=None, until=None, mode="all"):
+        """
+        Search learned facts
+        Args:
+            query (str): Search text
+            limit (int): Maximum number of results
+            since (datetime|str): Only return facts learned at or after this time
+            until (datetime|str): Only return facts learned at or before this time
+            mode (str): One of "all", "any", "phrase" or "prefix"
+        Returns:
+            list: Fact dicts ordered by BM25 relevance
+        """
+        try:
+            self.db.flush()
+            bounds = ""
+            params = []
+            if since is not None:
+                bounds += " AND f.timestamp >= ?"
+                params.append(self._time_bound(since))
+            if until is not None:
+                bounds += " AND f.timestamp <= ?"
+                params.append(self._time_bound(until))
+            if not self.fts_enabled:
+                results = self.db.query(
+                    "SELECT f.fact, f.source, f.timestamp, 0.0 FROM learned_facts f WHERE f.fact LIKE ?" + bounds +
+                    " ORDER BY f.timestamp DESC LIMIT ?",
+                    [f"%{query}%"] + params + [limit]
+                )
+            else:
+                match = self._build_match_query(query, mode)
+                if not match:
+                    return []
+                results = self.db.query(
+                    "SELECT f.fact, f.source, f.timestamp, bm25(learned_facts_fts) AS score "
+                    "FROM learned_facts_fts JOIN learned_facts f ON f.id = learned_facts_fts.rowid "
+                    "WHERE learned_facts_fts MATCH ?" + bounds + " ORDER BY score LIMIT ?",
+                    [match] + params + [limit]
+                )
+            
+            return [
+                {
+                    "fact": row[0],
+                    "source": row[1],
+                    "timestamp": row[2],
+                    "score": row[3]
+                }
+                for row in results
+            ]
+        except sqlite3.Error as e:
+            logger.error(f"Database error: {str(e)}")
+            return []
+    
+    def recall(self, query, k=3, exclude=(), min_score=0.2):
+        """
+        Recall stored interactions and facts semantically related to a query
+        Args:
+            query (str): Text to find related memories for
+            k (int): Maximum number of memories to return
+            exclude (iterable): Texts to leave out (e.g. turns already in the prompt)
+            min_score (float): Minimum cosine similarity
+        Returns:
+            list: Dicts with "text", "speaker", "timestamp" and "score", best first
+        """
+        excluded = set(exclude)
+        results = self.semantic_index.search(query, k=k + len(excluded), min_score=min_score)
+        return [r for r in results if r["text"] not in excluded][:k]
+    
     def save(self):
         """Save all memory data"""
         self._save_short_term_memory()
-        logger.info("Memory saved successfully.")
\ No newline at end of file
+        self.db.flush()
+        logger.info("Memory saved successfully.")
+    
+    def get_metrics(self):
+        """Get write queue depth and commit latency for the long-term store"""
+        return self.db.get_metrics()
+    
+    def close(self):
+        """Flush pending writes and release the database connections"""
+        self.save()
+        metrics = self.db.get_metrics()
+        logger.info(
+            f"Closing long-term memory: {metrics['statements']} rows in {metrics['batches']} batches, "
+            f"avg commit {metrics['avg_commit_ms']:.2f} ms, max queue depth {metrics['max_queue_depth']}"
+        )
+        # An unfinished backfill picks up from its recorded progress next time
+        self._backfill_stop.set()
+        self.wait_for_indexing()
+        self.db.close()
+        self.journal.close()
+        self.semantic_index.close()
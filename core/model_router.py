@@ -0,0 +1,292 @@
+"""
+Cascaded model routing for Jarvis.
+A cheap complexity score sends easy turns to a template answer or a small
+fast model; the large model only runs for hard turns or when the small
+model's answer looks unreliable. Questions about the time or date are
+answered from the clock, and other time-sensitive questions skip the small
+model, which would only make an answer up.
+"""
+import re
+import time
+import itertools
+from datetime import datetime
+from core.llm_backends import LLMBackend, BackendUnavailable, build_engine, create_backend
+from core.response_cache import CONTRACTIONS, TIME_SENSITIVE_PATTERNS, normalize_query
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Whole-utterance small talk answered without a model. Patterns match template_form()
+# (filler words kept) and may be preceded by TEMPLATE_LEAD and followed by TEMPLATE_TAIL.
+TEMPLATE_INTENTS = {
+    "greeting": (r"(hello|hey|hi|hey there|hi there|hello there|good (morning|afternoon|evening)|yo)",
+                 ["Hello, sir.", "Good to hear from you, sir.", "At your service, sir."]),
+    "thanks": (r"(thank you|thanks|thank you very much|thanks a lot|cheers|much appreciated)",
+               ["You're welcome, sir.", "My pleasure, sir.", "Anytime, sir."]),
+    "how_are_you": (r"how are you( doing| today)?|how is it going",
+                    ["All systems nominal, sir.", "Running smoothly, sir. Thank you for asking."]),
+    "identity": (r"who are you|what is your name|what are you",
+                 ["I'm Jarvis, your personal assistant, sir."]),
+    "farewell": (r"(goodbye|bye|good night|see you( later)?)",
+                 ["Goodbye, sir.", "Until next time, sir."]),
+    "acknowledge": (r"(ok|okay|cool|great|nice|perfect|got it|alright|sounds good)",
+                    ["Very good, sir.", "Understood, sir."]),
+}
+TEMPLATE_LEAD = r"(oh|ok|okay|well|so|um|uh|hey)"
+TEMPLATE_TAIL = r"(jarvis|sir|mate)"
+
+# Answered from the clock; a model can only guess these
+CLOCK_INTENTS = {
+    "time": (r"what time is it( now| right now)?|what is the( current)? time( now| right now)?|"
+             r"(tell me|do you have|do you know|give me) the( current)? time",
+             "It's {now:%H:%M}, sir."),
+    "date": (r"what( is)? (the date|todays date|date is it|day is it|day is today|is today)( today)?|"
+             r"(tell me|do you know|give me) (the|todays) date",
+             "Today is {now:%A, %d %B %Y}, sir."),
+}
+
+REASONING_WORDS = {
+    "why", "explain", "compare", "difference", "analyze", "analyse", "summarize", "summarise",
+    "write", "code", "plan", "steps", "calculate", "translate", "describe", "pros", "cons",
+    "should", "recommend", "debug", "prove", "story", "essay", "detail", "detailed",
+}
+QUESTION_WORDS = {"what", "who", "where", "when", "which", "how", "why", "can", "could", "would", "is", "are", "do", "does"}
+CLAUSE_WORDS = {"and", "but", "because", "then", "if", "or", "while", "although", "unless"}
+
+# Small-model replies containing these are escalated
+UNCERTAIN_PATTERNS = re.compile(
+    r"\b(i'?m not sure|i am not sure|i don'?t know|i do not know|not certain|cannot answer|can'?t answer|"
+    r"as an ai|i'?m unable|i am unable|no information)\b",
+    re.IGNORECASE,
+)
+
+
+def template_form(text):
+    """Lower-case words with contractions expanded, keeping the filler normalize_query drops"""
+    text = text.lower().replace("’", "'")
+    return " ".join(CONTRACTIONS.get(w, w).replace("'", "") for w in re.findall(r"[a-z0-9']+", text))
+
+
+class ComplexityScorer:
+    """Scores how demanding a turn is from length, intent and lexical features"""
+
+    def __init__(self):
+        intents = [(intent, pattern) for intent, (pattern, _) in TEMPLATE_INTENTS.items()]
+        intents += [(intent, pattern) for intent, (pattern, _) in CLOCK_INTENTS.items()]
+        self._templates = [
+            (intent, re.compile(rf"({TEMPLATE_LEAD} )?({pattern})( {TEMPLATE_TAIL})?")) for intent, pattern in intents
+        ]
+        self._time_sensitive = re.compile("|".join(TIME_SENSITIVE_PATTERNS))
+
+    def template_intent(self, text):
+        """Return the small-talk or clock intent the whole utterance matches, or None"""
+        form = template_form(text)
+        for intent, pattern in self._templates:
+            if pattern.fullmatch(form):
+                return intent
+        return None
+
+    def time_sensitive(self, text):
+        """Whether the answer depends on the moment (news, weather, prices...)"""
+        return bool(self._time_sensitive.search(text.lower()))
+
+    def score(self, text):
+        """
+        Score a query
+        Args:
+            text (str): User input
+        Returns:
+            tuple: (complexity between 0 and 1, template intent or None)
+        """
+        intent = self.template_intent(text)
+        if intent:
+            return 0.0, intent
+
+        words = normalize_query(text).split()
+        if not words:
+            return 0.0, None
+        score = 0.4 * min(len(words), 30) / 30
+        if REASONING_WORDS.intersection(words):
+            score += 0.35
+        if words[0] in QUESTION_WORDS:
+            score += 0.1
+        clauses = sum(1 for w in words if w in CLAUSE_WORDS) + text.count(",")
+        score += min(clauses * 0.05, 0.15)
+        if re.search(r"\d", text) or re.search(r"[+*/=^%]", text):
+            score += 0.1
+        return min(score, 1.0), None
+
+
+def reply_confidence(text, reply):
+    """Heuristic confidence that a small-model reply is good enough to speak"""
+    reply = (reply or "").strip()
+    if not reply:
+        return 0.0
+    confidence = 1.0
+    if UNCERTAIN_PATTERNS.search(reply):
+        confidence -= 0.6
+    if reply[-1] not in ".!?\"')":
+        confidence -= 0.3  # cut off at max_tokens
+    if normalize_query(reply) == normalize_query(text):
+        confidence -= 0.5  # echoed the question
+    if len(reply.split()) < 2 and len(text.split()) > 3:
+        confidence -= 0.3
+    return max(confidence, 0.0)
+
+
+class CascadeRouter(LLMBackend):
+    """Routes each turn to the cheapest tier likely to answer it well"""
+
+    name = "cascade"
+
+    def __init__(self, large, small=None, templates=True, easy_threshold=0.35, min_confidence=0.6):
+        """
+        Initialize the cascade
+        Args:
+            large: Backend used for hard turns and escalations
+            small: Faster backend tried first on easy turns (None to skip that tier)
+            templates (bool): Answer whole-utterance small talk from templates
+            easy_threshold (float): Complexity at or below which the small tier is tried
+            min_confidence (float): Small-tier replies below this confidence are escalated
+        """
+        self.large = large
+        self.small = small
+        self.templates = templates
+        self.easy_threshold = easy_threshold
+        self.min_confidence = min_confidence
+        self.failure_reply = getattr(large, "failure_reply", None)
+        self.scorer = ComplexityScorer()
+        self._template_cycle = {
+            intent: itertools.cycle(replies) for intent, (_, replies) in TEMPLATE_INTENTS.items()
+        }
+        self.stats = {
+            tier: {"routed": 0, "answered": 0, "escalated": 0, "total_ms": 0.0}
+            for tier in ("template", "small", "large")
+        }
+        self.last_route = None
+
+    def _record(self, tier, elapsed, answered=True):
+        stats = self.stats[tier]
+        stats["routed"] += 1
+        stats["total_ms"] += elapsed * 1000
+        if answered:
+            stats["answered"] += 1
+        else:
+            stats["escalated"] += 1
+
+    def process_stream(self, text, history=None):
+        """Yield the reply from the cheapest tier that can handle the turn"""
+        start = time.perf_counter()
+        complexity, intent = self.scorer.score(text)
+
+        if intent and self.templates:
+            if intent in CLOCK_INTENTS:
+                reply = CLOCK_INTENTS[intent][1].format(now=datetime.now())
+            else:
+                reply = next(self._template_cycle[intent])
+            self._record("template", time.perf_counter() - start)
+            self.last_route = {"tier": "template", "intent": intent, "complexity": complexity}
+            logger.debug(f"Cascade: template '{intent}' answered '{text}'")
+            yield reply
+            return
+
+        # The small model would invent the weather or the news; only the large model gets these
+        if self.small is not None and complexity <= self.easy_threshold and not self.scorer.time_sensitive(text):
+            try:
+                reply = self.small.process(text, history=history)
+            except Exception as e:
+                logger.error(f"Small model error: {str(e)}")
+                reply = ""
+            confidence = reply_confidence(text, reply)
+            if getattr(self.small, "failure_reply", None) and reply.strip() == self.small.failure_reply:
+                confidence = 0.0
+            answered = confidence >= self.min_confidence
+            self._record("small", time.perf_counter() - start, answered)
+            if answered:
+                self.last_route = {"tier": "small", "complexity": complexity, "confidence": confidence}
+                logger.debug(f"Cascade: small model answered (complexity {complexity:.2f}, confidence {confidence:.2f})")
+                yield reply
+                return
+            logger.info(f"Cascade: escalating to large model (confidence {confidence:.2f})")
+
+        large_start = time.perf_counter()
+        for token in self.large.process_stream(text, history=history):
+            yield token
+        self._record("large", time.perf_counter() - large_start)
+        self.last_route = {"tier": "large", "complexity": complexity}
+
+    def process(self, text, history=None):
+        return "".join(self.process_stream(text, history=history)).strip()
+
+    def get_stats(self):
+        """
+        Per-tier hit rates and latency, plus the time saved against running
+        every turn on the large model (estimated from its average latency)
+        """
+        turns = sum(self.stats[t]["answered"] for t in self.stats)
+        large = self.stats["large"]
+        large_avg = large["total_ms"] / large["routed"] if large["routed"] else None
+        report = {"turns": turns, "tiers": {}}
+        saved = 0.0
+        for tier, stats in self.stats.items():
+            avg = stats["total_ms"] / stats["routed"] if stats["routed"] else 0.0
+            report["tiers"][tier] = {
+                "routed": stats["routed"],
+                "answered": stats["answered"],
+                "escalated": stats["escalated"],
+                "hit_rate": stats["answered"] / turns if turns else 0.0,
+                "avg_ms": avg,
+            }
+            if tier != "large" and large_avg is not None:
+                # Answered turns skipped the large model; escalated ones paid for both
+                saved += stats["answered"] * large_avg - stats["total_ms"]
+        report["estimated_saved_ms"] = saved if large_avg is not None else None
+        return report
+
+    def log_stats(self):
+        report = self.get_stats()
+        tiers = ", ".join(
+            f"{tier} {s['hit_rate']:.0%} ({s['avg_ms']:.0f} ms avg, {s['escalated']} escalated)"
+            for tier, s in report["tiers"].items()
+        )
+        saved = report["estimated_saved_ms"]
+        logger.info(
+            f"Cascade routing over {report['turns']} turns: {tiers}; "
+            f"estimated {saved / 1000:.1f} s saved" if saved is not None else f"Cascade routing: {tiers}"
+        )
+
+    def close(self):
+        self.log_stats()
+        if self.small is not None:
+            self.small.close()
+        self.large.close()
+
+
+def build_cascade(memory_manager, config=None):
+    """
+    Build the engine for the LLM fallthrough: the configured backend chain,
+    fronted by the cascade when it is enabled (config.settings.LLM_CASCADE)
+    """
+    if config is None:
+        from config.settings import LLM_CASCADE
+        config = LLM_CASCADE
+    large = build_engine(memory_manager)
+    if not config.get("enabled", True):
+        return large
+
+    small = None
+    if config.get("small_backend"):
+        try:
+            small = create_backend(config["small_backend"], memory_manager, **config.get("small_options", {}))
+        except BackendUnavailable as e:
+            logger.warning(f"Small model tier disabled, easy turns go to the large model: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error loading small model: {str(e)}")
+
+    return CascadeRouter(
+        large,
+        small,
+        templates=config.get("templates", True),
+        easy_threshold=config.get("easy_threshold", 0.35),
+        min_confidence=config.get("min_confidence", 0.6),
+    )
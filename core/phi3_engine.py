@@ -1,16 +1,22 @@
 import os
 from llama_cpp import Llama
+from core.llm_backends import LLMBackend
+from core.prompt_cache import PromptStateCache, model_fingerprint
+from core.prompt_packer import HistoryWindow, PromptPacker, TokenCounter
+from core.response_cache import ResponseCache
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-class Phi3Engine:
-    def __init__(self, memory_manager):
+class Phi3Engine(LLMBackend):
+    name = "phi3"
+
+    def __init__(self, memory_manager, model_path=None, max_tokens=200, cache_name="prompt_states"):
         logger.info("Initializing Phi-3 Engine...")
         self.memory_manager = memory_manager
 
-        self.model_path = "D:\\models\\Phi-3-mini-4k-instruct-q4.gguf"  # Update if stored elsewhere
-        self.max_tokens = 200
+        self.model_path = model_path or "D:\\models\\Phi-3-mini-4k-instruct-q4.gguf"  # Update if stored elsewhere
+        self.max_tokens = max_tokens
         self.temperature = 0.7
         self.context_window = 4096
 
@@ -20,13 +26,64 @@ class Phi3Engine:
             verbose=False
         )
 
+        # Count tokens with the model's own tokenizer; counts are cached per message
+        self.token_counter = TokenCounter(
+            lambda text: self.llm.tokenize(text.encode("utf-8"), add_bos=False, special=True)
+        )
+        self.packer = PromptPacker(
+            self.token_counter,
+            context_window=self.context_window,
+            reserve_tokens=self.max_tokens
+        )
+        self.history_turns = 20
+        self.history_window = HistoryWindow(self.history_turns)
+        self.last_pack_report = None
+
+        # Reuse evaluated KV state for the longest shared prompt prefix (system prompt,
+        # earlier turns); persisted so a restart skips the cold system prompt evaluation
+        self.prompt_cache = PromptStateCache(
+            cache_dir=os.path.join("data/cache", cache_name),
+            fingerprint=model_fingerprint(self.model_path, self.context_window)
+        )
+        self.llm.set_cache(self.prompt_cache)
+        self._warm_prompt_cache()
+
+        # Answer repeated small talk without running inference
+        self.response_cache = ResponseCache()
+        self.cache_context = f"phi3:{self.model_path}:{self._build_messages('', [], [])[0]['content']}"
+
         logger.info("Phi-3 Engine loaded successfully.")
 
-    def process(self, text):
+    def _warm_prompt_cache(self):
+        """Evaluate the system prompt once so the first real turn starts from a cached prefix"""
+        if self.prompt_cache.get_stats()["entries"]:
+            return
+        try:
+            messages = self._build_messages("Hello", [], [])
+            self.llm.create_chat_completion(messages=messages, max_tokens=1)
+            logger.info("Prompt cache primed with the system prompt.")
+        except Exception as e:
+            logger.error(f"Error priming prompt cache: {str(e)}")
+
+    def process(self, text, history=None, recalled=None):
+        """
+        Generate a reply
+        Args:
+            text (str): User input
+            history (list): Recent interactions to use instead of this engine's own
+                memory (set by remote clients of the inference server)
+            recalled (list): Memories the client already recalled for this input
+        """
         logger.info(f"Processing input: {text}")
-        history = self.memory_manager.get_recent_interactions(3)
+        history = self._history(history)
+        recent = self._previous_turns(text, history[-2:])
+        recalled = self._recall(text, history, recalled)
+        cached = self.response_cache.get(text, self.cache_context, recent, recalled)
+        if cached is not None:
+            logger.info(f"Phi-3 response (cached): {cached}")
+            return cached
 
-        messages = self._build_messages(text, history)
+        messages = self._prepare_messages(text, history, recalled)
 
         response = self.llm.create_chat_completion(
             messages=messages,
@@ -36,25 +93,105 @@ class Phi3Engine:
 
         reply = response["choices"][0]["message"]["content"].strip()
         logger.info(f"Phi-3 response: {reply}")
+        self.response_cache.put(text, reply, self.cache_context, recent, recalled)
+        self._log_cache_stats()
         return reply
 
-    def _build_messages(self, user_input, history):
+    def process_stream(self, text, history=None, recalled=None):
+        """Yield the reply token by token as llama.cpp generates it"""
+        logger.info(f"Processing input (streaming): {text}")
+        history = self._history(history)
+        recent = self._previous_turns(text, history[-2:])
+        recalled = self._recall(text, history, recalled)
+        cached = self.response_cache.get(text, self.cache_context, recent, recalled)
+        if cached is not None:
+            logger.info(f"Phi-3 response (cached): {cached}")
+            yield cached
+            return
+
+        messages = self._prepare_messages(text, history, recalled)
+
+        stream = self.llm.create_chat_completion(
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+        )
+
+        parts = []
+        for chunk in stream:
+            token = chunk["choices"][0]["delta"].get("content")
+            if token:
+                parts.append(token)
+                yield token
+        reply = "".join(parts).strip()
+        logger.info(f"Phi-3 response: {reply}")
+        self.response_cache.put(text, reply, self.cache_context, recent, recalled)
+        self._log_cache_stats()
+
+    def _history(self, history):
+        """Use caller-supplied history, falling back to local short-term memory"""
+        if history is None:
+            if self.memory_manager is None:
+                return []
+            history = self.memory_manager.get_recent_interactions(self.history_turns)
+        return self.history_window.select(history[-self.history_turns:])
+
+    @staticmethod
+    def _previous_turns(text, recent):
+        """Recent turns before the current input (which is usually already stored)"""
+        if recent and recent[-1]["speaker"].lower() == "user" and recent[-1]["text"] == text:
+            return recent[:-1]
+        return recent
+
+    def _log_cache_stats(self):
+        stats = self.prompt_cache.get_stats()
+        logger.debug(
+            f"Prompt cache: hit rate {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']}), "
+            f"{stats['reused_tokens']} prompt tokens reused, {stats['bytes'] / 1e6:.0f} MB"
+        )
+        responses = self.response_cache.get_stats()
+        logger.debug(
+            f"Response cache: hit rate {responses['hit_rate']:.0%} "
+            f"({responses['hits']} memory, {responses['disk_hits']} disk, {responses['misses']} misses, "
+            f"{responses['bypassed']} time-sensitive)"
+        )
+
+    def close(self):
+        """Persist the prompt and response caches so the next start is warm"""
+        self.prompt_cache.persist()
+        self.response_cache.close()
+
+    def _recall(self, text, history, recalled=None):
+        """Memories related to the input (unless the caller already recalled them); also part of the cache key"""
+        if recalled is not None:
+            return recalled
+        if self.memory_manager is None:
+            return []
+        history = self._previous_turns(text, history)
+        return self.memory_manager.recall(
+            text, k=3, exclude=[text] + [entry["text"] for entry in history]
+        )
+
+    def _prepare_messages(self, text, history, recalled):
+        """Pack history and recalled memory into chat messages"""
+        return self._build_messages(text, self._previous_turns(text, history), recalled)
+
+    def _build_messages(self, user_input, history, recalled=None):
         # Build the system prompt
-        system_prompt = {
-            "role": "system",
-            "content": (
-                "You are Jarvis, a highly intelligent, fast, and respectful AI assistant. "
-                "You speak clearly, briefly, and always address the user as 'sir'. "
-                "Respond like a human assistant would, but never exceed 2 sentences unless asked."
-            )
-        }
-
-        # Format memory
-        chat = [system_prompt]
-        for entry in history[-2:]:
-            role = "user" if entry["speaker"].lower() == "user" else "assistant"
-            chat.append({"role": role, "content": entry["text"]})
-
-        # Append the current input
-        chat.append({"role": "user", "content": user_input})
+        system_prompt = (
+            "You are Jarvis, a highly intelligent, fast, and respectful AI assistant. "
+            "You speak clearly, briefly, and always address the user as 'sir'. "
+            "Respond like a human assistant would, but never exceed 2 sentences unless asked."
+        )
+
+        # Pack system prompt, input, recent turns and recalled memory into the context window
+        chat, report = self.packer.pack(system_prompt, user_input, history, recalled or [])
+        self.last_pack_report = report
+        logger.debug(
+            f"Prompt tokens: system={report['system']} input={report['input']} "
+            f"history={report['history']} recalled={report['recalled']} "
+            f"total={report['total']}/{report['budget']} dropped={report['dropped']} "
+            f"({report['pack_ms']:.2f} ms)"
+        )
         return chat
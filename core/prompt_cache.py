@@ -0,0 +1,229 @@
+"""
+Prompt prefix (KV state) cache for llama.cpp.
+Implements the cache interface that llama_cpp.Llama.set_cache() expects:
+lookups return the saved model state sharing the longest token prefix with
+the new prompt, so only the differing suffix has to be evaluated.
+Persisted states are only valid for the model and context size that produced
+them, so the on-disk index records a model fingerprint and is discarded when
+it no longer matches.
+"""
+import os
+import json
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.helpers import atomic_write_text
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _common_prefix(a, b):
+    """Length of the shared token prefix of two int arrays"""
+    n = min(len(a), len(b))
+    if n == 0:
+        return 0
+    mismatch = np.flatnonzero(a[:n] != b[:n])
+    return int(mismatch[0]) if len(mismatch) else n
+
+
+def _state_size(state):
+    return getattr(state, "llama_state_size", 0) or 0
+
+
+def model_fingerprint(model_path, n_ctx):
+    """
+    Identify the model a KV state belongs to
+    Args:
+        model_path (str): GGUF model file
+        n_ctx (int): Context size the model was loaded with
+    Returns:
+        str: Fingerprint that changes when the file is replaced or n_ctx changes
+    """
+    try:
+        st = os.stat(model_path)
+        size, mtime = st.st_size, st.st_mtime_ns
+    except OSError:
+        size, mtime = None, None
+    return json.dumps([os.path.abspath(model_path), size, mtime, n_ctx])
+
+
+class PromptStateCache:
+    """Bounded LRU of llama.cpp states keyed by token sequence, with optional disk persistence"""
+
+    def __init__(self, capacity_bytes=1 << 30, min_prefix_tokens=16, cache_dir=None, persist_entries=2, fingerprint=None):
+        """
+        Initialize the cache
+        Args:
+            capacity_bytes (int): Maximum total size of cached states kept in RAM
+            min_prefix_tokens (int): Shorter shared prefixes are treated as misses
+            cache_dir (str): Directory to persist states across restarts (None disables)
+            persist_entries (int): Number of most recently used states written by persist()
+            fingerprint (str): Model identity (see model_fingerprint); persisted states saved
+                under a different one are discarded
+        """
+        self.capacity_bytes = capacity_bytes
+        self.min_prefix_tokens = min_prefix_tokens
+        self.cache_dir = cache_dir
+        self.persist_entries = persist_entries
+        self.fingerprint = fingerprint
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key tuple -> (token array, state or None if on disk)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_index()
+
+    @property
+    def cache_size(self):
+        """Total bytes of states held in RAM (llama_cpp cache interface)"""
+        return self._size
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _find_longest_prefix_key(self, key):
+        """Return (cache key, prefix length) of the entry sharing the longest prefix with key"""
+        tokens = np.asarray(key, dtype=np.int64)
+        best_key, best_len = None, 0
+        for cached_key, (cached_tokens, _) in self._entries.items():
+            prefix = _common_prefix(cached_tokens, tokens)
+            if prefix > best_len:
+                best_key, best_len = cached_key, prefix
+        return best_key, best_len
+
+    def __getitem__(self, key):
+        with self._lock:
+            best_key, prefix = self._find_longest_prefix_key(key)
+            if best_key is None or prefix < self.min_prefix_tokens:
+                self.misses += 1
+                raise KeyError("no cached prompt prefix")
+
+            tokens, state = self._entries[best_key]
+            if state is None:
+                state = self._load_state(best_key)
+                if state is None:
+                    del self._entries[best_key]
+                    self.misses += 1
+                    raise KeyError("cached prompt state missing on disk")
+                self._entries[best_key] = (tokens, state)
+                self._size += _state_size(state)
+                self._evict()
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            self.reused_tokens += prefix
+            return state
+
+    def __contains__(self, key):
+        with self._lock:
+            best_key, prefix = self._find_longest_prefix_key(key)
+            return best_key is not None and prefix >= self.min_prefix_tokens
+
+    def __setitem__(self, key, state):
+        key = tuple(int(t) for t in key)
+        with self._lock:
+            if key in self._entries:
+                old = self._entries.pop(key)[1]
+                self._size -= _state_size(old) if old is not None else 0
+            self._entries[key] = (np.asarray(key, dtype=np.int64), state)
+            self._size += _state_size(state)
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used in-RAM states until under capacity"""
+        while self._size > self.capacity_bytes and len(self._entries) > 1:
+            key, (_, state) = self._entries.popitem(last=False)
+            if state is not None:
+                self._size -= _state_size(state)
+
+    def get_stats(self):
+        """Return hit-rate and size statistics"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+                "reused_tokens": self.reused_tokens,
+            }
+
+    # Disk persistence
+
+    @staticmethod
+    def _key_hash(key):
+        return hashlib.sha1(np.asarray(key, dtype=np.int64).tobytes()).hexdigest()
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _load_index(self):
+        """Register persisted states; they are unpickled on first hit"""
+        try:
+            with open(self._index_path(), "r") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if not isinstance(index, dict) or index.get("fingerprint") != self.fingerprint:
+            logger.info("Persisted prompt states belong to a different model; discarding them.")
+            self._remove_states(keep=())
+            return
+        for tokens in index.get("entries", []):
+            key = tuple(tokens)
+            if os.path.exists(os.path.join(self.cache_dir, self._key_hash(key) + ".pkl")):
+                self._entries[key] = (np.asarray(key, dtype=np.int64), None)
+        if self._entries:
+            logger.info(f"Prompt cache found {len(self._entries)} persisted prompt states.")
+
+    def _remove_states(self, keep):
+        """Delete persisted state files not named in keep"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl") and name not in keep:
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _load_state(self, key):
+        path = os.path.join(self.cache_dir, self._key_hash(key) + ".pkl")
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.error(f"Error loading cached prompt state: {str(e)}")
+            return None
+
+    def persist(self):
+        """Write the most recently used states to disk so a restart starts warm"""
+        if not self.cache_dir:
+            return
+        with self._lock:
+            recent = list(self._entries.items())[-self.persist_entries:]
+        keep = set()
+        index = []
+        for key, (_, state) in recent:
+            name = self._key_hash(key) + ".pkl"
+            keep.add(name)
+            index.append(list(key))
+            path = os.path.join(self.cache_dir, name)
+            if state is None or os.path.exists(path):
+                continue
+            try:
+                temp_path = path + ".tmp"
+                with open(temp_path, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except Exception as e:
+                logger.error(f"Error persisting prompt state: {str(e)}")
+        try:
+            atomic_write_text(self._index_path(), json.dumps({"fingerprint": self.fingerprint, "entries": index}))
+            self._remove_states(keep)
+        except Exception as e:
+            logger.error(f"Error writing prompt cache index: {str(e)}")
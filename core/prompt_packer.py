@@ -0,0 +1,202 @@
+"""
+Token-budget-aware prompt packing for Jarvis chat models.
+Fills the model's context window by priority: system prompt, current
+input, recent turns (newest first), then recalled memory. Messages are laid
+out so consecutive turns share the longest possible prefix for the KV cache:
+the system message never changes, the history's start moves in blocks
+(HistoryWindow), and recalled memory, which changes every turn, sits in its
+own message right before the current input.
+"""
+import time
+from collections import OrderedDict
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TRUNCATION_MARK = " ..."
+
+
+class TokenCounter:
+    """Counts tokens with the model tokenizer, caching the count per text"""
+
+    def __init__(self, tokenize=None, max_entries=4096):
+        """
+        Initialize the counter
+        Args:
+            tokenize (callable): Function mapping a string to a list of tokens;
+                falls back to a ~4 characters per token estimate when None
+            max_entries (int): Maximum number of cached counts
+        """
+        self.tokenize = tokenize
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text):
+        """Return the number of tokens in a text"""
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        if self.tokenize:
+            tokens = len(self.tokenize(text))
+        else:
+            tokens = len(text) // 4 + 1
+        self._cache[text] = tokens
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return tokens
+
+
+class HistoryWindow:
+    """Chooses the recent turns sent with each prompt so their start only moves in blocks"""
+
+    def __init__(self, max_turns=20):
+        """
+        Args:
+            max_turns (int): Most turns sent; when that is exceeded the oldest half is
+                dropped at once, instead of one turn per turn, so the prompt prefix
+                evaluated last time still matches
+        """
+        self.max_turns = max_turns
+        self._anchor = None  # timestamp of the first turn in the window
+
+    def select(self, history):
+        """
+        Args:
+            history (list): Recent interactions, oldest first (up to max_turns of them)
+        Returns:
+            list: The turns to send, oldest first
+        """
+        history = list(history)
+        stamps = [entry["timestamp"] for entry in history]
+        if self._anchor in stamps:
+            history = history[stamps.index(self._anchor):]
+        elif self._anchor is not None:
+            history = history[-max(1, self.max_turns // 2):]
+        if len(history) > self.max_turns:
+            history = history[-max(1, self.max_turns // 2):]
+        self._anchor = history[0]["timestamp"] if history else None
+        return history
+
+
+class PromptPacker:
+    """Packs chat messages into a fixed token budget"""
+
+    def __init__(self, counter, context_window=4096, reserve_tokens=200, message_overhead=4):
+        """
+        Initialize the packer
+        Args:
+            counter (TokenCounter): Token counter for the target model
+            context_window (int): Model context size in tokens
+            reserve_tokens (int): Tokens kept free for the generated reply
+            message_overhead (int): Template tokens added around each message
+        """
+        self.counter = counter
+        self.context_window = context_window
+        self.reserve_tokens = reserve_tokens
+        self.message_overhead = message_overhead
+
+    @property
+    def budget(self):
+        """Tokens available for the prompt"""
+        return self.context_window - self.reserve_tokens
+
+    def _cost(self, text):
+        return self.counter.count(text) + self.message_overhead
+
+    def _truncate(self, text, max_tokens):
+        """Cut a text down to roughly max_tokens, keeping its beginning"""
+        if max_tokens <= 0:
+            return ""
+        tokens = self.counter.count(text)
+        if tokens <= max_tokens:
+            return text
+        mark = self.counter.count(TRUNCATION_MARK)
+        # Shrink proportionally, then tighten until the tokenizer agrees
+        length = int(len(text) * (max_tokens - mark) / tokens)
+        while length > 0:
+            candidate = text[:length].rstrip() + TRUNCATION_MARK
+            if self.counter.count(candidate) <= max_tokens:
+                return candidate
+            length = int(length * 0.9)
+        return ""
+
+    def pack(self, system_prompt, user_input, history=(), recalled=(), recalled_header="Relevant things you remember from earlier:"):
+        """
+        Build the message list for a turn
+        Args:
+            system_prompt (str): Base system instructions
+            user_input (str): Current user message
+            history (list): Recent interactions, oldest first (dicts or Interaction records)
+            recalled (list): Recalled memories, best first (dicts with "speaker" and "text")
+            recalled_header (str): Line introducing the recalled memories message
+        Returns:
+            tuple: (messages, report) where report has the tokens used per section
+        """
+        start = time.perf_counter()
+        remaining = self.budget
+        report = {"system": 0, "input": 0, "history": 0, "recalled": 0, "truncated": 0, "dropped": 0}
+
+        # 1. System prompt, always kept (truncated only if it alone overflows)
+        system_text = self._truncate(system_prompt, remaining - self.message_overhead)
+        report["system"] = self._cost(system_text)
+        remaining -= report["system"]
+
+        # 2. Current input
+        input_text = user_input
+        if self._cost(input_text) > remaining:
+            input_text = self._truncate(user_input, remaining - self.message_overhead)
+            report["truncated"] += 1
+        report["input"] = self._cost(input_text)
+        remaining -= report["input"]
+
+        # 3. Recent turns, newest first; the first that doesn't fit is truncated
+        turns = []
+        entries = list(history)
+        for position, entry in enumerate(reversed(entries)):
+            role = "user" if entry["speaker"].lower() == "user" else "assistant"
+            text = entry["text"]
+            cost = self._cost(text)
+            overflow = cost > remaining
+            if overflow:
+                text = self._truncate(text, remaining - self.message_overhead)
+                cost = self._cost(text)
+            if text:
+                turns.append({"role": role, "content": text})
+                report["history"] += cost
+                remaining -= cost
+                report["truncated"] += int(overflow)
+            if overflow:
+                # Older turns would leave a gap in the conversation, so stop here
+                report["dropped"] += len(entries) - position - (1 if text else 0)
+                break
+        turns.reverse()
+
+        # 4. Recalled memory as bullet lines in a message just before the input; it changes
+        #    every turn, so anywhere earlier would break the shared prefix with the last prompt
+        notes = []
+        header_cost = self.counter.count(recalled_header) + self.message_overhead
+        for item in recalled:
+            line = f"\n- ({item['speaker']}) {item['text']}"
+            cost = self.counter.count(line) + (0 if notes else header_cost)
+            if cost > remaining:
+                report["dropped"] += 1
+                continue
+            notes.append(line)
+            report["recalled"] += cost
+            remaining -= cost
+        messages = [{"role": "system", "content": system_text}]
+        messages.extend(turns)
+        if notes:
+            messages.append({"role": "system", "content": recalled_header + "".join(notes)})
+        messages.append({"role": "user", "content": input_text})
+
+        report["total"] = self.budget - remaining
+        report["budget"] = self.budget
+        report["pack_ms"] = (time.perf_counter() - start) * 1000
+        return messages, report
@@ -0,0 +1,178 @@
+"""
+Response cache for Jarvis AI engines.
+Repeated small talk ("how are you", "thank you") is answered from an LRU+TTL
+cache keyed by normalized text plus a context fingerprint, backed by a
+SQLite tier so the cache stays warm across restarts. Memories recalled into
+the prompt are part of the fingerprint, so an answer that depended on them
+is not replayed once they change.
+"""
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from core.db_writer import SQLiteWriter
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FILLER_WORDS = {"hey", "hi", "ok", "okay", "please", "jarvis", "um", "uh", "so", "well", "just"}
+
+CONTRACTIONS = {
+    "what's": "what is", "how's": "how is", "who's": "who is", "where's": "where is",
+    "it's": "it is", "i'm": "i am", "you're": "you are", "don't": "do not",
+    "can't": "cannot", "won't": "will not", "that's": "that is", "let's": "let us",
+}
+
+# Answers to these depend on the moment they're asked, so they are never cached
+TIME_SENSITIVE_PATTERNS = [
+    r"\b(time|date|day|today|tonight|tomorrow|yesterday|now|currently|current|latest|recent)\b",
+    r"\b(weather|temperature|forecast|news|price|stock|score|traffic)\b",
+    r"\b(remind|timer|alarm|schedule|calendar)\b",
+]
+
+# Queries leaning on the previous turn; their key includes that turn
+ANAPHORA_WORDS = {"it", "that", "this", "those", "these", "them", "he", "she", "they", "again", "more", "why", "else"}
+
+
+def normalize_query(text):
+    """Normalize a query so trivial variations share a cache key"""
+    text = text.lower().replace("’", "'")
+    words = []
+    for word in re.findall(r"[a-z0-9']+", text):
+        word = CONTRACTIONS.get(word, word).replace("'", "")
+        if word not in FILLER_WORDS:
+            words.append(word)
+    return " ".join(words)
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) response cache with TTL and time-sensitive opt-out"""
+
+    def __init__(self, db_path="data/cache/responses.db", max_entries=512, ttl_seconds=24 * 3600,
+                 no_cache_patterns=None):
+        """
+        Initialize the response cache
+        Args:
+            db_path (str): SQLite file for the persistent tier (None for memory only)
+            max_entries (int): Maximum entries kept in the in-memory LRU
+            ttl_seconds (float): Lifetime of a cached response
+            no_cache_patterns (list): Regexes for queries that must never be cached
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._no_cache = re.compile("|".join(no_cache_patterns or TIME_SENSITIVE_PATTERNS))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (response, created)
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "stores": 0}
+
+        self.db = None
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                self.db = SQLiteWriter(db_path)
+                self.db.executescript('''
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        response TEXT,
+                        created REAL
+                    );
+                ''')
+                self.db.execute("DELETE FROM responses WHERE created < ?", (time.time() - ttl_seconds,))
+            except sqlite3.Error as e:
+                logger.error(f"Response cache database error, using memory only: {str(e)}")
+                self.db = None
+
+    def is_cacheable(self, text):
+        """Return False for time-sensitive queries"""
+        return not self._no_cache.search(text.lower())
+
+    def make_key(self, text, context="", history=(), recalled=()):
+        """
+        Build a cache key
+        Args:
+            text (str): User query
+            context (str): Engine identity (model, system prompt) folded into the fingerprint
+            history (list): Recent interactions; the last one is included only for follow-up queries
+            recalled (list): Memories and facts recalled into the prompt (dicts with "text")
+        """
+        normalized = normalize_query(text)
+        fingerprint = context
+        if history and ANAPHORA_WORDS.intersection(normalized.split()):
+            fingerprint += "\x1f" + history[-1]["text"]
+        for memory in recalled:
+            fingerprint += "\x1e" + memory["text"]
+        digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]
+        return f"{digest}:{normalized}"
+
+    def get(self, text, context="", history=(), recalled=()):
+        """Return a cached response, or None on a miss or for time-sensitive queries"""
+        if not self.is_cacheable(text):
+            self.stats["bypassed"] += 1
+            return None
+        key = self.make_key(text, context, history, recalled)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, created = entry
+                if now - created <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return response
+                del self._entries[key]
+
+        if self.db:
+            try:
+                rows = self.db.query("SELECT response, created FROM responses WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                logger.error(f"Response cache database error: {str(e)}")
+                rows = []
+            if rows and now - rows[0][1] <= self.ttl_seconds:
+                response, created = rows[0]
+                self._remember(key, response, created)
+                self.stats["disk_hits"] += 1
+                return response
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, text, response, context="", history=(), recalled=()):
+        """Store a response unless the query is time-sensitive"""
+        if not response or not self.is_cacheable(text):
+            return
+        key = self.make_key(text, context, history, recalled)
+        created = time.time()
+        self._remember(key, response, created)
+        self.stats["stores"] += 1
+        if self.db:
+            try:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                    (key, response, created)
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Response cache database error: {str(e)}")
+
+    def _remember(self, key, response, created):
+        with self._lock:
+            self._entries[key] = (response, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self):
+        """Return hit/miss counters and the overall hit rate"""
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["entries"] = len(self._entries)
+        return stats
+
+    def close(self):
+        """Flush and close the persistent tier"""
+        if self.db:
+            self.db.close()
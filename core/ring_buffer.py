@@ -0,0 +1,109 @@
+"""
+Fixed-capacity ring buffer for Jarvis short-term interactions.
+"""
+import sys
+
+
+class Interaction:
+    """A single conversation turn; compact replacement for the old interaction dict"""
+
+    __slots__ = ("timestamp", "speaker", "text")
+
+    def __init__(self, timestamp, speaker, text):
+        self.timestamp = timestamp
+        # Speakers repeat constantly ("user", "jarvis"), so share one string object
+        self.speaker = sys.intern(speaker)
+        self.text = text
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create an interaction from its JSON dict form"""
+        return cls(data["timestamp"], data["speaker"], data["text"])
+
+    def to_dict(self):
+        """Return the JSON dict form used in short_term.json"""
+        return {"timestamp": self.timestamp, "speaker": self.speaker, "text": self.text}
+
+    def __getitem__(self, key):
+        """Dict-style access so existing entry["text"] callers keep working"""
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        """Dict-style get"""
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __eq__(self, other):
+        if isinstance(other, Interaction):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Interaction({self.timestamp!r}, {self.speaker!r}, {self.text!r})"
+
+
+class InteractionRing:
+    """Preallocated ring of Interaction records with O(1) append and tail access"""
+
+    def __init__(self, capacity=50):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._next = 0
+        self._size = 0
+
+    @classmethod
+    def from_list(cls, items, capacity=50):
+        """Build a ring from the JSON list form, keeping the newest entries"""
+        ring = cls(capacity)
+        for item in items[-capacity:]:
+            ring.append(item)
+        return ring
+
+    def append(self, item):
+        """Append an Interaction (or its dict form), overwriting the oldest when full"""
+        if not isinstance(item, Interaction):
+            item = Interaction.from_dict(item)
+        self._slots[self._next] = item
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        """Index from oldest (0) to newest (-1)"""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ring index out of range")
+        return self._slots[(self._next - self._size + index) % self.capacity]
+
+    def tail(self, count):
+        """Return the newest `count` interactions, oldest first"""
+        count = min(max(count, 0), self._size)
+        start = (self._next - count) % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            return self._slots[start:end]
+        return self._slots[start:] + self._slots[:end - self.capacity]
+
+    def __iter__(self):
+        return iter(self.tail(self._size))
+
+    def clear(self):
+        """Drop every interaction"""
+        self._slots = [None] * self.capacity
+        self._next = 0
+        self._size = 0
+
+    def to_list(self):
+        """Return the JSON list form used in short_term.json"""
+        return [item.to_dict() for item in self]
@@ -0,0 +1,380 @@
+"""
+Offline semantic recall index for Jarvis memory.
+Texts are embedded with a hashed n-gram vectorizer, stored as a
+memory-mapped int8 matrix and searched with an inverted-file (IVF)
+partitioning so a lookup only scans a few clusters instead of every row.
+main.py and gui_main.py may share one index directory: writes, training
+and lookups hold an inter-process lock file, and each process first picks
+up the rows (and clusterings) the others wrote, so the row files stay
+aligned and row ids stay unique.
+"""
+import os
+import re
+import json
+import zlib
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from utils.helpers import FileLock
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashingVectorizer:
+    """Stable hashed word/char n-gram embeddings (no model download required)"""
+
+    def __init__(self, dim=256, char_ngram=4):
+        self.dim = dim
+        self.char_ngram = char_ngram
+
+    def _features(self, text):
+        """Yield the n-gram features for a text"""
+        words = _WORD_RE.findall(text.lower())
+        for word in words:
+            yield "w:" + word
+            padded = f" {word} "
+            for i in range(max(1, len(padded) - self.char_ngram + 1)):
+                yield "c:" + padded[i:i + self.char_ngram]
+        for first, second in zip(words, words[1:]):
+            yield f"b:{first} {second}"
+
+    def transform(self, text):
+        """Embed a text as an L2-normalised float32 vector"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            # The top bit picks the sign so collisions cancel out on average
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        # Sub-linear term frequency keeps repeated words from dominating
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class SemanticIndex:
+    """Append-only memory-mapped vector index with IVF search"""
+
+    def __init__(self, index_dir, dim=256, n_lists=1024, n_probe=8, train_size=4096):
+        """
+        Initialize the semantic index
+        Args:
+            index_dir (str): Directory holding the index files
+            dim (int): Embedding dimension
+            n_lists (int): Target number of IVF clusters once the index is large
+            n_probe (int): Number of clusters scanned per query
+            train_size (int): Number of vectors before clustering kicks in (flat scan below it)
+        """
+        self.index_dir = index_dir
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size
+        self.vectorizer = HashingVectorizer(dim)
+
+        os.makedirs(index_dir, exist_ok=True)
+        self.vectors_path = os.path.join(index_dir, "vectors.i8")
+        self.lists_path = os.path.join(index_dir, "lists.i32")
+        self.centroids_path = os.path.join(index_dir, "centroids.npy")
+        self.meta_path = os.path.join(index_dir, "meta.jsonl")
+        self.offsets_path = os.path.join(index_dir, "offsets.i64")
+
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(os.path.join(index_dir, "index.lock"))
+        self._lock_depth = 0
+        self._retrain_thread = None
+        self._load()
+
+    def _load(self):
+        """Open the index files, then map existing rows and rebuild the per-cluster row lists"""
+        self.count = 0
+        self._matrix = None
+        self._mapped_count = 0
+
+        self.centroids = None
+        self._centroids_stamp = None
+        self._trained_count = 0
+        self._lists = None
+        self._pending = []
+
+        self._vectors_file = open(self.vectors_path, "ab")
+        self._lists_file = open(self.lists_path, "ab")
+        self._meta_file = open(self.meta_path, "ab")
+        self._offsets_file = open(self.offsets_path, "ab")
+        self._meta_reader = open(self.meta_path, "rb")
+        with self.exclusive():
+            self._catch_up()
+        logger.info(f"Semantic index loaded with {self.count} vectors.")
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the index lock against other threads and processes (re-entrant within a thread)"""
+        with self._lock:
+            if self._lock_depth == 0:
+                self._file_lock.__enter__()
+            self._lock_depth += 1
+            try:
+                yield self
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    self._file_lock.__exit__(None, None, None)
+
+    def _disk_count(self):
+        """Rows complete in all three row files (a writer that died mid-row leaves a partial one)"""
+        sizes = [(self.vectors_path, self.dim), (self.offsets_path, 8), (self.lists_path, 4)]
+        return min(os.path.getsize(path) // width for path, width in sizes)
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _catch_up(self):
+        """Pick up rows and clusterings other processes wrote (caller holds exclusive())"""
+        count = self._disk_count()
+        stamp = self._stamp(self.centroids_path)
+        if stamp != self._centroids_stamp:
+            # Re-clustered elsewhere (or first load): rebuild the lists from disk
+            self.count = count
+            self._centroids_stamp = stamp
+            self.centroids = np.load(self.centroids_path) if stamp else None
+            if self.centroids is not None:
+                assignments = np.fromfile(self.lists_path, dtype=np.int32, count=count)
+                self._trained_count = count
+                self._lists = self._group(assignments, len(self.centroids))
+            else:
+                self._trained_count = 0
+                self._lists = None
+                self._pending = []
+        elif count != self.count:
+            if self.centroids is not None and count > self.count:
+                new = np.fromfile(self.lists_path, dtype=np.int32, count=count - self.count, offset=self.count * 4)
+                for row, cluster in enumerate(new, self.count):
+                    if cluster >= 0:
+                        self._pending[cluster].append(row)
+            self.count = count
+
+    def _truncate_partial_rows(self):
+        """Cut row files back to the rows complete in all of them before appending"""
+        for path, width in [(self.vectors_path, self.dim), (self.offsets_path, 8), (self.lists_path, 4)]:
+            if os.path.getsize(path) > self.count * width:
+                logger.warning(f"Discarding a partially written row in {path}")
+                os.truncate(path, self.count * width)
+
+    def _group(self, assignments, n_lists):
+        """Split row ids per cluster; rows added later go to small pending lists"""
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        self._pending = [[] for _ in range(n_lists)]
+        return [order[bounds[i]:bounds[i + 1]] for i in range(n_lists)]
+
+    def __len__(self):
+        return self.count
+
+    def add(self, text, metadata=None):
+        """Embed and append a text; returns its row id"""
+        return self.add_many([(text, metadata)])[0]
+
+    def add_many(self, items):
+        """
+        Embed and append several texts with one write (and flush) per index file
+        Args:
+            items (list): (text, metadata) pairs
+        Returns:
+            list: Row id per item (None for blank texts)
+        """
+        kept = [(text, metadata) for text, metadata in items if text and text.strip()]
+        if not kept:
+            return [None] * len(items)
+        # Embedding runs outside the lock so searches and other writers aren't held up
+        vectors = np.stack([self.vectorizer.transform(text) for text, _ in kept])
+        quantized = np.round(vectors * 127).astype(np.int8)
+        records = [json.dumps({"text": text, **(metadata or {})}).encode("utf-8") + b"\n" for text, metadata in kept]
+        sizes = np.array([0] + [len(r) for r in records[:-1]], dtype=np.int64)
+
+        with self.exclusive():
+            # Another process may have appended since this one last looked
+            self._catch_up()
+            self._truncate_partial_rows()
+            first = self.count
+            self._meta_file.seek(0, os.SEEK_END)
+            offsets = np.cumsum(sizes) + self._meta_file.tell()
+            self._meta_file.write(b"".join(records))
+            self._meta_file.flush()
+            self._offsets_file.write(offsets.tobytes())
+            self._offsets_file.flush()
+            self._vectors_file.write(quantized.tobytes())
+            self._vectors_file.flush()
+
+            clusters = np.full(len(kept), -1, dtype=np.int32)
+            if self.centroids is not None:
+                clusters[:] = np.argmax(vectors @ self.centroids.T, axis=1)
+                for i, cluster in enumerate(clusters):
+                    self._pending[cluster].append(first + i)
+            self._lists_file.write(clusters.tobytes())
+            self._lists_file.flush()
+            self.count += len(kept)
+
+        self._maybe_train()
+        rows = []
+        for text, _ in items:
+            if text and text.strip():
+                rows.append(first)
+                first += 1
+            else:
+                rows.append(None)
+        return rows
+
+    def _maybe_train(self):
+        """Cluster the index once it is large enough, and re-cluster as it grows"""
+        if self.count < self.train_size:
+            return
+        if self.centroids is not None and self.count < self._trained_count * 8:
+            return
+        if self._retrain_thread and self._retrain_thread.is_alive():
+            return
+        self._retrain_thread = threading.Thread(target=self.train, name="semantic-index-train", daemon=True)
+        self._retrain_thread.start()
+
+    def _rows(self):
+        """Return the int8 matrix, remapping when rows were appended since the last map"""
+        with self._lock:
+            if self._mapped_count != self.count:
+                self._matrix = np.memmap(self.vectors_path, dtype=np.int8, mode="r", shape=(self.count, self.dim))
+                self._offsets = np.memmap(self.offsets_path, dtype=np.int64, mode="r", shape=(self.count,))
+                self._mapped_count = self.count
+            return self._matrix
+
+    def train(self, iterations=8, sample_size=65536):
+        """Run spherical k-means on a sample and reassign every row"""
+        start = time.perf_counter()
+        matrix = self._rows()
+        count = len(matrix)
+        n_lists = max(1, min(self.n_lists, count // 32))
+
+        rng = np.random.default_rng(0)
+        sample_ids = rng.choice(count, size=min(count, sample_size), replace=False)
+        sample = matrix[np.sort(sample_ids)].astype(np.float32)
+        sample /= np.linalg.norm(sample, axis=1, keepdims=True) + 1e-6
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            present, starts = np.unique(labels[order], return_index=True)
+            sums = centroids.copy()
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            centroids = sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-6)
+
+        assignments = self._assign(matrix, centroids)
+
+        with self.exclusive():
+            # Rows appended while training ran (here or elsewhere) still need a cluster
+            self._catch_up()
+            if self.count > count:
+                tail = self._assign(self._rows()[count:], centroids)
+                assignments = np.concatenate([assignments, tail])
+            self.centroids = centroids.astype(np.float32)
+            self._lists = self._group(assignments, n_lists)
+            self._trained_count = self.count
+            # The lists are rewritten in place so other processes' append handles stay valid;
+            # the centroids are replaced atomically and their new stamp tells others to reload
+            self._lists_file.close()
+            assignments.astype(np.int32).tofile(self.lists_path)
+            self._lists_file = open(self.lists_path, "ab")
+            tmp_path = self.centroids_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, self.centroids)
+            os.replace(tmp_path, self.centroids_path)
+            self._centroids_stamp = self._stamp(self.centroids_path)
+
+        logger.info(
+            f"Semantic index clustered {self.count} vectors into {n_lists} lists "
+            f"in {(time.perf_counter() - start):.2f}s"
+        )
+
+    @staticmethod
+    def _assign(matrix, centroids, chunk=65536):
+        """Nearest-centroid assignment in chunks to bound memory use"""
+        out = np.empty(len(matrix), dtype=np.int32)
+        for i in range(0, len(matrix), chunk):
+            out[i:i + chunk] = np.argmax(matrix[i:i + chunk].astype(np.float32) @ centroids.T, axis=1)
+        return out
+
+    def search(self, query, k=5, min_score=0.0):
+        """
+        Find the stored texts most similar to a query
+        Args:
+            query (str): Query text
+            k (int): Number of results
+            min_score (float): Minimum cosine similarity
+        Returns:
+            list: Dicts with "text", "score" and any stored metadata, best first
+        """
+        vector = self.vectorizer.transform(query)
+        if not vector.any():
+            return []
+
+        # Matrix, offsets and candidate lists are taken together so they describe the same rows
+        with self.exclusive():
+            self._catch_up()
+            if self.count == 0:
+                return []
+            matrix = self._rows()
+            offsets = self._offsets
+            if self.centroids is None:
+                candidates = None
+            else:
+                n_probe = min(self.n_probe, len(self.centroids))
+                probes = np.argpartition(-(self.centroids @ vector), n_probe - 1)[:n_probe]
+                parts = [self._lists[p] for p in probes]
+                parts += [np.array(self._pending[p], dtype=np.int64) for p in probes if self._pending[p]]
+                candidates = np.concatenate(parts)
+                candidates = candidates[candidates < len(matrix)]
+
+        if candidates is None:
+            scores = matrix.astype(np.float32) @ vector
+            ids = np.arange(len(matrix))
+        else:
+            if len(candidates) == 0:
+                return []
+            candidates.sort()
+            scores = matrix[candidates].astype(np.float32) @ vector
+            ids = candidates
+
+        scores /= 127.0
+        top = min(k, len(scores))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for i in best:
+            if scores[i] < min_score:
+                continue
+            record = self._read_meta(int(offsets[ids[i]]))
+            record["score"] = float(scores[i])
+            results.append(record)
+        return results
+
+    def _read_meta(self, offset):
+        """Read the metadata record stored at a byte offset"""
+        with self._lock:
+            self._meta_reader.seek(offset)
+            return json.loads(self._meta_reader.readline())
+
+    def close(self):
+        """Close the index files"""
+        if self._retrain_thread and self._retrain_thread.is_alive():
+            self._retrain_thread.join()
+        with self._lock:
+            for f in (self._vectors_file, self._lists_file, self._meta_file, self._offsets_file, self._meta_reader,
+                      self._file_lock):
+                f.close()
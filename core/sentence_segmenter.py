@@ -0,0 +1,71 @@
+"""
+Incremental sentence segmentation for streamed LLM output.
+Tokens are fed in as they arrive; complete sentences come out as soon as
+the whitespace after their closing punctuation has been seen.
+"""
+import re
+
+# Terminal punctuation (plus closing quotes/brackets) followed by whitespace, or a line break
+_BOUNDARY_RE = re.compile(r"[.!?…]+[\"')\]”’]*(?=\s)|\n")
+_LAST_WORD_RE = re.compile(r"(\S+)$")
+
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc",
+    "e.g", "i.e", "approx", "no", "fig", "inc", "ltd", "co"
+}
+
+
+class SentenceSegmenter:
+    """Splits a stream of text chunks into speakable sentences"""
+
+    def __init__(self, min_chars=10):
+        """
+        Initialize the segmenter
+        Args:
+            min_chars (int): Shorter fragments are merged into the following sentence
+        """
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._scan_from = 0
+
+    def feed(self, text):
+        """
+        Add streamed text
+        Args:
+            text (str): Next chunk of generated text
+        Returns:
+            list: Sentences completed by this chunk
+        """
+        self._buffer += text
+        sentences = []
+        while True:
+            sentence = self._next_sentence()
+            if sentence is None:
+                break
+            sentences.append(sentence)
+        return sentences
+
+    def _next_sentence(self):
+        """Pop the first complete sentence from the buffer, if any"""
+        for match in _BOUNDARY_RE.finditer(self._buffer, self._scan_from):
+            end = match.end()
+            candidate = self._buffer[:end].strip()
+            if match.group() != "\n":
+                word = _LAST_WORD_RE.search(self._buffer[:match.start()])
+                if word and word.group(1).lower().rstrip(".") in ABBREVIATIONS:
+                    continue
+            if len(candidate) < self.min_chars:
+                continue
+            self._buffer = self._buffer[end:]
+            self._scan_from = 0
+            return candidate
+        # Nothing complete yet; don't rescan settled text (keep room for a split boundary)
+        self._scan_from = max(0, len(self._buffer) - 8)
+        return None
+
+    def flush(self):
+        """Return whatever text remains once the stream has ended"""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        self._scan_from = 0
+        return rest
@@ -0,0 +1,78 @@
+"""
+Streaming response pipeline for Jarvis.
+Feeds engine tokens through a sentence segmenter so each complete sentence
+starts synthesizing and playing while later tokens are still generating.
+"""
+import time
+from core.sentence_segmenter import SentenceSegmenter
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StreamingResponder:
+    """Connects a streaming engine to text-to-speech, sentence by sentence"""
+
+    def __init__(self, engine, tts, min_sentence_chars=10):
+        """
+        Initialize the responder
+        Args:
+            engine: Object with process_stream(text) (and/or process(text))
+            tts: Object with speak_queued(text, on_start=None)
+            min_sentence_chars (int): Fragments shorter than this are merged with the next sentence
+        """
+        self.engine = engine
+        self.tts = tts
+        self.min_sentence_chars = min_sentence_chars
+        self.last_metrics = None
+
+    def respond(self, text):
+        """
+        Generate and speak a reply
+        Args:
+            text (str): User input
+        Returns:
+            tuple: (reply, metrics) where metrics holds ttft_ms, ttfa_ms (filled in
+                   when playback of the first sentence starts), generation_ms and sentences
+        """
+        start = time.perf_counter()
+        metrics = {"ttft_ms": None, "ttfa_ms": None, "generation_ms": None, "sentences": 0}
+
+        def on_first_audio():
+            if metrics["ttfa_ms"] is None:
+                metrics["ttfa_ms"] = (time.perf_counter() - start) * 1000
+                logger.info(f"Time to first audio: {metrics['ttfa_ms']:.0f} ms")
+
+        def speak(sentence):
+            on_start = on_first_audio if metrics["sentences"] == 0 else None
+            metrics["sentences"] += 1
+            self.tts.speak_queued(sentence, on_start=on_start)
+
+        if not hasattr(self.engine, "process_stream"):
+            reply = self.engine.process(text)
+            metrics["ttft_ms"] = metrics["generation_ms"] = (time.perf_counter() - start) * 1000
+            speak(reply)
+            self.last_metrics = metrics
+            return reply, metrics
+
+        segmenter = SentenceSegmenter(self.min_sentence_chars)
+        parts = []
+        for token in self.engine.process_stream(text):
+            if metrics["ttft_ms"] is None:
+                metrics["ttft_ms"] = (time.perf_counter() - start) * 1000
+            parts.append(token)
+            for sentence in segmenter.feed(token):
+                speak(sentence)
+
+        rest = segmenter.flush()
+        if rest:
+            speak(rest)
+
+        metrics["generation_ms"] = (time.perf_counter() - start) * 1000
+        ttft = f"{metrics['ttft_ms']:.0f} ms" if metrics["ttft_ms"] is not None else "n/a"
+        logger.info(
+            f"Streamed reply: time to first token {ttft}, "
+            f"generation {metrics['generation_ms']:.0f} ms, {metrics['sentences']} sentences"
+        )
+        self.last_metrics = metrics
+        return "".join(parts).strip(), metrics
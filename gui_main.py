@@ -4,9 +4,11 @@ import threading
 import time
 
 from core.memory_manager import MemoryManager
-from core.phi3_engine import Phi3Engine
+from core.model_router import build_cascade
+from core.speech_pipeline import StreamingResponder
 from utils.logger import setup_logger
 
+from interfaces.voice.audio_bus import close_audio_bus
 from interfaces.voice.text_to_speech import TextToSpeech
 from interfaces.voice.speech_to_text import SpeechToText
 from interfaces.system.spotify_control import SpotifyControl
@@ -22,10 +24,11 @@ class JarvisGUI:
         self.root.configure(bg="#1e1e1e")
 
         self.memory = MemoryManager()
-        self.ai_engine = Phi3Engine(self.memory)
+        self.ai_engine = build_cascade(self.memory)
         self.spotify = SpotifyControl()
         self.tts = TextToSpeech(self.spotify)
         self.stt = SpeechToText()
+        self.responder = StreamingResponder(self.ai_engine, self.tts)
 
         self.is_listening = False
         self.voice_detector = None
@@ -102,13 +105,14 @@ class JarvisGUI:
 
     def _get_response(self, command):
         self.memory.add_interaction("user", command)
-        response = self.ai_engine.process(command)
+        self.tts.stop()
+        # Sentences start playing while the rest of the reply is still generating
+        response, _ = self.responder.respond(command)
         self.memory.add_interaction("jarvis", response)
 
         self.output_display.insert(END, f"Jarvis: {response}\n")
         self.output_display.see(END)
 
-        self.tts.speak(response)
         self.status_bar.config(text="🟢 Jarvis is standing by")
 
     def _on_voice_detected(self):
@@ -125,8 +129,13 @@ class JarvisGUI:
                 self.voice_detector.stop()
             except Exception as e:
                 logger.error(f"Error stopping voice detector: {str(e)}")
+        self.stt.cleanup()
+        close_audio_bus()
+        self.memory.close()
+        self.ai_engine.close()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = JarvisGUI(root)
     root.mainloop()
+    app.cleanup()
@@ -151,6 +151,20 @@ class SpotifyControl:
             logger.error(f"Error setting volume with pycaw: {e}")
             return False
 
+    def get_volume(self):
+        """Get Spotify volume (0-100) using pycaw, or None if Spotify isn't playing audio."""
+        try:
+            from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
+            sessions = AudioUtilities.GetAllSessions()
+            for session in sessions:
+                if session.Process and session.Process.name().lower() == "spotify.exe":
+                    volume_interface = session._ctl.QueryInterface(ISimpleAudioVolume)
+                    return round(volume_interface.GetMasterVolume() * 100)
+            return None
+        except Exception as e:
+            logger.error(f"Error getting volume with pycaw: {e}")
+            return None
+
     def search_and_play(self, query):
         """Search for a song and play it"""
         try:
@@ -0,0 +1,321 @@
+"""
+Shared audio capture bus for Jarvis.
+One input stream is read on one thread into a ring buffer at the device
+rate. Every distinct subscriber rate gets a single polyphase resampler and
+ring buffer of its own, so the wake word, VAD, STT and recorders share one
+microphone and each conversion happens once no matter how many consumers
+want it. Subscribers either pull from their ring (with lag and overrun
+accounting) or get blocks pushed on the capture thread.
+"""
+import math
+import threading
+import time
+import wave
+import numpy as np
+from interfaces.voice.audio_stream import AudioRingBuffer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PolyphaseResampler:
+    """Streaming rational resampler (upsample by L, low-pass, downsample by M) in NumPy"""
+
+    def __init__(self, source_rate, target_rate, taps=16):
+        """
+        Args:
+            source_rate (int): Input sample rate
+            target_rate (int): Output sample rate
+            taps (int): Filter length in input samples (grows when decimating)
+        """
+        g = math.gcd(source_rate, target_rate)
+        self.up = target_rate // g
+        self.down = source_rate // g
+        self.taps = int(taps * max(1.0, self.down / self.up))
+
+        # Windowed-sinc prototype at the upsampled rate, cut off below the lower Nyquist
+        length = self.taps * self.up
+        cutoff = 0.45 / max(self.up, self.down)
+        m = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * m) * np.kaiser(length, 8.0) * self.up
+        # phases[p, k] = h[p + k * up]; reversed so rows line up with sliding windows
+        self.phases = prototype.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32)
+
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._consumed = 0  # input samples seen
+        self._produced = 0  # output samples made
+
+    def process(self, block):
+        """Resample one block of int16 samples; returns int16 (length varies by a sample or so)"""
+        samples = np.concatenate([self._history, block.astype(np.float32)])
+        total = self._consumed + len(block)
+        # Output n takes input index floor(n * down / up) with phase (n * down) % up
+        last = (total * self.up - 1) // self.down if total else -1
+        n = np.arange(self._produced, last + 1)
+        position = n * self.down
+        index = position // self.up
+        phase = position % self.up
+
+        windows = np.lib.stride_tricks.sliding_window_view(samples, self.taps)
+        offset = self._consumed - (self.taps - 1)  # input index of samples[0]
+        rows = windows[index - (self.taps - 1) - offset]
+        out = np.einsum("ij,ij->i", rows, self.phases[phase])
+
+        self._history = samples[len(samples) - (self.taps - 1):]
+        self._consumed = total
+        self._produced = last + 1
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+
+class _Rate:
+    """Ring buffer (and resampler, if needed) for one target rate"""
+
+    def __init__(self, source_rate, sample_rate, buffer_seconds):
+        self.sample_rate = sample_rate
+        self.buffer = AudioRingBuffer(int(buffer_seconds * sample_rate))
+        self.resampler = None if sample_rate == source_rate else PolyphaseResampler(source_rate, sample_rate)
+        self.subscribers = []
+
+
+class Subscription:
+    """
+    One consumer of the bus at its own sample rate
+    Pull subscriptions double as a stream (open/read/close, sample_rate,
+    block_size), so an AudioCapture can sit on top of one.
+    """
+
+    def __init__(self, bus, name, sample_rate, callback=None, block_size=512):
+        self.bus = bus
+        self.name = name
+        self.sample_rate = sample_rate
+        self.callback = callback
+        self.block_size = block_size
+        self.cursor = None
+        self.delivered = 0
+        self.overruns = 0
+        self.lost = 0
+        self.callback_s = 0.0
+        self.active = False
+        self._rate = None
+
+    def open(self):
+        self.bus.attach(self)
+        self.bus.start()
+
+    def close(self):
+        self.bus.detach(self)
+
+    def read(self, timeout=None):
+        """
+        Next audio since the last read (at most 4 blocks), waiting for it
+        Returns:
+            np.ndarray: int16 samples; None once the subscription is closed, or the
+                bus has stopped and this subscriber has caught up (or on timeout)
+        """
+        ring = self._rate.buffer
+        ready = lambda: ring.end > self.cursor or not self.bus.running or not self.active
+        with self.bus._cond:
+            if not self.bus._cond.wait_for(ready, timeout):
+                return None
+            if ring.end <= self.cursor or not self.active:
+                return None
+            if self.cursor < ring.start:
+                # Fell more than a buffer behind: skip what was overwritten
+                self.overruns += 1
+                self.lost += ring.start - self.cursor
+                self.cursor = ring.start
+            end = min(ring.end, self.cursor + 4 * self.block_size)
+            block = ring.read(self.cursor, end)
+            self.cursor = end
+        self.delivered += len(block)
+        return block
+
+    def metrics(self):
+        ring = self._rate.buffer if self._rate else None
+        lag = (ring.end - self.cursor) if ring is not None and self.callback is None else 0
+        return {
+            "sample_rate": self.sample_rate,
+            "mode": "push" if self.callback else "pull",
+            "delivered_s": self.delivered / self.sample_rate,
+            "lag_ms": lag * 1000 / self.sample_rate,
+            "overruns": self.overruns,
+            "lost_ms": self.lost * 1000 / self.sample_rate,
+            "callback_ms": self.callback_s * 1000,
+        }
+
+
+class AudioBus:
+    """One capture stream fanned out to subscribers at their own rates"""
+
+    def __init__(self, stream, buffer_seconds=30.0):
+        """
+        Initialize the bus
+        Args:
+            stream: MicrophoneStream, WavStream or any object with open()/read()/close()
+                and sample_rate; read() returns int16 samples or None at the end
+            buffer_seconds (float): Audio kept per rate for pull subscribers
+        """
+        self.stream = stream
+        self.sample_rate = stream.sample_rate
+        self.buffer_seconds = buffer_seconds
+        self.rates = {}
+        self.running = False
+        self.blocks = 0
+        self.captured = 0
+        self.resample_s = 0.0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def subscribe(self, name, sample_rate=None, callback=None, block_size=512):
+        """
+        Create a subscription; call open() on it (or pass it to AudioCapture) to start receiving
+        Args:
+            name (str): Shown in metrics
+            sample_rate (int): Rate wanted (default: the device rate)
+            callback (callable): callback(block, end) on the capture thread; without one, read()
+            block_size (int): Nominal block size for pull reads
+        """
+        return Subscription(self, name, sample_rate or self.sample_rate, callback, block_size)
+
+    def attach(self, subscription):
+        """Start delivering audio to a subscription (from the current position on)"""
+        with self._cond:
+            rate = self.rates.get(subscription.sample_rate)
+            if rate is None:
+                rate = _Rate(self.sample_rate, subscription.sample_rate, self.buffer_seconds)
+                self.rates[subscription.sample_rate] = rate
+            if subscription not in rate.subscribers:
+                rate.subscribers.append(subscription)
+            subscription._rate = rate
+            subscription.cursor = rate.buffer.end  # audio from now on
+            subscription.active = True
+
+    def detach(self, subscription):
+        with self._cond:
+            subscription.active = False
+            rate = subscription._rate
+            if rate and subscription in rate.subscribers:
+                rate.subscribers.remove(subscription)
+            self._cond.notify_all()
+
+    def start(self):
+        """Open the stream and start the capture thread (idempotent)"""
+        if self._thread is not None:
+            return
+        self.stream.open()
+        self.running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="audio-bus", daemon=True)
+        self._thread.start()
+        logger.info(f"Audio bus capturing at {self.sample_rate} Hz")
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.stream.close()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _capture_loop(self):
+        try:
+            while self.running:
+                block = self.stream.read()
+                if block is None:
+                    break
+                self._publish(block)
+        except Exception as e:
+            logger.error(f"Audio bus capture error: {str(e)}")
+        finally:
+            with self._cond:
+                self.running = False
+                self._cond.notify_all()
+
+    def _publish(self, block):
+        self.blocks += 1
+        self.captured += len(block)
+        deliveries = []
+        with self._cond:
+            rates = list(self.rates.values())
+        for rate in rates:
+            if not rate.subscribers:
+                continue
+            if rate.resampler:
+                start = time.thread_time()
+                converted = rate.resampler.process(block)  # once per rate, shared by its subscribers
+                self.resample_s += time.thread_time() - start
+            else:
+                converted = block
+            with self._cond:
+                rate.buffer.write(converted)
+                end = rate.buffer.end
+                deliveries.extend((s, converted, end) for s in rate.subscribers if s.callback)
+        with self._cond:
+            self._cond.notify_all()
+        for subscription, converted, end in deliveries:
+            start = time.thread_time()
+            try:
+                subscription.callback(converted, end)
+            except Exception as e:
+                logger.error(f"Audio subscriber '{subscription.name}' error: {str(e)}")
+            subscription.callback_s += time.thread_time() - start
+            subscription.delivered += len(converted)
+
+    def metrics(self):
+        """Capture totals, resampling cost and per-subscriber lag/overruns"""
+        seconds = self.captured / self.sample_rate
+        with self._cond:
+            subscribers = {s.name: s.metrics() for rate in self.rates.values() for s in rate.subscribers}
+        return {
+            "sample_rate": self.sample_rate,
+            "captured_s": seconds,
+            "blocks": self.blocks,
+            "resamplers": sum(1 for rate in self.rates.values() if rate.resampler),
+            "resample_ms_per_s": self.resample_s * 1000 / seconds if seconds else 0.0,
+            "subscribers": subscribers,
+        }
+
+
+class WavRecorder:
+    """Records the bus to a 16-bit WAV file at any rate"""
+
+    def __init__(self, bus, path, sample_rate=None):
+        self.path = path
+        self.subscription = bus.subscribe(f"recorder:{path}", sample_rate, callback=self._write)
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(self.subscription.sample_rate)
+        self.subscription.open()
+
+    def _write(self, block, end):
+        self._wav.writeframes(block.tobytes())
+
+    def close(self):
+        self.subscription.close()
+        self._wav.close()
+
+
+_shared_bus = None
+_shared_lock = threading.Lock()
+
+
+def get_audio_bus():
+    """The process-wide microphone bus, at the device rate from AUDIO settings"""
+    global _shared_bus
+    with _shared_lock:
+        if _shared_bus is None:
+            from config.settings import AUDIO
+            from interfaces.voice.audio_stream import MicrophoneStream
+            _shared_bus = AudioBus(MicrophoneStream(AUDIO["sample_rate"], AUDIO["chunk_size"]))
+        return _shared_bus
+
+
+def close_audio_bus():
+    """Stop the shared bus, if one was started, and log its metrics"""
+    global _shared_bus
+    with _shared_lock:
+        bus, _shared_bus = _shared_bus, None
+    if bus is not None:
+        logger.info(f"Audio bus metrics: {bus.metrics()}")
+        bus.stop()
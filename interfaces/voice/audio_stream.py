@@ -0,0 +1,347 @@
+"""
+Continuous audio capture for Jarvis speech input.
+One long-lived input stream feeds a ring buffer on a background thread,
+tracking the noise floor as it goes; utterances are cut out of the buffer
+with pre-roll, so nothing spoken between listen() calls is lost and the
+start of speech is never clipped.
+"""
+import bisect
+import collections
+import threading
+import time
+import wave
+import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AudioRingBuffer:
+    """Fixed-size int16 ring buffer addressed by absolute sample index"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self.end = 0  # absolute index one past the newest sample
+
+    @property
+    def start(self):
+        """Oldest sample still held"""
+        return max(0, self.end - self.capacity)
+
+    def write(self, samples):
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        pos = self.end % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self.end += n
+
+    def read(self, start, end):
+        """Copy samples [start, end) (clamped to what is still buffered)"""
+        start = max(start, self.start)
+        end = min(end, self.end)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        a, b = start % self.capacity, end % self.capacity
+        if a < b:
+            return self._data[a:b].copy()
+        return np.concatenate([self._data[a:], self._data[:b]])
+
+
+class MicrophoneStream:
+    """Blocking 16-bit mono microphone reader (PyAudio)"""
+
+    def __init__(self, sample_rate=16000, block_size=512, device_index=None):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.device_index = device_index
+        self._audio = None
+        self._stream = None
+
+    def open(self):
+        import pyaudio
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+            frames_per_buffer=self.block_size, input_device_index=self.device_index
+        )
+
+    def read(self):
+        """Return the next block of int16 samples"""
+        data = self._stream.read(self.block_size, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=np.int16)
+
+    def close(self):
+        if self._stream:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio:
+            self._audio.terminate()
+            self._audio = None
+
+
+class WavStream:
+    """Plays a 16-bit WAV file as if it were a microphone (tests, replays)"""
+
+    def __init__(self, path, block_size=512, realtime=False):
+        """
+        Args:
+            path (str): 16-bit PCM WAV file (stereo is mixed down)
+            block_size (int): Samples per block
+            realtime (bool): Pace blocks at the file's sample rate
+        """
+        self.path = path
+        self.block_size = block_size
+        self.realtime = realtime
+        with wave.open(path, "rb") as f:
+            if f.getsampwidth() != 2:
+                raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+            self.sample_rate = f.getframerate()
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+            channels = f.getnchannels()
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        self._samples = samples
+        self._pos = 0
+
+    def open(self):
+        self._pos = 0
+
+    def read(self):
+        """Return the next block, or None at the end of the file"""
+        if self._pos >= len(self._samples):
+            return None
+        if self.realtime:
+            time.sleep(self.block_size / self.sample_rate)
+        block = self._samples[self._pos:self._pos + self.block_size]
+        self._pos += self.block_size
+        return block
+
+    def close(self):
+        pass
+
+
+class AudioCapture:
+    """Background capture into a ring buffer with noise-floor tracking and utterance slicing"""
+
+    def __init__(self, stream, buffer_seconds=30.0, pre_roll=0.3, energy_ratio=3.0, min_energy=150.0,
+                 pause_threshold=0.8, min_phrase=0.15, endpointer=None, noise_window=5.0):
+        """
+        Initialize audio capture
+        Args:
+            stream: MicrophoneStream, WavStream or any object with open()/read()/close(),
+                sample_rate and block_size; read() returns int16 samples or None at the end
+            buffer_seconds (float): Audio history kept in the ring buffer
+            pre_roll (float): Seconds kept before the detected start of speech
+            energy_ratio (float): Speech is louder than the noise floor by this factor
+            min_energy (float): RMS below which a block never counts as speech
+            pause_threshold (float): Seconds of silence that end an utterance
+            min_phrase (float): Utterances shorter than this are ignored (clicks, bumps)
+            endpointer: Endpointer deciding the pause length per utterance instead of
+                the fixed pause_threshold
+            noise_window (float): Seconds over which the quietest block is tracked; if even
+                that is above the noise floor (the room got louder), the floor rises to it
+        """
+        self.stream = stream
+        self.sample_rate = stream.sample_rate
+        self.buffer = AudioRingBuffer(int(buffer_seconds * self.sample_rate))
+        self.pre_roll = int(pre_roll * self.sample_rate)
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.pause_threshold = pause_threshold
+        self.min_phrase = min_phrase
+        self.endpointer = endpointer
+
+        self.noise_floor = None
+        window_blocks = max(1, int(noise_window * self.sample_rate / stream.block_size))
+        self._recent_rms = collections.deque(maxlen=window_blocks)
+        self.trailing_silence = 0  # samples of pause at the end of the last utterance
+        self.finished = False
+        self._blocks = []  # (start, end, is_speech) for blocks not yet consumed
+        self._cursor = 0  # first sample not yet handed out by listen()
+        self._cond = threading.Condition()
+        self._listeners = []
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Open the stream and start the capture thread (idempotent)"""
+        if self._thread is not None:
+            return
+        self.stream.open()
+        self._running = True
+        self.finished = False
+        self._thread = threading.Thread(target=self._capture_loop, name="audio-capture", daemon=True)
+        self._thread.start()
+        logger.info(f"Audio capture started at {self.sample_rate} Hz")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.stream.close()
+
+    def _capture_loop(self):
+        try:
+            while self._running:
+                block = self.stream.read()
+                if block is None:
+                    break
+                self._push(block)
+        except Exception as e:
+            logger.error(f"Audio capture error: {str(e)}")
+        finally:
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+    @property
+    def cursor(self):
+        """First sample not yet handed out by listen()"""
+        return self._cursor
+
+    def add_listener(self, listener):
+        """Call listener(block, end) on the capture thread for every block (wake word, metering)"""
+        self._listeners.append(listener)
+
+    def skip_to(self, position):
+        """Make the next listen() start at this absolute sample index (e.g. after the wake word)"""
+        with self._cond:
+            self._cursor = max(self._cursor, min(position, self.buffer.end))
+            self._drop_blocks_before(self._cursor)
+
+    def _push(self, block):
+        rms = float(np.sqrt(np.mean(block.astype(np.float32) ** 2))) if len(block) else 0.0
+        is_speech = rms > self.threshold()
+        self._update_noise_floor(rms, is_speech)
+        with self._cond:
+            start = self.buffer.end
+            self.buffer.write(block)
+            self._blocks.append((start, self.buffer.end, is_speech))
+            # Forget block flags that have fallen out of the ring buffer
+            while self._blocks and self._blocks[0][1] <= self.buffer.start:
+                self._blocks.pop(0)
+            end = self.buffer.end
+            self._cond.notify_all()
+        for listener in self._listeners:
+            try:
+                listener(block, end)
+            except Exception as e:
+                logger.error(f"Audio listener error: {str(e)}")
+
+    def _update_noise_floor(self, rms, is_speech):
+        """Track the floor on every block, so a lasting rise in noise is followed too"""
+        self._recent_rms.append(rms)
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        elif rms < self.noise_floor:
+            self.noise_floor = 0.8 * self.noise_floor + 0.2 * rms  # follow quiet rooms quickly
+        elif not is_speech:
+            self.noise_floor = 0.98 * self.noise_floor + 0.02 * rms  # and louder ones slowly
+        if len(self._recent_rms) == self._recent_rms.maxlen:
+            # Speech has pauses, so the window minimum only rises when the noise itself did
+            self.noise_floor = max(self.noise_floor, min(self._recent_rms))
+
+    def threshold(self):
+        """Current speech energy threshold"""
+        if self.noise_floor is None:
+            return self.min_energy
+        return max(self.min_energy, self.noise_floor * self.energy_ratio)
+
+    def listen(self, timeout=5.0, phrase_time_limit=None, on_audio=None):
+        """
+        Return the next utterance from the buffer
+        Args:
+            timeout (float): Seconds of audio to wait for speech to start
+            phrase_time_limit (float): Maximum utterance length in seconds (default: the
+                endpointer's max_utterance, or 10 s)
+            on_audio (callable): on_audio(samples) with each new piece of the utterance
+                while it is still being spoken (streaming STT); on_audio(None) when a
+                false start is discarded. Called with the buffer locked, so keep it cheap.
+        Returns:
+            np.ndarray: int16 samples including pre-roll, or None if nobody spoke
+        """
+        self.start()
+        rate = self.sample_rate
+        endpointer = self.endpointer
+        if phrase_time_limit is None:
+            phrase_time_limit = endpointer.max_utterance if endpointer else 10.0
+        pause = self.pause_threshold
+        onset = None
+        silence = 0
+        waited = 0
+        fed = None  # end of the audio already passed to on_audio
+
+        with self._cond:
+            # Speech that began before this call is still in the buffer
+            self._cursor = max(self._cursor, self.buffer.start)
+            position = self._cursor
+            while True:
+                index = bisect.bisect_left(self._blocks, (position,))
+                if index >= len(self._blocks):
+                    if self.finished:
+                        if onset is not None and self.buffer.end - onset >= self.min_phrase * rate:
+                            return self._endpoint(onset, self.buffer.end, silence, "end", pause)
+                        self._cursor = self.buffer.end
+                        return None
+                    self._cond.wait(0.5)
+                    continue
+
+                start, end, is_speech = self._blocks[index]
+                position = end
+
+                if onset is None:
+                    if is_speech:
+                        onset = start
+                        silence = 0
+                        if endpointer:
+                            endpointer.reset()
+                            endpointer.update(True, (end - start) / rate)
+                        if on_audio:
+                            fed = max(onset - self.pre_roll, self._cursor, self.buffer.start)
+                            on_audio(self.buffer.read(fed, end))
+                            fed = end
+                    else:
+                        waited += end - start
+                        if waited >= timeout * rate:
+                            self._cursor = end
+                            self._drop_blocks_before(end)
+                            return None
+                    continue
+
+                if on_audio:
+                    on_audio(self.buffer.read(fed, end))
+                    fed = end
+                silence = 0 if is_speech else silence + (end - start)
+                length = end - onset
+                if endpointer:
+                    endpointer.update(is_speech, (end - start) / rate)
+                    pause = endpointer.hangover()
+                if silence >= pause * rate or length >= phrase_time_limit * rate:
+                    if length - silence < self.min_phrase * rate:
+                        # Too short to be speech; keep looking
+                        onset = None
+                        if on_audio:
+                            on_audio(None)
+                        continue
+                    return self._endpoint(onset, end, silence, "pause" if silence >= pause * rate else "limit", pause)
+
+    def _endpoint(self, onset, end, silence, reason, pause):
+        self.trailing_silence = silence
+        if self.endpointer:
+            self.endpointer.finish(reason, silence / self.sample_rate, pause)
+        return self._take(onset, end)
+
+    def _take(self, onset, end):
+        audio = self.buffer.read(max(onset - self.pre_roll, self._cursor, self.buffer.start), end)
+        self._cursor = end
+        self._drop_blocks_before(end)
+        return audio
+
+    def _drop_blocks_before(self, position):
+        while self._blocks and self._blocks[0][1] <= position:
+            self._blocks.pop(0)
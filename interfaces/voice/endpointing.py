@@ -0,0 +1,141 @@
+"""
+Adaptive end-of-utterance detection for Jarvis speech input.
+Instead of a fixed pause length, the silence hang-over follows how long this
+speaker pauses between words, and shrinks when the partial transcript already
+reads as a complete command ("next track") or stretches when it obviously
+isn't ("play something by the").
+"""
+import re
+from collections import deque
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Utterances ending in these words are still going
+INCOMPLETE_ENDINGS = {
+    "a", "an", "the", "and", "or", "but", "to", "of", "for", "with", "by", "in", "on", "at",
+    "my", "your", "is", "are", "what", "how", "um", "uh", "er", "play", "open", "set", "search",
+}
+_WORD = re.compile(r"[a-z']+")
+
+
+class Endpointer:
+    """Decides when a pause ends the utterance, learning the speaker's pause length"""
+
+    def __init__(self, min_hangover=0.25, max_hangover=1.2, initial_hangover=0.6, gap_factor=2.0,
+                 min_gap=0.08, max_utterance=25.0, complete_check=None, history=200):
+        """
+        Initialize the endpointer
+        Args:
+            min_hangover (float): Shortest pause (s) that may end an utterance
+            max_hangover (float): Longest pause (s) ever waited for
+            initial_hangover (float): Hang-over before any pauses have been observed
+            gap_factor (float): Hang-over is this many times the typical pause between words
+            min_gap (float): Dips shorter than this (s) aren't pauses
+            max_utterance (float): Hard cut for a single utterance (s)
+            complete_check (callable): complete_check(text) -> bool, e.g. "does a command match"
+            history (int): Utterances kept for endpoint statistics
+        """
+        self.min_hangover = min_hangover
+        self.max_hangover = max_hangover
+        self.gap_factor = gap_factor
+        self.min_gap = min_gap
+        self.max_utterance = max_utterance
+        self.complete_check = complete_check
+
+        self.pause_estimate = initial_hangover / gap_factor  # typical pause between words (s)
+        self.partial_text = ""
+        self.history = deque(maxlen=history)
+        self.reset()
+
+    def reset(self):
+        """Start a new utterance"""
+        self.speech = 0.0
+        self._gap = 0.0
+        self.partial_text = ""
+
+    def update(self, is_speech, seconds):
+        """Account for one VAD frame of the current utterance"""
+        if is_speech:
+            if self._gap >= self.min_gap:
+                # The speaker resumed, so that was a pause between words
+                self.pause_estimate = 0.8 * self.pause_estimate + 0.2 * self._gap
+            self._gap = 0.0
+            self.speech += seconds
+        else:
+            self._gap += seconds
+
+    def set_partial(self, text):
+        """Latest partial transcript of the current utterance (from the STT thread)"""
+        self.partial_text = text or ""
+
+    def looks_complete(self, text=None):
+        """
+        Judge the transcript so far
+        Returns:
+            bool: True if complete, False if clearly unfinished, None if unknown
+        """
+        words = _WORD.findall((self.partial_text if text is None else text).lower())
+        if not words:
+            return None
+        if words[-1] in INCOMPLETE_ENDINGS:
+            return False
+        if self.complete_check:
+            try:
+                if self.complete_check(" ".join(words)):
+                    return True
+            except Exception as e:
+                logger.error(f"Error checking transcript completeness: {str(e)}")
+        return None
+
+    def hangover(self):
+        """Seconds of silence that end the current utterance"""
+        seconds = min(self.max_hangover, max(self.min_hangover, self.gap_factor * self.pause_estimate))
+        complete = self.looks_complete()
+        if complete is True:
+            return self.min_hangover
+        if complete is False:
+            return self.max_hangover
+        return seconds
+
+    def finish(self, reason, silence, hangover):
+        """
+        Record an endpoint
+        Args:
+            reason (str): "pause", "limit" or "end" (input ran out)
+            silence (float): Trailing silence (s) when the endpoint fired
+            hangover (float): Hang-over (s) in force at that moment
+        """
+        record = {
+            "reason": reason,
+            "speech_s": self.speech,
+            "endpoint_ms": silence * 1000,
+            "hangover_s": hangover,
+            "complete": self.looks_complete(),
+        }
+        self.history.append(record)
+        logger.debug(
+            f"Endpoint ({reason}) after {record['endpoint_ms']:.0f} ms of silence, "
+            f"{self.speech:.1f} s of speech, hang-over {hangover:.2f} s"
+        )
+        return record
+
+    def stats(self):
+        """Endpoint latency percentiles over the recent utterances"""
+        latencies = sorted(r["endpoint_ms"] for r in self.history)
+        if not latencies:
+            return {"utterances": 0}
+        reasons = {}
+        for r in self.history:
+            reasons[r["reason"]] = reasons.get(r["reason"], 0) + 1
+        return {
+            "utterances": len(latencies),
+            "endpoint_ms": {
+                "p50": latencies[len(latencies) // 2],
+                "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                "max": latencies[-1],
+            },
+            "mean_hangover_s": sum(r["hangover_s"] for r in self.history) / len(self.history),
+            "reasons": reasons,
+            "pause_estimate_s": self.pause_estimate,
+        }
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Offline keyword spotter for the Jarvis wake word, in NumPy only.
+Audio is turned into MFCCs incrementally (10 ms hops); a sliding window the
+length of the enrolled samples is time-normalized to a fixed-size embedding
+and compared with the enrolled templates by cosine similarity. Enrollment
+needs a handful of recordings of the wake word and nothing else.
+
+Usage:
+    python -m interfaces.voice.keyword_spotter enroll jarvis1.wav jarvis2.wav ... [--negatives other.wav ...] [--out FILE]
+"""
+import os
+import argparse
+import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+WINDOW = 400  # 25 ms
+HOP = 160  # 10 ms
+NFFT = 512
+
+_filterbanks = {}
+
+
+def mel_filterbank(n_mels=40, nfft=NFFT, sample_rate=SAMPLE_RATE, fmin=20.0, fmax=7600.0):
+    """Triangular mel filters, shape (n_mels, nfft // 2 + 1)"""
+    key = (n_mels, nfft, sample_rate, fmin, fmax)
+    if key not in _filterbanks:
+        mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+        hz = lambda m: 700.0 * (10 ** (m / 2595.0) - 1.0)
+        edges = hz(np.linspace(mel(fmin), mel(fmax), n_mels + 2))
+        bins = np.fft.rfftfreq(nfft, 1.0 / sample_rate)
+        lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+        rising = (bins - lower) / (center - lower)
+        falling = (upper - bins) / (upper - center)
+        _filterbanks[key] = np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+    return _filterbanks[key]
+
+
+def dct_matrix(n_mfcc, n_mels):
+    """Orthonormal DCT-II, shape (n_mfcc, n_mels)"""
+    k = np.arange(n_mfcc)[:, None]
+    n = np.arange(n_mels)[None, :]
+    matrix = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+class KeywordSpotter:
+    """Template-matching wake word engine with the Porcupine process() interface"""
+
+    frame_length = 512
+    sample_rate = SAMPLE_RATE
+
+    def __init__(self, templates=None, lengths=None, threshold=0.75, sensitivity=0.5, n_mels=40, n_mfcc=13,
+                 points=24, refractory=1.0):
+        """
+        Initialize the spotter
+        Args:
+            templates (np.ndarray): Enrolled embeddings, one row per sample
+            lengths (list): Feature frames per enrolled sample
+            threshold (float): Cosine similarity needed for a detection
+            sensitivity (float): 0-1; above 0.5 lowers the threshold, below raises it
+            n_mels (int): Mel bands
+            n_mfcc (int): Cepstral coefficients (c0 is dropped from the embedding)
+            points (int): Time steps every window is resampled to
+            refractory (float): Seconds after a detection in which no other fires
+        """
+        self.n_mels = n_mels
+        self.n_mfcc = n_mfcc
+        self.points = points
+        self.refractory = int(refractory * SAMPLE_RATE / HOP)
+        self.base_threshold = threshold
+        self.sensitivity = sensitivity
+        self.filters = mel_filterbank(n_mels)
+        self.dct = dct_matrix(n_mfcc, n_mels)
+        self.window = np.hanning(WINDOW).astype(np.float32)
+        self.templates = templates
+        self.lengths = list(lengths or [])
+        self.reset()
+
+    @property
+    def threshold(self):
+        return self.base_threshold * (1.0 + 0.2 * (0.5 - self.sensitivity))
+
+    def reset(self):
+        """Clear streaming state"""
+        self._tail = np.zeros(0, dtype=np.float32)
+        history = max(self.lengths or [100]) * 2
+        self._features = np.zeros((history, self.n_mfcc), dtype=np.float32)
+        self._energy = np.full(history, -np.inf, dtype=np.float32)
+        self._filled = 0
+        self._noise = None
+        self._peak = 0.0
+        self._quiet = self.refractory
+
+    def features(self, samples):
+        """
+        MFCCs and log energy for int16 or float audio
+        Returns:
+            tuple: (frames x n_mfcc MFCCs, per-frame log energy)
+        """
+        audio = np.asarray(samples, dtype=np.float32)
+        if len(audio) < WINDOW:
+            return np.zeros((0, self.n_mfcc), np.float32), np.zeros(0, np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(audio, WINDOW)[::HOP] * self.window
+        power = np.abs(np.fft.rfft(frames, NFFT)) ** 2
+        log_mel = np.log(power @ self.filters.T + 1e-3)
+        return log_mel @ self.dct.T, np.log(power.sum(axis=1) + 1e-3)
+
+    def embed(self, mfcc):
+        """Time-normalize a stretch of MFCCs to a unit vector (c0 dropped, mean removed)"""
+        coeffs = mfcc[:, 1:]
+        position = np.linspace(0, len(coeffs) - 1, self.points)
+        low = np.floor(position).astype(int)
+        high = np.minimum(low + 1, len(coeffs) - 1)
+        weight = (position - low)[:, None]
+        resampled = coeffs[low] * (1 - weight) + coeffs[high] * weight
+        vector = (resampled - resampled.mean(axis=0)).ravel()
+        return vector / (np.linalg.norm(vector) + 1e-9)
+
+    def _trim(self, samples):
+        """MFCCs of the spoken part of an enrollment recording"""
+        mfcc, energy = self.features(samples)
+        speech = np.flatnonzero(energy > energy.max() - 4.0)  # within ~17 dB of the peak
+        return mfcc[speech[0]:speech[-1] + 1]
+
+    def score(self, mfcc):
+        """Best similarity of a stretch of MFCCs to the templates"""
+        return float(np.max(self.templates @ self.embed(mfcc)))
+
+    def enroll(self, samples, negatives=()):
+        """
+        Build templates from recordings of the wake word
+        Args:
+            samples (list): int16 arrays, one utterance of the wake word each
+            negatives (list): Optional int16 arrays of other speech, used to set the threshold
+        """
+        segments = [self._trim(s) for s in samples]
+        self.templates = np.stack([self.embed(m) for m in segments])
+        self.lengths = sorted({len(m) for m in segments})
+
+        # Leave-one-out: how well each sample matches the others
+        similarity = self.templates @ self.templates.T
+        np.fill_diagonal(similarity, -1.0)
+        positive = float(similarity.max(axis=1).min()) if len(segments) > 1 else 0.9
+        threshold = 0.9 * positive
+        negative_scores = [self.best_score(n) for n in negatives]
+        if negative_scores:
+            threshold = max(threshold, (max(negative_scores) + positive) / 2)
+        self.base_threshold = threshold
+        self.reset()
+        logger.info(
+            f"Enrolled {len(segments)} wake word samples: leave-one-out similarity {positive:.2f}, "
+            f"threshold {threshold:.2f}"
+        )
+        return self
+
+    def _window_lengths(self):
+        typical = int(np.median(self.lengths))
+        return sorted({max(4, int(typical * f)) for f in (0.85, 1.0, 1.15)})
+
+    def best_score(self, samples):
+        """Highest similarity anywhere in a recording (offline calibration)"""
+        mfcc, _ = self.features(samples)
+        best = -1.0
+        for length in self._window_lengths():
+            for end in range(length, len(mfcc) + 1, 3):
+                best = max(best, self.score(mfcc[end - length:end]))
+        return best
+
+    def process(self, frame):
+        """
+        Feed one frame of int16 audio
+        Returns:
+            int: 0 when the wake word was just heard, else -1
+        """
+        audio = np.concatenate([self._tail, np.asarray(frame, dtype=np.float32)])
+        mfcc, energy = self.features(audio)
+        used = len(mfcc) * HOP
+        self._tail = audio[used:]
+        if not len(mfcc):
+            return -1
+
+        # Slide the feature history
+        n = len(mfcc)
+        self._features = np.roll(self._features, -n, axis=0)
+        self._features[-n:] = mfcc
+        self._energy = np.roll(self._energy, -n)
+        self._energy[-n:] = energy
+        self._filled += n
+        self._quiet += n
+        quietest = float(energy.min())
+        self._noise = quietest if self._noise is None else min(quietest, 0.99 * self._noise + 0.01 * quietest)
+
+        best = 0.0
+        # Only score windows that contain something louder than the background
+        if self.templates is not None and self._energy[-max(self.lengths):].max() > self._noise + 1.5:
+            for length in self._window_lengths():
+                if length <= self._filled:
+                    best = max(best, self.score(self._features[-length:]))
+
+        # Fire on the peak, once the score starts to fall
+        if best >= self.threshold and best >= self._peak:
+            self._peak = best
+            return -1
+        fired = self._peak > 0 and self._quiet >= self.refractory
+        self._peak = 0.0
+        if fired:
+            self._quiet = 0
+            return 0
+        return -1
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, templates=self.templates, lengths=np.array(self.lengths), threshold=self.base_threshold,
+                 n_mels=self.n_mels, n_mfcc=self.n_mfcc, points=self.points)
+        os.replace(tmp_path, path)
+        logger.info(f"Wake word templates saved to {path}")
+
+    @classmethod
+    def load(cls, path, sensitivity=0.5):
+        data = np.load(path)
+        return cls(data["templates"], [int(n) for n in data["lengths"]], float(data["threshold"]), sensitivity,
+                   int(data["n_mels"]), int(data["n_mfcc"]), int(data["points"]))
+
+
+def read_wav(path):
+    from interfaces.voice.audio_stream import WavStream
+    stream = WavStream(path)
+    if stream.sample_rate != SAMPLE_RATE:
+        raise ValueError(f"{path}: wake word recordings must be {SAMPLE_RATE} Hz")
+    return stream._samples
+
+
+def main():
+    from config.settings import WAKE_WORD
+
+    parser = argparse.ArgumentParser(description="Enroll the offline Jarvis wake word")
+    parser.add_argument("command", choices=["enroll"])
+    parser.add_argument("samples", nargs="+", help="16 kHz WAVs, one wake word each")
+    parser.add_argument("--negatives", nargs="*", default=[], help="16 kHz WAVs of other speech")
+    parser.add_argument("--out", default=WAKE_WORD["model_path"])
+    args = parser.parse_args()
+
+    spotter = KeywordSpotter().enroll([read_wav(p) for p in args.samples], [read_wav(p) for p in args.negatives])
+    spotter.save(args.out)
+    print(f"Enrolled {len(args.samples)} samples, threshold {spotter.threshold:.2f}, saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,127 @@
 import speech_recognition as sr
+import numpy as np
+from interfaces.voice.audio_bus import get_audio_bus
+from interfaces.voice.audio_stream import AudioCapture
+from interfaces.voice.endpointing import Endpointer
+from interfaces.voice.streaming_stt import StreamedUtterance, get_transcriber
 from utils.logger import get_logger
 import time
 
 logger = get_logger(__name__)
 
 class SpeechToText:
-    def __init__(self):
-        logger.info("Initializing Speech-to-Text using SpeechRecognition...")
+    def __init__(self, stream=None, sample_rate=16000, config=None, transcriber=None):
+        """
+        Initialize speech-to-text
+        Args:
+            stream: Audio source for the capture thread (by default a subscription to the
+                shared microphone bus; a WavStream stands in for it in tests and replays)
+            sample_rate (int): Rate the bus delivers STT audio at when no stream is given
+            config (dict): STT settings (engine, whisper model, partial interval, endpointing)
+            transcriber: Object with stream()/transcribe() to use instead of loading Whisper
+        """
+        if config is None:
+            from config.settings import STT
+            config = STT
+        self.config = config
         self.recognizer = sr.Recognizer()
+        self.transcriber = transcriber
+        if self.transcriber is None and config.get("engine") == "whisper":
+            try:
+                self.transcriber = get_transcriber(config.get("whisper_model", "base.en"),
+                                                   config.get("device"), config.get("language", "en"))
+            except Exception as e:
+                logger.error(f"Error loading Whisper, falling back to Google recognition: {str(e)}")
+        engine = "offline Whisper" if self.transcriber else "Google Speech Recognition"
+        logger.info(f"Initializing Speech-to-Text using {engine}...")
+        self.on_partial = None  # on_partial(text, stable) while the user is speaking
+        self.last_metrics = {}
+        # Pause length adapts to the speaker and to how complete the partial transcript looks
+        self.endpointer = Endpointer(**config.get("endpointing", {}))
+        # One long-lived stream; utterances are sliced out of its ring buffer
+        self.audio = AudioCapture(stream or get_audio_bus().subscribe("stt", sample_rate), endpointer=self.endpointer)
         logger.info("Speech-to-Text ready")
 
     def listen(self):
         """Listen for speech and return the transcribed text"""
+        audio = self.capture()
+        if audio is None:
+            return ""
+        return self.transcribe(audio)
+
+    def capture(self, timeout=5, phrase_time_limit=None):
+        """
+        Return the next phrase from the capture buffer, or None on timeout
+        With Whisper the phrase is decoded while it is spoken and a StreamedUtterance
+        comes back; otherwise it is AudioData for the Google recognizer.
+        """
         logger.info("Listening for speech...")
+        session = None
+        if self.transcriber:
+            session = self.transcriber.stream(self.audio.sample_rate, self.config.get("partial_interval", 0.5),
+                                              self._partial)
 
         try:
-            with sr.Microphone() as source:
-                logger.info("Adjusting for ambient noise...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                logger.info("Listening for phrase...")
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
+            samples = self.audio.listen(timeout=timeout, phrase_time_limit=phrase_time_limit,
+                                        on_audio=session.feed if session else None)
+        except Exception as e:
+            logger.error("Error during speech recognition: %s", str(e))
+            samples = None
+        if samples is None:
+            if session:
+                session.finish()  # stops its decode thread
+            logger.debug("No speech detected within timeout period")
+            return None
+        if session:
+            return StreamedUtterance(samples, self.audio.sample_rate, session, self.audio.trailing_silence)
+        return sr.AudioData(samples.tobytes(), self.audio.sample_rate, 2)
 
+    def _partial(self, text, stable):
+        logger.debug("Partial transcription: %s", text)
+        self.endpointer.set_partial(text)
+        if self.on_partial:
+            self.on_partial(text, stable)
+
+    def transcribe(self, audio):
+        """
+        Transcribe captured audio
+        Args:
+            audio: StreamedUtterance or sr.AudioData from capture(), or a dict with pcm,
+                sample_rate and sample_width (mono) as read from a WAV file
+        """
+        if isinstance(audio, StreamedUtterance):
             try:
-                text = self.recognizer.recognize_google(audio)
-                logger.info("Transcription result: %s", text)
-                return text
-            except sr.UnknownValueError:
-                logger.debug("Speech was unintelligible")
+                text = audio.result()
+            except Exception as e:
+                logger.error("Error during speech recognition: %s", str(e))
                 return ""
-            except sr.RequestError as e:
-                logger.error("Could not request results from Google Speech Recognition service; %s", e)
+            self.last_metrics = audio.session.metrics
+            logger.info("Transcription result: %s", text)
+            return text
+        if self.transcriber and isinstance(audio, dict) and audio["sample_width"] == 2:
+            samples = np.frombuffer(audio["pcm"], dtype=np.int16)
+            channels = audio.get("channels", 1)
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+            try:
+                text = self.transcriber.transcribe(samples, audio["sample_rate"])
+            except Exception as e:
+                logger.error("Error during speech recognition: %s", str(e))
                 return ""
+            logger.info("Transcription result: %s", text)
+            return text
+        if isinstance(audio, dict):
+            audio = sr.AudioData(audio["pcm"], audio["sample_rate"], audio["sample_width"])
 
-        except sr.WaitTimeoutError:
-            logger.debug("No speech detected within timeout period")
+        try:
+            text = self.recognizer.recognize_google(audio)
+            logger.info("Transcription result: %s", text)
+            return text
+        except sr.UnknownValueError:
+            logger.debug("Speech was unintelligible")
+            return ""
+        except sr.RequestError as e:
+            logger.error("Could not request results from Google Speech Recognition service; %s", e)
             return ""
         except Exception as e:
             logger.error("Error during speech recognition: %s", str(e))
@@ -41,4 +129,4 @@ class SpeechToText:
 
     def cleanup(self):
         logger.info("Cleaning up Speech-to-Text resources...")
-        # Nothing to clean up since we don't persist the microphone
+        self.audio.stop()
@@ -0,0 +1,224 @@
+"""
+Offline streaming speech-to-text for Jarvis.
+Whisper is loaded once and re-decodes the growing utterance on a worker
+thread while the user is still speaking, emitting partial hypotheses; by the
+time the speaker stops, most of the audio has already been decoded, so the
+final text follows end of speech quickly and without a network round trip.
+"""
+import threading
+import time
+import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WHISPER_RATE = 16000
+
+_transcribers = {}
+_transcribers_lock = threading.Lock()
+
+
+def get_transcriber(model_name="base.en", device=None, language="en"):
+    """Return the process-wide transcriber for a model, loading it on first use"""
+    key = (model_name, device, language)
+    with _transcribers_lock:
+        if key not in _transcribers:
+            _transcribers[key] = WhisperTranscriber(model_name, device, language)
+        return _transcribers[key]
+
+
+def to_float32(samples, sample_rate):
+    """int16 samples at any rate -> float32 mono at 16 kHz"""
+    audio = samples.astype(np.float32) / 32768.0
+    if sample_rate != WHISPER_RATE and len(audio):
+        duration = len(audio) / sample_rate
+        target = np.linspace(0, duration, int(duration * WHISPER_RATE), endpoint=False)
+        audio = np.interp(target, np.arange(len(audio)) / sample_rate, audio).astype(np.float32)
+    return audio
+
+
+def common_prefix(a, b):
+    """Words two consecutive hypotheses agree on"""
+    words = []
+    for x, y in zip(a.split(), b.split()):
+        if x != y:
+            break
+        words.append(x)
+    return " ".join(words)
+
+
+class WhisperTranscriber:
+    """Keeps one Whisper model loaded and decodes utterances of up to 30 s"""
+
+    def __init__(self, model_name="base.en", device=None, language="en"):
+        """
+        Initialize the transcriber
+        Args:
+            model_name (str): Whisper model size ("tiny.en", "base.en", "small.en", ...)
+            device (str): "cuda" or "cpu" (default: cuda when available)
+            language (str): Spoken language, skips language detection
+        """
+        import whisper
+        self._whisper = whisper
+        logger.info(f"Loading Whisper model '{model_name}'...")
+        start = time.perf_counter()
+        self.model = whisper.load_model(model_name, device=device)
+        self.options = whisper.DecodingOptions(
+            language=language, without_timestamps=True, fp16=self.model.device.type == "cuda"
+        )
+        self._lock = threading.Lock()  # one decode at a time on the shared model
+        logger.info(f"Whisper model loaded in {time.perf_counter() - start:.1f} s")
+
+    def decode(self, audio):
+        """Decode float32 16 kHz audio to text"""
+        whisper = self._whisper
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio)).to(self.model.device)
+        with self._lock:
+            result = whisper.decode(self.model, mel, self.options)
+        return result.text.strip()
+
+    def transcribe(self, samples, sample_rate=WHISPER_RATE):
+        return self.decode(to_float32(samples, sample_rate))
+
+    def stream(self, sample_rate=WHISPER_RATE, partial_interval=0.5, on_partial=None):
+        """Start an incremental session for one utterance"""
+        return StreamingSession(self.decode, sample_rate, partial_interval, on_partial)
+
+
+class StreamedUtterance:
+    """Captured utterance whose transcript is already being decoded"""
+
+    def __init__(self, samples, sample_rate, session, trailing_silence=0):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.session = session
+        self.speech_end = len(samples) - trailing_silence
+
+    def result(self):
+        """Block until the final transcript is ready"""
+        return self.session.finish(self.speech_end)
+
+
+class StreamingSession:
+    """Incremental decoding of one utterance as its audio arrives"""
+
+    def __init__(self, decode, sample_rate=WHISPER_RATE, partial_interval=0.5, on_partial=None):
+        """
+        Initialize the session
+        Args:
+            decode (callable): decode(float32 16 kHz audio) -> text
+            sample_rate (int): Rate of the int16 samples passed to feed()
+            partial_interval (float): Seconds of new audio between partial decodes
+            on_partial (callable): on_partial(text, stable) for each partial hypothesis;
+                stable is the prefix two consecutive partials agreed on
+        """
+        self.decode = decode
+        self.sample_rate = sample_rate
+        self.partial_interval = partial_interval
+        self.on_partial = on_partial
+
+        self._chunks = []
+        self._samples = 0
+        self._decoded_samples = 0
+        self._last_text = ""
+        self.stable = ""
+        self.partials = []
+        self._partial_decode_s = 0.0
+        self._generation = 0  # bumped by a reset so stale partials are dropped
+        self._cond = threading.Condition()
+        self._finishing = False
+        self._busy = False
+        self.metrics = {}
+        self._worker = threading.Thread(target=self._partial_loop, name="stt-partials", daemon=True)
+        self._worker.start()
+
+    def feed(self, samples):
+        """Add int16 audio; None discards everything (a false start)"""
+        with self._cond:
+            if samples is None:
+                self._generation += 1
+                self._chunks = []
+                self._samples = 0
+                self._decoded_samples = 0
+                self._last_text = ""
+                self.stable = ""
+            elif len(samples):
+                self._chunks.append(samples)
+                self._samples += len(samples)
+            self._cond.notify()
+
+    def _audio(self):
+        return to_float32(np.concatenate(self._chunks) if self._chunks else np.zeros(0, np.int16), self.sample_rate)
+
+    def _partial_loop(self):
+        interval = int(self.partial_interval * self.sample_rate)
+        while True:
+            with self._cond:
+                while not self._finishing and self._samples - self._decoded_samples < interval:
+                    self._cond.wait()
+                if self._finishing:
+                    return
+                covered = self._samples
+                generation = self._generation
+                audio = self._audio()
+                self._busy = True
+            start = time.perf_counter()
+            try:
+                text = self.decode(audio)
+            except Exception as e:
+                logger.error(f"Partial decode error: {str(e)}")
+                text = None
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self._busy = False
+                self._partial_decode_s += elapsed
+                if text is not None and generation == self._generation:
+                    self.stable = common_prefix(self._last_text, text) if self._last_text else ""
+                    self._last_text = text
+                    self._decoded_samples = covered
+                    self.partials.append(text)
+                else:
+                    text = None
+                self._cond.notify_all()
+            if text is not None and self.on_partial:
+                self.on_partial(text, self.stable)
+
+    def finish(self, speech_end=None):
+        """
+        End of speech: return the final transcript
+        The last partial is reused when it already covered all the speech, so
+        the pause that ended the utterance doesn't cost another decode.
+        Args:
+            speech_end (int): Samples fed before the trailing pause (default: all of them)
+        """
+        end_of_speech = time.perf_counter()
+        with self._cond:
+            self._finishing = True
+            self._cond.notify_all()
+            while self._busy:
+                self._cond.wait()
+            needed = self._samples if speech_end is None else min(speech_end, self._samples)
+            reuse = self._decoded_samples >= needed and self._decoded_samples > 0
+            audio = None if reuse else self._audio()
+            text = self._last_text
+
+        decode_s = 0.0
+        if audio is not None and len(audio):
+            start = time.perf_counter()
+            text = self.decode(audio)
+            decode_s = time.perf_counter() - start
+        audio_s = self._samples / self.sample_rate
+        self.metrics = {
+            "audio_s": audio_s,
+            "partials": len(self.partials),
+            "final_decode_s": decode_s,
+            "rtf": decode_s / audio_s if audio_s else 0.0,
+            "partial_rtf": self._partial_decode_s / audio_s if audio_s else 0.0,
+            "final_latency_ms": (time.perf_counter() - end_of_speech) * 1000,
+            "reused_partial": reuse,
+        }
+        logger.debug(
+            f"STT final after {self.metrics['final_latency_ms']:.0f} ms "
+            f"({audio_s:.1f} s audio, RTF {self.metrics['rtf']:.2f}, {len(self.partials)} partials)"
+        )
+        return text
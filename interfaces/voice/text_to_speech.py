@@ -1,25 +1,35 @@
 import edge_tts
 import asyncio
 from utils.logger import get_logger
-import threading
-import os
 import pygame
-import tempfile
 import time
 
 from interfaces.system.spotify_control import SpotifyControl
+from interfaces.voice.tts_cache import PhraseCache
+from interfaces.voice.tts_worker import PygameSink, TTSWorker
 
 logger = get_logger(__name__)
 
 class TextToSpeech:
-    def __init__(self, spotify_instance=None):
+    def __init__(self, spotify_instance=None, config=None):
         logger.info("Initializing Text-to-Speech using Edge TTS...")
+        if config is None:
+            from config.settings import TTS
+            config = TTS
+        self.worker = None
         try:
-            self.voice = "en-GB-RyanNeural"
-            self.is_speaking = False
-            self.current_thread = None
+            self.voice = config.get("voice", "en-GB-RyanNeural")
+            self.rate = config.get("rate", "+0%")
             self.spotify = spotify_instance
 
+            # Phrases spoken before play from disk instead of going back to Edge TTS
+            self.cache = None
+            if config.get("cache_dir"):
+                try:
+                    self.cache = PhraseCache(config["cache_dir"], int(config.get("cache_max_mb", 50) * 1024 * 1024))
+                except OSError as e:
+                    logger.error(f"TTS phrase cache unavailable: {str(e)}")
+
             # Ensure wake word stream is initialized first
             time.sleep(0.5)  # Wait a bit to avoid audio device conflicts
 
@@ -32,78 +42,111 @@ class TextToSpeech:
             except Exception as e:
                 logger.error(f"Failed to initialize pygame mixer: {e}")
 
+            # One worker for the whole session: synthesizes the next sentence while this one plays
+            self.worker = TTSWorker(self._synthesize, PygameSink(), prefetch=config.get("prefetch", 1),
+                                    on_active=self._duck_music)
             logger.info("Edge TTS initialized successfully with Jarvis voice")
         except Exception as e:
             logger.error(f"Error initializing Edge TTS: {str(e)}")
             self.voice = None
 
+    @property
+    def is_speaking(self):
+        return bool(self.worker and self.worker.busy)
+
+    async def _fetch(self, text):
+        """Encoded mp3 for text from Edge TTS"""
+        audio = bytearray()
+        async for chunk in edge_tts.Communicate(text, self.voice, rate=self.rate).stream():
+            if chunk["type"] == "audio":
+                audio.extend(chunk["data"])
+        return bytes(audio)
+
+    async def _synthesize(self, text):
+        """
+        Return the text's mp3: the cached clip when there is one, otherwise freshly
+        synthesized (and cached if it is a repeat)
+        """
+        if not self.cache:
+            return await self._fetch(text)
+        clip = self.cache.get(self.voice, text, self.rate)
+        if clip:
+            return clip
+        start = time.perf_counter()
+        audio = await self._fetch(text)
+        self.cache.put(self.voice, text, self.rate, audio, time.perf_counter() - start)
+        return audio
+
+    def _duck_music(self, speaking):
+        if self.spotify:
+            self.spotify.set_volume(10 if speaking else 100)
+
+    def prewarm(self, phrases):
+        """Synthesize fixed phrases into the cache in the background, so they play instantly"""
+        if not self.cache or not self.worker:
+            return
+        missing = [p for p in dict.fromkeys(phrases) if p and not self.cache.contains(self.voice, p, self.rate)]
+        if missing:
+            asyncio.run_coroutine_threadsafe(self._warm(missing), self.worker.loop)
+
+    async def _warm(self, phrases):
+        for text in phrases:
+            if self.cache.contains(self.voice, text, self.rate):
+                continue  # spoken in the meantime
+            start = time.perf_counter()
+            try:
+                audio = await self._fetch(text)
+            except Exception as e:
+                logger.error(f"Error pre-warming TTS phrase: {str(e)}")
+                return
+            self.cache.put(self.voice, text, self.rate, audio, time.perf_counter() - start, canned=True)
+        logger.info(f"Pre-warmed {len(phrases)} TTS phrases")
+
     def speak(self, text):
+        """Interrupt whatever is being said and say this instead"""
         if not text:
             return
-        try:
-            self.stop()
-
-            def speak_async():
-                try:
-                    self.is_speaking = True
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-
-                    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                        temp_path = temp_file.name
-
-                    communicate = edge_tts.Communicate(text, self.voice)
-                    loop.run_until_complete(communicate.save(temp_path))
-
-                    if self.spotify:
-                        self.spotify.set_volume(10)
-
-                    pygame.mixer.music.load(temp_path)
-                    pygame.mixer.music.play()
-
-                    while pygame.mixer.music.get_busy():
-                        pygame.time.Clock().tick(10)
-
-                    # Wait for OS to release file lock
-                    retries = 0
-                    while retries < 10:
-                        try:
-                            os.remove(temp_path)
-                            break
-                        except PermissionError:
-                            time.sleep(0.1)
-                            retries += 1
-                    else:
-                        logger.warning("Unable to delete temp mp3 after 10 retries")
-
-                except Exception as e:
-                    logger.error(f"Error in speak_async: {str(e)}")
-                finally:
-                    if self.spotify:
-                        self.spotify.set_volume(100)
-                    self.is_speaking = False
-                    loop.close()
-
-            self.current_thread = threading.Thread(target=speak_async)
-            self.current_thread.start()
-
-        except Exception as e:
-            logger.error(f"Error in speak method: {str(e)}")
+        if not self.worker:
             print("Jarvis: " + text)
+            return
+        self.stop()
+        self.worker.say(text)
+
+    def speak_queued(self, text, on_start=None):
+        """
+        Queue a sentence to be spoken after any sentences already queued.
+        Used for streamed replies so the first sentence plays while the rest is generated.
+        on_start is called when playback of this sentence begins.
+        """
+        if not text:
+            return
+        if not self.worker:
+            print("Jarvis: " + text)
+            if on_start:
+                on_start()
+            return
+        self.worker.say(text, on_start)
+
+    def wait_until_done(self):
+        """Block until every queued sentence has been spoken (or stopped)"""
+        if self.worker:
+            self.worker.wait_until_done()
 
     def stop(self):
-        if self.is_speaking:
-            self.is_speaking = False
-            pygame.mixer.music.stop()
-            if self.current_thread and self.current_thread.is_alive():
-                self.current_thread.join(timeout=0.1)
+        """Drop queued sentences and cut off the one playing"""
+        if self.worker:
+            self.worker.cancel()
 
     def cleanup(self):
         logger.info("Cleaning up Text-to-Speech resources...")
-        self.stop()
+        if self.worker:
+            # Let a farewell already queued finish before tearing down
+            self.worker.wait_until_done(timeout=10)
+            logger.info(f"TTS worker stats: {self.worker.report()}")
+            self.worker.close()
+        if self.cache:
+            logger.info(f"TTS phrase cache stats: {self.cache.get_stats()}")
         try:
             pygame.mixer.quit()
         except:
             pass
-        if self.current_thread and self.current_thread.is_alive():
-            self.current_thread.join()
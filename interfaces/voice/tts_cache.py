@@ -0,0 +1,165 @@
+"""
+On-disk phrase cache for Jarvis text-to-speech.
+Encoded audio is stored under a hash of (voice, rate, text), so a fixed
+phrase ("Playing next track, sir.") plays straight from disk. Only canned
+phrases and phrases synthesized more than once are stored; one-off LLM
+sentences would otherwise evict the pre-warmed clips. The directory is
+size-bounded with LRU eviction; recency
+survives restarts through file modification times, and files are written
+to a temporary name and renamed into place so a crash never leaves half a
+clip behind.
+"""
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def phrase_key(voice, text, rate="+0%"):
+    """Content address for a phrase; whitespace differences don't change the audio"""
+    text = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha256(f"{voice}\x1f{rate}\x1f{text}".encode("utf-8")).hexdigest()
+
+
+class PhraseCache:
+    """Size-bounded LRU directory of synthesized phrases"""
+
+    def __init__(self, directory="data/cache/tts", max_bytes=50 * 1024 * 1024, suffix=".mp3", max_seen=1024):
+        """
+        Initialize the phrase cache
+        Args:
+            directory (str): Where clips are stored
+            max_bytes (int): Total size above which the least recently played clips are removed
+            suffix (str): Extension of the stored audio
+            max_seen (int): Phrases synthesized once (not stored) remembered, so a repeat is stored
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.max_seen = max_seen
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._seen = OrderedDict()  # keys synthesized once this session
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "skipped": 0, "evictions": 0, "bytes_saved": 0,
+                      "synthesis_s": 0.0}
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)  # left over from an interrupted write
+            elif name.endswith(suffix):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-len(suffix)], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.total_bytes += size
+        self._evict()
+        logger.info(f"TTS phrase cache: {len(self._entries)} clips, {self.total_bytes / 1024:.0f} KB")
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, voice, text, rate="+0%"):
+        """
+        Look up a phrase
+        Returns:
+            bytes: The cached clip, or None on a miss
+        """
+        key = phrase_key(voice, text, rate)
+        # Read under the lock: eviction can't remove the file between lookup and load
+        with self._lock:
+            size = self._entries.get(key)
+            if size is not None:
+                path = self.path(key)
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    os.utime(path)  # keeps the LRU order across restarts
+                except OSError:
+                    self._forget(key)
+                    data = None
+            if size is None or not data:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += size
+        return data
+
+    def contains(self, voice, text, rate="+0%"):
+        """Whether a phrase is cached, without counting a lookup"""
+        with self._lock:
+            return phrase_key(voice, text, rate) in self._entries
+
+    def put(self, voice, text, rate, data, synthesis_s=0.0, canned=False):
+        """
+        Store encoded audio for a phrase that is canned or has been synthesized before
+        Args:
+            data (bytes): Encoded clip
+            synthesis_s (float): How long synthesizing it took (for the stats)
+            canned (bool): A fixed phrase (pre-warming), stored on first synthesis
+        Returns:
+            str: Path of the stored clip, or None if it wasn't stored
+        """
+        if not data:
+            logger.warning(f"Not caching an empty clip for: {text}")
+            return None
+        key = phrase_key(voice, text, rate)
+        with self._lock:
+            if not canned and key not in self._seen and key not in self._entries:
+                # First time: likely a one-off sentence, so only remember that it was said
+                self._seen[key] = True
+                if len(self._seen) > self.max_seen:
+                    self._seen.popitem(last=False)
+                self.stats["skipped"] += 1
+                return None
+            self._seen.pop(key, None)
+        path = self.path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = len(data)
+            self.total_bytes += len(data)
+            self.stats["stores"] += 1
+            self.stats["synthesis_s"] += synthesis_s
+            self._evict(keep=key)
+        return path
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    def _evict(self, keep=None):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self._forget(key)
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self.path(key))
+            except OSError as e:
+                logger.warning(f"Could not remove cached clip {key}: {str(e)}")
+
+    def get_stats(self):
+        """Hit rate, bytes not re-downloaded and synthesis time saved (estimated from misses)"""
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            average = stats["synthesis_s"] / stats["stores"] if stats["stores"] else 0.0
+            stats["synthesis_s_saved"] = stats["hits"] * average
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self.total_bytes
+        return stats
@@ -0,0 +1,282 @@
+"""
+Long-lived text-to-speech worker for Jarvis.
+One thread runs one asyncio loop for the life of the process. A synthesis
+coroutine works ahead of a playback coroutine (sentence N+1 is synthesized
+and decoded while N plays), playback ends are awaited as events instead of
+polled, and cancel() drops everything queued, interrupts the clip that is
+playing and abandons the synthesis in flight.
+"""
+import asyncio
+import threading
+import time
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PygameSink:
+    """Plays encoded clips (a path or mp3 bytes) through the pygame mixer"""
+
+    def __init__(self):
+        import pygame
+        self._pygame = pygame
+
+    def load(self, clip):
+        """Decode a clip; runs ahead of playback"""
+        if isinstance(clip, bytes):
+            # Decoding mp3 from a file object needs pygame 2.2+ (requirements.txt)
+            import io
+            return self._pygame.mixer.Sound(file=io.BytesIO(clip))
+        return self._pygame.mixer.Sound(clip)
+
+    def play(self, sound):
+        """Start playback without blocking; returns the clip length in seconds"""
+        sound.play()
+        return sound.get_length()
+
+    def stop(self):
+        self._pygame.mixer.stop()
+
+
+class NullSink:
+    """Plays nothing; a clip 'lasts' as long as its text would take to say (for tests and benchmarks)"""
+
+    def __init__(self, seconds_per_char=0.06, speed=1.0):
+        """
+        Args:
+            seconds_per_char (float): Simulated speaking time per character of clip
+            speed (float): Playback speed-up; higher runs benchmarks faster
+        """
+        self.seconds_per_char = seconds_per_char
+        self.speed = speed
+        self.played = []
+
+    def load(self, clip):
+        return clip
+
+    def play(self, clip):
+        self.played.append(clip)
+        return len(clip) * self.seconds_per_char / self.speed
+
+    def stop(self):
+        pass
+
+
+class FakeSynthesizer:
+    """Stand-in for Edge TTS: a fixed round trip plus time per character, returning the text as the clip"""
+
+    def __init__(self, latency=0.15, seconds_per_char=0.002):
+        self.latency = latency
+        self.seconds_per_char = seconds_per_char
+        self.calls = 0
+
+    async def __call__(self, text):
+        self.calls += 1
+        await asyncio.sleep(self.latency + len(text) * self.seconds_per_char)
+        return text
+
+
+class _Item:
+    __slots__ = ("text", "on_start", "generation", "queued")
+
+    def __init__(self, text, on_start, generation):
+        self.text = text
+        self.on_start = on_start
+        self.generation = generation
+        self.queued = time.perf_counter()
+
+
+class TTSWorker:
+    """Synthesis queue with prefetch in front of a playback queue, on one event loop thread"""
+
+    def __init__(self, synthesize, sink, prefetch=1, on_active=None):
+        """
+        Initialize and start the worker
+        Args:
+            synthesize (callable): async synthesize(text) -> clip for the sink
+            sink: Object with load(clip) -> handle, play(handle) -> seconds, stop()
+            prefetch (int): Synthesized sentences held ready behind the one playing
+            on_active (callable): on_active(True) when playback starts after silence,
+                on_active(False) when the queue has drained (e.g. to duck music)
+        """
+        self.synthesize = synthesize
+        self.sink = sink
+        self.prefetch = prefetch
+        self.on_active = on_active
+        self.generation = 0
+        self.stats = {"sentences": 0, "failed": 0, "cancelled": 0, "gaps_ms": [], "first_audio_ms": []}
+
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._active = False
+        self._last_end = None
+
+        self.loop = asyncio.new_event_loop()
+        self._ready_event = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name="tts-worker", daemon=True)
+        self._thread.start()
+        self._ready_event.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self._texts = asyncio.Queue()
+        self._ready = asyncio.Queue(maxsize=max(1, self.prefetch))
+        self._interrupt = asyncio.Event()
+        self._synth_task = self.loop.create_task(self._synthesis_loop())
+        self._play_task = self.loop.create_task(self._playback_loop())
+        self._ready_event.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    @property
+    def busy(self):
+        """Whether anything is queued or playing"""
+        return not self._idle.is_set()
+
+    def say(self, text, on_start=None):
+        """Queue a sentence after those already queued; on_start() runs when it starts playing"""
+        if not text:
+            return
+        with self._lock:
+            self._outstanding += 1
+            self._idle.clear()
+            item = _Item(text, on_start, self.generation)
+        self.loop.call_soon_threadsafe(self._texts.put_nowait, item)
+
+    def wait_until_done(self, timeout=None):
+        """Block until every queued sentence has been played or cancelled"""
+        return self._idle.wait(timeout)
+
+    def cancel(self):
+        """Drop queued sentences and stop the one playing; returns once the worker is quiet"""
+        if self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._cancel(), self.loop).result()
+
+    def close(self):
+        """Cancel everything and stop the worker thread"""
+        self.cancel()
+        if self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+    async def _shutdown(self):
+        for task in (self._synth_task, self._play_task):
+            task.cancel()
+        await asyncio.gather(self._synth_task, self._play_task, return_exceptions=True)
+
+    def _finish(self, count=1):
+        with self._lock:
+            self._outstanding -= count
+            idle = self._outstanding == 0
+            if idle:
+                self._idle.set()
+        if idle and self._active:
+            self._active = False
+            self._last_end = None
+            self._notify(False)
+
+    def _notify(self, active):
+        if self.on_active:
+            # Callbacks may block (Spotify's web API); keep them off the loop
+            self.loop.run_in_executor(None, self.on_active, active)
+
+    async def _cancel(self):
+        with self._lock:
+            self.generation += 1
+        dropped = 0
+        for q in (self._texts, self._ready):
+            while not q.empty():
+                q.get_nowait()
+                dropped += 1
+        # Abandon the synthesis in flight; it finishes its own sentence
+        if self._synth_task.cancel():
+            try:
+                await self._synth_task
+            except asyncio.CancelledError:
+                pass
+        self._synth_task = self.loop.create_task(self._synthesis_loop())
+        self._interrupt.set()
+        self.sink.stop()
+        self.stats["cancelled"] += dropped
+        if dropped:
+            self._finish(dropped)
+
+    async def _synthesis_loop(self):
+        item = None
+        try:
+            while True:
+                item = await self._texts.get()
+                try:
+                    clip = await self.synthesize(item.text)
+                    handle = await self.loop.run_in_executor(None, self.sink.load, clip)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error synthesizing sentence: {str(e)}")
+                    self.stats["failed"] += 1
+                    handle = None
+                await self._ready.put((item, handle))
+                item = None
+        except asyncio.CancelledError:
+            if item is not None:
+                # Taken from the queue but never handed to playback
+                self.stats["cancelled"] += 1
+                self._finish()
+            raise
+
+    async def _playback_loop(self):
+        while True:
+            item, handle = await self._ready.get()
+            if handle is not None and item.generation == self.generation:
+                try:
+                    await self._play(item, handle)
+                except Exception as e:
+                    logger.error(f"Error playing sentence: {str(e)}")
+                    self.stats["failed"] += 1
+            self._finish()
+
+    async def _play(self, item, handle):
+        self._interrupt.clear()
+        duration = self.sink.play(handle)
+        now = time.perf_counter()
+        if not self._active:
+            self._active = True
+            self._notify(True)
+        if self._last_end is not None and item.queued < self._last_end:
+            # Queued before the previous sentence ended: any wait is a gap the listener hears
+            self.stats["gaps_ms"].append((now - self._last_end) * 1000)
+        self.stats["first_audio_ms"].append((now - item.queued) * 1000)
+        self.stats["sentences"] += 1
+        if item.on_start:
+            item.on_start()
+        try:
+            await asyncio.wait_for(self._interrupt.wait(), duration)  # set only by cancel()
+            self.stats["cancelled"] += 1
+        except asyncio.TimeoutError:
+            self._last_end = time.perf_counter()
+
+    def report(self):
+        """Sentence gaps, time from queueing to audio, and the worker thread's CPU time"""
+        def summary(values):
+            values = sorted(values)
+            if not values:
+                return {"p50": 0.0, "max": 0.0}
+            return {"p50": values[len(values) // 2], "max": values[-1]}
+
+        cpu_s = asyncio.run_coroutine_threadsafe(self._thread_cpu(), self.loop).result()
+        return {
+            "sentences": self.stats["sentences"],
+            "failed": self.stats["failed"],
+            "cancelled": self.stats["cancelled"],
+            "gap_ms": summary(self.stats["gaps_ms"]),
+            "first_audio_ms": summary(self.stats["first_audio_ms"]),
+            "cpu_s": cpu_s,
+        }
+
+    async def _thread_cpu(self):
+        return time.thread_time()
@@ -0,0 +1,190 @@
+"""
+Voice activity models for VoiceDetector, fastest to load first.
+"onnx" runs the Silero VAD export with onnxruntime from a local copy that is
+downloaded once and checked against a SHA-256; "numpy" is a small spectral
+model with no dependencies at all; "torch" is the original torch.hub Silero.
+Every backend is a callable frame -> speech probability with reset_states().
+"""
+import os
+import shutil
+import hashlib
+import importlib.util
+import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ensure_model(path, url=None, sha256=None, timeout=10.0):
+    """
+    Return a verified local copy of the model, downloading it if needed
+    The checksum is the configured one, or the one recorded next to the
+    file on first download (path + ".sha256").
+    Args:
+        path (str): Where the model is kept
+        url (str): Where to fetch it from when missing
+        sha256 (str): Expected checksum
+        timeout (float): Seconds a stalled download may hang before giving up (offline first run)
+    Returns:
+        str: path
+    """
+    sidecar = path + ".sha256"
+    if sha256 is None and os.path.exists(sidecar):
+        with open(sidecar, "r", encoding="utf-8") as f:
+            sha256 = f.read().strip()
+
+    if os.path.exists(path):
+        actual = sha256_of(path)
+        if sha256 is None or actual == sha256:
+            return path
+        logger.error(f"Checksum mismatch for {path}, fetching it again")
+        os.remove(path)
+
+    if not url:
+        raise FileNotFoundError(f"VAD model {path} is missing and no download URL is configured")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".download"
+    logger.info(f"Downloading VAD model from {url}...")
+    import urllib.request  # only needed once; keeps startup imports light
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response, open(tmp_path, "wb") as f:
+            shutil.copyfileobj(response, f)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    actual = sha256_of(tmp_path)
+    if sha256 is not None and actual != sha256:
+        os.remove(tmp_path)
+        raise ValueError(f"Downloaded VAD model has checksum {actual}, expected {sha256}")
+    os.replace(tmp_path, path)
+    with open(sidecar, "w", encoding="utf-8") as f:
+        f.write(actual)
+    return path
+
+
+class OnnxVAD:
+    """Streaming Silero VAD on onnxruntime (v5 export: input, state, sr)"""
+
+    def __init__(self, path, sample_rate=16000):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.sample_rate = np.array(sample_rate, dtype=np.int64)
+        self.context_size = 64 if sample_rate == 16000 else 32
+        self.reset_states()
+
+    def reset_states(self):
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._context = np.zeros((1, self.context_size), dtype=np.float32)
+
+    def __call__(self, frame):
+        x = np.concatenate([self._context, frame.reshape(1, -1).astype(np.float32)], axis=1)
+        probability, self._state = self.session.run(
+            None, {"input": x, "state": self._state, "sr": self.sample_rate}
+        )
+        self._context = x[:, -self.context_size:]
+        return float(probability[0, 0])
+
+
+class SpectralVAD:
+    """
+    Dependency-free fallback: a hand-weighted logistic model over the frame's
+    level above the noise floor, its speech-band energy share and spectral flatness
+    """
+
+    def __init__(self, sample_rate=16000, initial_noise_db=-30.0):
+        """
+        Args:
+            sample_rate (int): Audio sample rate
+            initial_noise_db (float): Starting noise floor as mean spectral power in dB, the
+                scale the model measures frames in; -30 is a quiet room (about -60 dBFS
+                of noise in a 512-sample frame). The detector's pre-gate may keep silent
+                frames from ever reaching the model
+        """
+        self.sample_rate = sample_rate
+        self.initial_noise_db = initial_noise_db
+        self._band = None
+        self.reset_states()
+
+    def reset_states(self):
+        self._noise_db = self.initial_noise_db
+
+    def __call__(self, frame):
+        spectrum = np.abs(np.fft.rfft(frame)) ** 2 + 1e-12
+        if self._band is None or len(self._band) != len(spectrum):
+            freqs = np.fft.rfftfreq(len(frame), 1.0 / self.sample_rate)
+            self._band = (freqs >= 300) & (freqs <= 3400)
+        level_db = 10 * np.log10(spectrum.mean())
+        snr_db = level_db - self._noise_db
+        band = spectrum[self._band].sum() / spectrum.sum()
+        flatness = np.exp(np.mean(np.log(spectrum))) / spectrum.mean()
+
+        logit = (snr_db - 9.0) / 3.0 + 6.0 * (band - 0.5) - 8.0 * (flatness - 0.3)
+        probability = float(1.0 / (1.0 + np.exp(-logit)))
+        # The noise floor follows quiet frames quickly and loud ones slowly
+        rate = 0.2 if level_db < self._noise_db else (0.002 if probability > 0.5 else 0.02)
+        self._noise_db += rate * (level_db - self._noise_db)
+        return probability
+
+
+class TorchVAD:
+    """Original Silero model through torch.hub (slow to import, needs the hub cache or network)"""
+
+    def __init__(self, sample_rate=16000):
+        import torch
+        self._torch = torch
+        self.sample_rate = sample_rate
+        self.model, _ = torch.hub.load(repo_or_dir='snakers4/silero-vad', model='silero_vad', trust_repo=True)
+
+    def reset_states(self):
+        self.model.reset_states()
+
+    def __call__(self, frame):
+        return self.model(self._torch.from_numpy(frame), self.sample_rate).item()
+
+
+def load_vad(config=None, sample_rate=16000):
+    """
+    Load the first VAD backend that works
+    Args:
+        config (dict): VAD settings; "backend" is "auto" (onnx, then numpy), "onnx",
+            "numpy" or "torch"
+        sample_rate (int): Audio sample rate
+    Returns:
+        Callable model with reset_states()
+    """
+    if config is None:
+        from config.settings import VAD
+        config = VAD
+    backend = config.get("backend", "auto")
+    order = ["onnx", "numpy"] if backend == "auto" else [backend]
+    for name in order:
+        try:
+            if name == "onnx":
+                if importlib.util.find_spec("onnxruntime") is None:
+                    raise ImportError("onnxruntime is not installed")
+                path = ensure_model(config["model_path"], config.get("url"), config.get("sha256"),
+                                    config.get("timeout", 10.0))
+                model = OnnxVAD(path, sample_rate)
+            elif name == "torch":
+                model = TorchVAD(sample_rate)
+            else:
+                model = SpectralVAD(sample_rate)
+            logger.info(f"VAD backend: {name}")
+            return model
+        except ImportError as e:
+            logger.info(f"{name} VAD backend unavailable: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error loading {name} VAD backend: {str(e)}")
+    raise RuntimeError(f"No VAD backend could be loaded (tried {', '.join(order)})")
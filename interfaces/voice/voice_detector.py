@@ -1,100 +1,267 @@
-import sounddevice as sd
+"""
+Streaming voice activity detection for the Jarvis GUI.
+The audio callback only queues raw blocks; a worker thread cuts them into
+32 ms frames, skips obvious silence with a cheap RMS / spectral-flatness
+pre-gate, and runs the stateful VAD model (interfaces/voice/vad_model.py)
+on the rest. Speech starts and
+ends with hysteresis, so one noisy frame neither triggers nor ends it.
+Microphone audio comes from the shared audio bus (interfaces/voice/audio_bus.py),
+so the detector doesn't open a device of its own next to STT.
+"""
+import queue
+import threading
+import time
 import numpy as np
-import torch
-import torchaudio
+from interfaces.voice.vad_model import load_vad
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+
 class VoiceDetector:
-    def __init__(self, callback, sample_rate=16000, threshold=0.5):
+    def __init__(self, callback, sample_rate=16000, threshold=0.5, model=None, frame_size=512,
+                 min_speech=0.1, min_silence=0.3, gate_ratio=2.0, min_rms=0.003, flatness=0.6,
+                 on_speech_end=None, config=None):
+        """
+        Initialize the voice detector
+        Args:
+            callback (callable): Called (no arguments) when speech starts
+            sample_rate (int): 16000 or 8000 (Silero)
+            threshold (float): Speech probability that starts speech; it ends below threshold - 0.15
+            model (callable): model(frame) -> speech probability for a float32 frame; loaded
+                from the VAD settings when not given
+            frame_size (int): Samples per frame (Silero needs 512 at 16 kHz, 32 ms)
+            min_speech (float): Seconds of speech frames before speech is reported
+            min_silence (float): Seconds of non-speech frames that end speech
+            gate_ratio (float): Frames quieter than noise floor x ratio skip the model
+            min_rms (float): Frames quieter than this (full scale = 1.0) always skip the model
+            flatness (float): Frames with a flatter spectrum than this (noise) skip the model
+            on_speech_end (callable): Called (no arguments) when speech ends
+            config (dict): VAD settings (backend, model path, download URL, checksum)
+        """
         self.callback = callback
+        self.on_speech_end = on_speech_end
         self.sample_rate = sample_rate
         self.threshold = threshold
-        self.stream = None
+        self.frame_size = frame_size
+        self.min_speech = max(1, int(round(min_speech * sample_rate / frame_size)))
+        self.min_silence = max(1, int(round(min_silence * sample_rate / frame_size)))
+        self.gate_ratio = gate_ratio
+        self.min_rms = min_rms
+        self.flatness = flatness
+        self.subscription = None
         self.is_running = False
-        
-        try:
-            # Check available audio devices
-            devices = sd.query_devices()
-            logger.info(f"Available audio devices: {devices}")
-            
-            # Try to find a suitable input device
-            input_device = None
-            for device in devices:
-                if device['max_input_channels'] > 0:
-                    input_device = device['index']
-                    break
-            
-            if input_device is None:
-                raise RuntimeError("No input audio device found")
-            
-            # Initialize VAD model
-            self.model, self.utils = torch.hub.load(
-                repo_or_dir='snakers4/silero-vad',
-                model='silero_vad',
-                trust_repo=True
-            )
-            (self.get_speech_timestamps, self.save_audio, self.read_audio, _, _) = self.utils
-            logger.info("VoiceDetector initialized successfully")
-            
-        except Exception as e:
-            logger.error(f"Error initializing VoiceDetector: {str(e)}")
-            raise
 
-    def start(self):
+        self._queue = queue.Queue(maxsize=200)  # ~ 6 s of 32 ms blocks
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._worker = None
+        self._idle = threading.Event()
+        self._idle.set()
+        self._reset_state()
+
+        self.model = model
+        if self.model is None:
+            try:
+                self.model = load_vad(config, sample_rate)
+                logger.info("VoiceDetector initialized successfully")
+            except Exception as e:
+                logger.error(f"Error initializing VoiceDetector: {str(e)}")
+                raise
+
+    def _reset_state(self):
+        self.in_speech = False
+        self.noise_floor = None
+        self._speech_run = 0
+        self._silence_run = 0
+        self._onset = None
+        self._frame_index = 0
+        self.stats = {"frames": 0, "model_calls": 0, "gated": 0, "cpu_s": 0.0, "detections": []}
+
+    def start(self, microphone=True, bus=None):
+        """
+        Start detection
+        Args:
+            microphone (bool): Subscribe to the audio bus; with False, audio comes from feed()
+            bus (AudioBus): Bus to subscribe to (default: the shared microphone bus)
+        """
         if self.is_running:
             logger.warning("VoiceDetector is already running")
             return
-            
+
         try:
-            self.is_running = True
-            self.stream = sd.InputStream(
-                channels=1,
-                callback=self._audio_callback,
-                samplerate=self.sample_rate,
-                blocksize=int(self.sample_rate * 0.5),  # 0.5 sec
-                dtype=np.float32
-            )
-            self.stream.start()
-            logger.info("VoiceDetector started (Silero Hub VAD)")
+            self._start_worker()
+            if not microphone:
+                return
+            if bus is None:
+                from interfaces.voice.audio_bus import get_audio_bus
+                bus = get_audio_bus()
+            self.subscription = bus.subscribe("vad", self.sample_rate, callback=self._audio_callback)
+            self.subscription.open()
+            logger.info(f"VoiceDetector started ({type(self.model).__name__})")
         except Exception as e:
             self.is_running = False
             logger.error(f"Error starting VoiceDetector: {str(e)}")
             raise
 
+    def _start_worker(self):
+        self.is_running = True
+        if hasattr(self.model, "reset_states"):
+            self.model.reset_states()
+        self._worker = threading.Thread(target=self._run, name="voice-detector", daemon=True)
+        self._worker.start()
+
     def stop(self):
         if not self.is_running:
             return
-            
+
         try:
-            if self.stream:
-                self.stream.stop()
-                self.stream.close()
+            if self.subscription:
+                self.subscription.close()
+                self.subscription = None
             self.is_running = False
+            self._queue.put(None)
+            if self._worker:
+                self._worker.join(timeout=2)
+                self._worker = None
             logger.info("VoiceDetector stopped")
         except Exception as e:
             logger.error(f"Error stopping VoiceDetector: {str(e)}")
 
-    def _audio_callback(self, indata, frames, time_info, status):
-        if not self.is_running:
-            return
-            
-        if status:
-            logger.warning(f"Audio callback status: {status}")
+    def _audio_callback(self, block, end):
+        """Runs on the bus capture thread: queue the block and get out"""
+        if self.is_running:
+            self.feed(block)
 
+    def feed(self, samples):
+        """
+        Queue audio for the worker thread
+        Args:
+            samples (np.ndarray): float32 in [-1, 1], or int16
+        """
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        self._idle.clear()
         try:
-            audio = indata[:, 0]
-            audio_tensor = torch.from_numpy(audio).float()
+            self._queue.put_nowait((samples.copy(), time.perf_counter()))
+        except queue.Full:
+            logger.warning("VoiceDetector is falling behind, dropping audio")
 
-            # Reshape and normalize
-            audio_tensor = audio_tensor.unsqueeze(0)
-            audio_tensor = audio_tensor / (torch.max(torch.abs(audio_tensor)) + 1e-6)
+    def flush(self, timeout=5.0):
+        """Wait until every queued block has been processed"""
+        deadline = time.perf_counter() + timeout
+        while not (self._queue.empty() and self._idle.is_set()):
+            if time.perf_counter() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
 
-            timestamps = self.get_speech_timestamps(audio_tensor, self.model, threshold=self.threshold)
-            if timestamps:
-                logger.debug("Voice detected")
-                self.callback()
-        except Exception as e:
-            logger.error(f"VAD detection error: {str(e)}")
-            # Don't re-raise the exception to keep the stream running
+    def _run(self):
+        while self.is_running:
+            item = self._queue.get()
+            if item is None:
+                break
+            samples, arrived = item
+            start = time.thread_time()
+            try:
+                self._process_block(samples, arrived)
+            except Exception as e:
+                logger.error(f"VAD detection error: {str(e)}")
+            self.stats["cpu_s"] += time.thread_time() - start
+            if self._queue.empty():
+                self._idle.set()
+        self._idle.set()
+
+    def _process_block(self, samples, arrived):
+        audio = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+        full = len(audio) - len(audio) % self.frame_size
+        for offset in range(0, full, self.frame_size):
+            self.process_frame(audio[offset:offset + self.frame_size], arrived)
+        self._pending = audio[full:]
+
+    def _gated(self, frame, rms):
+        """Cheap test for frames that can't be speech"""
+        if rms < self.min_rms:
+            return True
+        if self.noise_floor is not None and rms < self.noise_floor * self.gate_ratio:
+            return True
+        spectrum = np.abs(np.fft.rfft(frame)) + 1e-10
+        flatness = np.exp(np.mean(np.log(spectrum))) / np.mean(spectrum)
+        return flatness > self.flatness
+
+    def process_frame(self, frame, arrived=None):
+        """
+        Update the speech state with one frame
+        Returns:
+            bool: Whether the detector is in speech after this frame
+        """
+        self.stats["frames"] += 1
+        self._frame_index += 1
+        rms = float(np.sqrt(np.mean(frame * frame)))
+
+        # While in speech every frame goes to the model, so quiet consonants don't end it
+        if not self.in_speech and self._gated(frame, rms):
+            self.stats["gated"] += 1
+            probability = 0.0
+        else:
+            self.stats["model_calls"] += 1
+            probability = self.model(frame)
+
+        if probability < self.threshold:
+            # Track the background level on frames that aren't speech
+            if self.noise_floor is None:
+                self.noise_floor = rms
+            else:
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms if rms > self.noise_floor else rms
+
+        if not self.in_speech:
+            if probability >= self.threshold:
+                self._speech_run += 1
+                if self._speech_run == 1:
+                    self._onset = self._frame_index
+                if self._speech_run >= self.min_speech:
+                    self._start_speech(arrived)
+            else:
+                self._speech_run = 0
+        else:
+            if probability < self.threshold - 0.15:
+                self._silence_run += 1
+                if self._silence_run >= self.min_silence:
+                    self.in_speech = False
+                    self._speech_run = 0
+                    logger.debug("Voice ended")
+                    if self.on_speech_end:
+                        self.on_speech_end()
+            else:
+                self._silence_run = 0
+        return self.in_speech
+
+    def _start_speech(self, arrived):
+        self.in_speech = True
+        self._silence_run = 0
+        frame_s = self.frame_size / self.sample_rate
+        detection = {
+            "onset_s": (self._onset - 1) * frame_s,
+            "detected_s": self._frame_index * frame_s,
+            # Audio that had to be heard before deciding, plus queueing and processing
+            "latency_ms": (self._frame_index - self._onset + 1) * frame_s * 1000,
+            "processing_ms": (time.perf_counter() - arrived) * 1000 if arrived else 0.0,
+        }
+        self.stats["detections"].append(detection)
+        logger.debug("Voice detected")
+        self.callback()
+
+    def report(self):
+        """CPU per second of audio, model calls skipped by the pre-gate, detection latency"""
+        audio_s = self.stats["frames"] * self.frame_size / self.sample_rate
+        latencies = sorted(d["latency_ms"] + d["processing_ms"] for d in self.stats["detections"])
+        return {
+            "audio_s": audio_s,
+            "cpu_ms_per_s": self.stats["cpu_s"] * 1000 / audio_s if audio_s else 0.0,
+            "gated_fraction": self.stats["gated"] / self.stats["frames"] if self.stats["frames"] else 0.0,
+            "model_calls": self.stats["model_calls"],
+            "detections": len(latencies),
+            "latency_ms": {
+                "p50": latencies[len(latencies) // 2] if latencies else 0.0,
+                "max": latencies[-1] if latencies else 0.0,
+            },
+        }
@@ -1,62 +1,135 @@
-import pvporcupine
-import pyaudio
-import struct
+"""
+Local wake-word gate for Jarvis.
+The detector listens to the blocks the audio capture thread already reads
+(int16 NumPy arrays straight from the stream buffer), so full transcription
+only runs after "Jarvis" has been heard.
+"""
+import os
+import threading
+import time
+import numpy as np
+from interfaces.voice.keyword_spotter import KeywordSpotter
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+
 class WakeWordDetector:
-    def __init__(self, wake_word="jarvis", sensitivity=0.6):
+    def __init__(self, wake_word="jarvis", sensitivity=0.6, engine=None, access_key=None, model_path=None):
+        """
+        Initialize the wake word detector
+        Args:
+            wake_word (str): Porcupine built-in keyword
+            sensitivity (float): Detection sensitivity, 0-1
+            engine: Object with process(frame) -> keyword index or -1, frame_length and
+                sample_rate (default: the enrolled KeywordSpotter if there is one, else
+                Porcupine when an access key is set)
+            access_key (str): Picovoice access key (default: PICOVOICE_ACCESS_KEY)
+            model_path (str): Templates saved by `python -m interfaces.voice.keyword_spotter enroll`
+        """
         self.keyword = wake_word
         self.sensitivity = sensitivity
-        self.porcupine = None
-        self.pa = None
-        self.stream = None
+        self.engine = engine
+        self.detections = []  # absolute sample index at the end of each detecting frame
+        self.frames = 0
+        self.cpu_s = 0.0
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._cond = threading.Condition()
 
-        try:
-            access_key = "KTGO/VRkPtNm86VsdjeBMPEjCP8LKhRKNC2+MG4wEif3yBbMZg1zQQ=="
-            self.porcupine = pvporcupine.create(
-                access_key=access_key,
-                keywords=[self.keyword],
-                sensitivities=[self.sensitivity]
-            )
-            self.pa = pyaudio.PyAudio()
-            logger.info(f"Wake word detector initialized for '{wake_word}'")
-        except Exception as e:
-            logger.error(f"Error initializing wake word engine: {str(e)}")
-
-    def _open_stream(self):
-        if not self.stream or self.stream.is_stopped():
-            self.stream = self.pa.open(
-                rate=self.porcupine.sample_rate,
-                channels=1,
-                format=pyaudio.paInt16,
-                input=True,
-                frames_per_buffer=self.porcupine.frame_length
+        if self.engine is None and model_path and os.path.exists(model_path):
+            try:
+                self.engine = KeywordSpotter.load(model_path, sensitivity)
+            except (OSError, KeyError, ValueError) as e:
+                logger.error(f"Error loading wake word templates: {str(e)}")
+        if self.engine is None:
+            access_key = access_key or os.environ.get("PICOVOICE_ACCESS_KEY")
+            if not access_key:
+                logger.warning(
+                    "No wake word engine: enroll the keyword spotter with "
+                    "`python -m interfaces.voice.keyword_spotter enroll` or set PICOVOICE_ACCESS_KEY"
+                )
+                return
+            try:
+                import pvporcupine
+                self.engine = pvporcupine.create(
+                    access_key=access_key,
+                    keywords=[self.keyword],
+                    sensitivities=[self.sensitivity]
+                )
+            except Exception as e:
+                logger.error(f"Error initializing wake word engine: {str(e)}")
+                return
+        logger.info(f"Wake word detector initialized for '{wake_word}' ({type(self.engine).__name__})")
+
+    @property
+    def available(self):
+        return self.engine is not None
+
+    def attach(self, capture):
+        """Run detection on the capture thread of an AudioCapture"""
+        if capture.sample_rate != self.engine.sample_rate:
+            raise ValueError(
+                f"Wake word engine needs {self.engine.sample_rate} Hz audio, capture runs at {capture.sample_rate} Hz"
             )
+        capture.add_listener(self.process)
+
+    def process(self, block, end=None):
+        """
+        Feed int16 samples; re-blocks them into engine frames without copying
+        unless a frame straddles two blocks
+        Args:
+            block (np.ndarray): int16 samples
+            end (int): Absolute index one past the block's last sample
+        """
+        start = time.thread_time()
+        frame_length = self.engine.frame_length
+        if len(self._pending):
+            block = np.concatenate([self._pending, block])
+        if end is None:
+            end = self.frames * frame_length + len(block)
+        full = len(block) - len(block) % frame_length
+        detected = []
+        for offset in range(0, full, frame_length):
+            self.frames += 1
+            if self.engine.process(block[offset:offset + frame_length]) >= 0:
+                detected.append(end - len(block) + offset + frame_length)
+        self._pending = block[full:].copy()
+        self.cpu_s += time.thread_time() - start
+        if detected:
+            with self._cond:
+                self.detections.extend(detected)
+                self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Wait for a detection
+        Returns:
+            int: Sample index just after the wake word, or None on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.detections, timeout):
+                return None
+            position = self.detections[-1]
+            self.detections.clear()
+            return position
+
+    def clear(self, before=None):
+        """Forget detections heard so far, or those ending at or before a sample index"""
+        with self._cond:
+            if before is None:
+                self.detections.clear()
+            else:
+                self.detections = [p for p in self.detections if p > before]
 
     def listen(self, timeout=0.1):
         """Listen for the wake word — returns True if detected"""
-        try:
-            self._open_stream()
-            pcm = self.stream.read(self.porcupine.frame_length, exception_on_overflow=False)
-            pcm = struct.unpack_from("h" * self.porcupine.frame_length, pcm)
-            result = self.porcupine.process(pcm)
-            return result >= 0
-        except Exception as e:
-            logger.error(f"Error in wake word detection: {str(e)}")
-            return False
+        return self.wait(timeout) is not None
 
     def cleanup(self):
-        """Cleanly shut down mic and Porcupine"""
+        """Release the Porcupine engine"""
         try:
-            if self.stream:
-                self.stream.stop_stream()
-                self.stream.close()
-            if self.porcupine:
-                self.porcupine.delete()
-            if self.pa:
-                self.pa.terminate()
+            if self.engine and hasattr(self.engine, "delete"):
+                self.engine.delete()
             logger.info("Wake word detector shut down cleanly")
         except Exception as e:
             logger.error(f"Error cleaning up wake word: {str(e)}")
@@ -6,18 +6,24 @@ Jarvis AI Assistant - Main Entry Point
 import os
 import sys
 import signal
-import time
-import threading
-import re
-from core.phi3_engine import Phi3Engine
+import asyncio
+import argparse
+from core.llm_backends import create_backend
+from core.model_router import build_cascade
+from core.commands import canned_phrases, register_all
+from core.event_pipeline import MicrophoneSource, NullSpeaker, TextSource, TurnPipeline, WavSource
+from core.intent_classifier import load_or_train
+from core.intent_dispatcher import IntentDispatcher
 from core.memory_manager import MemoryManager
 from core.memory_summarizer import MemorySummarizer
-from interfaces.voice.speech_to_text import SpeechToText
+from interfaces.voice.audio_bus import close_audio_bus
 from interfaces.voice.text_to_speech import TextToSpeech
+from interfaces.voice.wake_word import WakeWordDetector
 from interfaces.system.desktop_control import DesktopControl
 from interfaces.system.screen_reader import ScreenReader
 from interfaces.system.spotify_control import SpotifyControl
 from utils.security import SecurityManager
+from config.settings import WAKE_WORD
 from utils.logger import setup_logger
 
 # Ensure stdout uses UTF-8
@@ -26,21 +32,32 @@ if hasattr(sys.stdout, "reconfigure"):
 
 logger = setup_logger()
 
+GREETING = "Jarvis AI Assistant is online and ready to assist you, sir."
+FAREWELL = "Shutting down. Goodbye, sir."
+
 class Jarvis:
-    def __init__(self):
+    def __init__(self, headless=False, mock_llm=False):
         logger.info("Initializing Jarvis AI Assistant...")
 
         self.security = SecurityManager()
         self.memory = MemoryManager()
         self.memory_summarizer = MemorySummarizer()
-        self.ai_engine = Phi3Engine(self.memory)
+        if mock_llm:
+            self.ai_engine = create_backend("mock", self.memory, token_delay=0.02, latencies=[0.3])
+        else:
+            self.ai_engine = build_cascade(self.memory)
         self.expecting_followup = False
 
-        self.stt = SpeechToText()
-        self.tts = TextToSpeech()
+        self._stt = None  # built on first use: headless text input needs no microphone or STT
+        self.tts = NullSpeaker() if headless else TextToSpeech()
+        # Fixed phrases are synthesized in the background so they play without a round trip
+        self.tts.prewarm([GREETING, FAREWELL] + canned_phrases())
         self.desktop = DesktopControl()
         self.screen_reader = ScreenReader()
         self.spotify = SpotifyControl()
+        self.pipeline = None
+        self.last_response = None
+        self.commands = register_all(IntentDispatcher(classifier=load_or_train()), self)
 
         self.wake_words = ["jarvis", "hey jarvis"]
         self.wake_word_enabled = True
@@ -48,25 +65,66 @@ class Jarvis:
         self.screen_monitoring_thread = None
         self.running = False
 
-        logger.info("Wake word detection enabled")
+        # Local wake-word gate: nothing is transcribed until it fires. Without it the
+        # wake word is found in the transcript of everything heard.
+        self.wake_gate = None
+        if not headless and WAKE_WORD["enabled"]:
+            detector = WakeWordDetector(WAKE_WORD["keyword"], WAKE_WORD["sensitivity"],
+                                        model_path=WAKE_WORD["model_path"])
+            if detector.available:
+                detector.attach(self.stt.audio)
+                self.wake_gate = detector
+        logger.info(f"Wake word detection enabled ({'local gate' if self.wake_gate else 'transcript search'})")
         logger.info("Jarvis initialization complete.")
 
+    @property
+    def stt(self):
+        """SpeechToText, created when the microphone or WAV transcription first needs it"""
+        if self._stt is None:
+            from interfaces.voice.speech_to_text import SpeechToText
+            self._stt = SpeechToText()
+            # A partial transcript that already matches a command ends the utterance sooner
+            self._stt.endpointer.complete_check = self._is_complete_command
+        return self._stt
+
     def start(self):
         self.running = True
         logger.info("Jarvis is now running.")
-        self.tts.speak("Jarvis AI Assistant is online and ready to assist you, sir.")
+        self.tts.speak(GREETING)
 
+        source = MicrophoneSource(
+            self.stt, lambda: self.running, wake=self.wake_gate,
+            awake=lambda: self.is_listening or self.expecting_followup, on_wake=self._on_wake
+        )
+        pipeline = self._build_pipeline(source)
         try:
-            self._main_loop()
+            asyncio.run(pipeline.run())
         except KeyboardInterrupt:
             self.stop()
 
+    def run_headless(self, source):
+        """Drive the pipeline from text or WAV input and return its throughput/latency report"""
+        self.running = True
+        self.wake_word_enabled = False
+        pipeline = self._build_pipeline(source, half_duplex=False)
+        try:
+            return asyncio.run(pipeline.run())
+        finally:
+            pipeline.close()
+
     def stop(self):
         self.running = False
-        self.tts.speak("Shutting down. Goodbye, sir.")
-        self.memory.save()
+        if self.pipeline:
+            self.pipeline.stop()
+        self.tts.speak(FAREWELL)
+        self.memory.close()
+        self.ai_engine.close()
         self.tts.cleanup()
-        self.stt.cleanup()
+        if self._stt:
+            self._stt.cleanup()
+        if self.wake_gate:
+            self.wake_gate.cleanup()
+        close_audio_bus()
 
         if self.screen_monitoring_thread and self.screen_monitoring_thread.is_alive():
             self.screen_reader.stop_monitoring()
@@ -74,133 +132,77 @@ class Jarvis:
 
         logger.info("Jarvis has been shut down.")
 
-    def _get_user_input(self):
-        if not self.is_listening:
-            if self.expecting_followup:
-                self.is_listening = True
-                return ""
-
-            if not hasattr(self, 'last_log_time') or time.time() - self.last_log_time > 5:
+    def _build_pipeline(self, source, half_duplex=True):
+        """Capture -> STT -> wake word and commands -> LLM -> TTS, as asyncio stages"""
+        self.pipeline = TurnPipeline(
+            source,
+            transcribe=self._transcribe,
+            route=self._route,
+            generate=self.ai_engine.process_stream,
+            speaker=self.tts,
+            on_reply=self._on_reply,
+            half_duplex=half_duplex,
+        )
+        return self.pipeline
+
+    def _transcribe(self, item):
+        return self.stt.transcribe(item)
+
+    def _on_wake(self):
+        self.is_listening = True
+        logger.info("Wake word detected, listening for command...")
+
+    def _accept(self, text):
+        """Apply the wake word; returns the command to act on, or None"""
+        text = text.strip()
+        if self.expecting_followup:
+            self.is_listening = True
+            self.expecting_followup = False
+        if not text:
+            # Silence ends the conversation until the next wake word
+            if self.is_listening:
                 logger.info("Waiting for wake word...")
-                self.last_log_time = time.time()
-
-            command = self.stt.listen()
-            if command:
-                lower_cmd = command.lower()
-                for wake_word in self.wake_words:
-                    if wake_word in lower_cmd:
-                        parts = lower_cmd.split(wake_word, 1)
-                        if len(parts) > 1:
-                            command = parts[1].strip()
-                            if command:
-                                self.is_listening = True
-                                return command
-                        self.is_listening = True
-                        return ""
-                if self.is_listening:
-                    return command
-            return ""
-
-        logger.info("Listening for command...")
-        self.tts.stop()
-        command = self.stt.listen()
-        if not command:
             self.is_listening = False
-            return ""
-        return command
-
-    def _main_loop(self):
-        last_response = None
-        while self.running:
-            user_input = self._get_user_input()
-            if user_input or self.expecting_followup:
-                if user_input.strip() and user_input != last_response:
-                    response, expecting_followup = self._process_command(user_input)
-                    self.expecting_followup = expecting_followup
-                    if response and response != last_response:
-                        logger.info("Jarvis: %s", response)
-                        self.tts.speak(response)
-                        last_response = response
-            time.sleep(0.1)
+            return None
+        if text == self.last_response:
+            return None
+        if self.is_listening or not self.wake_word_enabled:
+            return text
+
+        lower_cmd = text.lower()
+        for wake_word in self.wake_words:
+            if wake_word in lower_cmd:
+                self.is_listening = True
+                logger.info("Listening for command...")
+                return lower_cmd.split(wake_word, 1)[1].strip() or None
+        return None
+
+    def _is_complete_command(self, text):
+        for wake_word in self.wake_words:
+            if wake_word in text:
+                text = text.split(wake_word, 1)[1]
+        text = text.strip()
+        return bool(text) and self.commands.match(text) is not None
+
+    def _route(self, text):
+        command = self._accept(text)
+        if command is None:
+            return False
+        return self._process_command(command)
+
+    def _on_reply(self, turn):
+        logger.info("Jarvis: %s", turn.reply)
+        if turn.routed_to == "llm":
+            self.memory.add_interaction("jarvis", turn.reply)
+        self.expecting_followup = turn.expecting_followup
+        self.last_response = turn.reply
 
     def _process_command(self, command):
+        """Run a matching command; returns (response, expecting_followup), or None for the LLM"""
         logger.info("User: %s", command)
         self.memory.add_interaction("user", command)
-        lower_cmd = command.lower()
-
-        # Spotify
-        if "spotify" in lower_cmd or "music" in lower_cmd:
-            if "next" in lower_cmd:
-                if self.spotify.next_track():
-                    return "Playing next track, sir.", False
-                return "I couldn't skip to the next track, sir.", False
-            elif "previous" in lower_cmd:
-                if self.spotify.previous_track():
-                    return "Playing previous track, sir.", False
-                return "I couldn't go to the previous track, sir.", False
-            elif "pause" in lower_cmd:
-                if self.spotify.pause():
-                    return "Paused music, sir.", False
-                return "I couldn't pause the music, sir.", False
-            elif "play" in lower_cmd:
-                return "Do you want me to play music on Spotify? Please specify the song name.", True
-            else:
-                words = lower_cmd.split()
-                words = [w for w in words if w not in ["play", "spotify", "music", "on", "the"]]
-                song_name = " ".join(words).strip()
-                if song_name:
-                    if self.spotify.search_and_play(song_name):
-                        return f"Playing {song_name} on Spotify, sir.", False
-                    return f"I couldn't play {song_name}, sir.", False
-                return "Please specify a song name to play.", True
-
-        if "volume" in lower_cmd:
-            try:
-                volume = int(''.join(filter(str.isdigit, lower_cmd)))
-                if self.spotify.set_volume(volume):
-                    return f"Set Spotify volume to {volume}%, sir.", False
-                return "I couldn't set the volume, sir.", False
-            except:
-                return "Please specify a volume level between 0 and 100, sir.", False
-
-        # Screen Reader
-        if "start screen monitoring" in lower_cmd:
-            if self.screen_monitoring_thread and self.screen_monitoring_thread.is_alive():
-                return "Screen monitoring is already running.", False
-            def monitor_callback(screenshot):
-                ocr_text = self.screen_reader.read_text_from_screen()
-                logger.info("Monitored Screen OCR: %s", ocr_text)
-            def monitor():
-                self.screen_reader.monitor_for_changes(callback=monitor_callback)
-            self.screen_monitoring_thread = threading.Thread(target=monitor, daemon=True)
-            self.screen_monitoring_thread.start()
-            return "Continuous screen monitoring started.", False
-
-        if "stop screen monitoring" in lower_cmd:
-            if self.screen_monitoring_thread and self.screen_monitoring_thread.is_alive():
-                self.screen_reader.stop_monitoring()
-                self.screen_monitoring_thread.join()
-                return "Continuous screen monitoring stopped.", False
-            return "Screen monitoring is not running.", False
-
-        # Desktop Control
-        if "open" in lower_cmd or "launch" in lower_cmd or "start" in lower_cmd:
-            words = lower_cmd.split()
-            words = [w for w in words if w not in ["open", "launch", "start", "the", "app", "application"]]
-            app_name = " ".join(words).strip()
-            if not app_name:
-                return "Which application would you like me to open, sir?", True
-            try:
-                self.desktop.open_application(app_name)
-                return f"Opening {app_name} for you, sir.", False
-            except Exception as e:
-                logger.error(f"Error opening application: {str(e)}")
-                return f"I couldn't open {app_name}, sir.", False
-
-        # Default: AI Engine (Phi-3)
-        response = self.ai_engine.process(command)
-        self.memory.add_interaction("jarvis", response)
-        return response, False
+        # Commands (Spotify, screen monitoring, desktop apps)
+        return self.commands.dispatch(command)
 
 
 def signal_handler(sig, frame):
@@ -210,7 +212,34 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 
+def print_report(report):
+    print(f"{report['turns']} turns ({report['commands']} commands, {report['llm']} LLM) "
+          f"in {report['wall_s']:.1f} s: {report['turns_per_s']:.2f} turns/s")
+    for stage in ("transcribe_ms", "route_ms", "first_token_ms", "first_audio_ms", "total_ms"):
+        stats = report[stage]
+        if stats:
+            print(f"  {stage:<15} p50 {stats['p50']:8.1f}  p95 {stats['p95']:8.1f}  max {stats['max']:8.1f}")
+
+
 if __name__ == "__main__":
-    signal.signal(signal.SIGINT, signal_handler)
-    jarvis = Jarvis()
-    jarvis.start()
+    parser = argparse.ArgumentParser(description="Jarvis AI Assistant")
+    parser.add_argument("--headless", action="store_true", help="no microphone or speakers; measure the pipeline")
+    parser.add_argument("--text", help="headless input: file with one utterance per line ('-' for stdin)")
+    parser.add_argument("--wav", nargs="+", help="headless input: WAV files, one utterance each")
+    parser.add_argument("--mock-llm", action="store_true", help="use the offline mock backend instead of a model")
+    args = parser.parse_args()
+
+    if args.headless:
+        if args.wav:
+            source = WavSource(args.wav)
+        else:
+            stream = sys.stdin if not args.text or args.text == "-" else open(args.text, encoding="utf-8")
+            source = TextSource(stream.readlines())
+        jarvis = Jarvis(headless=True, mock_llm=args.mock_llm)
+        report = jarvis.run_headless(source)
+        jarvis.stop()
+        print_report(report)
+    else:
+        signal.signal(signal.SIGINT, signal_handler)
+        jarvis = Jarvis(mock_llm=args.mock_llm)
+        jarvis.start()
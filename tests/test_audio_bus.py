@@ -0,0 +1,113 @@
+"""
+Tests for the shared capture bus: one stream, one resampler per rate, fan-out and metrics.
+"""
+import wave
+import numpy as np
+from interfaces.voice.audio_bus import AudioBus, PolyphaseResampler, WavRecorder
+from interfaces.voice.audio_stream import AudioCapture, WavStream
+
+DEVICE_RATE = 44100
+
+def write_wav(path, segments, rate=DEVICE_RATE):
+    """Write (kind, seconds) segments at the device rate: quiet noise or a loud tone"""
+    rng = np.random.default_rng(0)
+    parts = []
+    for kind, seconds in segments:
+        n = int(seconds * rate)
+        if kind == "tone":
+            parts.append(3000 * np.sin(2 * np.pi * 220 * np.arange(n) / rate))
+        else:
+            parts.append(rng.normal(0, 40, n))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.concatenate(parts).astype(np.int16).tobytes())
+
+def tone(frequency, seconds, rate=DEVICE_RATE):
+    return (10000 * np.sin(2 * np.pi * frequency * np.arange(int(seconds * rate)) / rate)).astype(np.int16)
+
+def test_resampler_keeps_the_band_and_rejects_aliases():
+    """Test 44.1 -> 16 kHz: a 1 kHz tone passes at full level, a 12 kHz tone doesn't fold down"""
+    passed = PolyphaseResampler(DEVICE_RATE, 16000).process(tone(1000, 1.0))[1000:]
+    assert abs(np.sqrt(np.mean(passed.astype(float) ** 2)) - 10000 / np.sqrt(2)) < 200
+    spectrum = np.abs(np.fft.rfft(passed))
+    assert abs(np.argmax(spectrum) * 16000 / len(passed) - 1000) < 5
+
+    aliased = PolyphaseResampler(DEVICE_RATE, 16000).process(tone(12000, 1.0))[1000:]
+    assert np.sqrt(np.mean(aliased.astype(float) ** 2)) < 10  # more than 50 dB down
+
+def test_resampler_streaming_matches_one_shot():
+    """Test that odd block sizes give exactly the samples of a single call"""
+    audio = tone(440, 0.5)
+    whole = PolyphaseResampler(DEVICE_RATE, 16000).process(audio)
+    resampler = PolyphaseResampler(DEVICE_RATE, 16000)
+    sizes = [1, 1023, 7, 4410, 333]
+    blocks, offset, i = [], 0, 0
+    while offset < len(audio):
+        blocks.append(resampler.process(audio[offset:offset + sizes[i % len(sizes)]]))
+        offset += sizes[i % len(sizes)]
+        i += 1
+    assert np.array_equal(np.concatenate(blocks), whole)
+    assert len(whole) == len(audio) * 16000 // DEVICE_RATE
+
+def test_fan_out_resamples_each_rate_once(tmp_path):
+    """Test two 16 kHz subscribers sharing one conversion next to a device-rate one"""
+    path = str(tmp_path / "speech.wav")
+    write_wav(path, [("noise", 0.5), ("tone", 0.5), ("noise", 0.5)])
+    bus = AudioBus(WavStream(path, block_size=1024))
+    pushed = []
+    vad = bus.subscribe("vad", 16000, callback=lambda block, end: pushed.append((block, end)))
+    stt = bus.subscribe("stt", 16000)
+    raw = bus.subscribe("raw")
+    for subscription in (vad, stt, raw):
+        bus.attach(subscription)
+    bus.start()
+    bus._thread.join()
+
+    pulled = []
+    while (block := stt.read(timeout=1)) is not None:
+        pulled.append(block)
+    assert bus.metrics()["resamplers"] == 1
+    assert np.array_equal(np.concatenate(pulled), np.concatenate([b for b, _ in pushed]))
+    assert pushed[0][0] is not pushed[1][0] and pushed[-1][1] == sum(len(b) for b, _ in pushed)
+    assert raw._rate.buffer.end == int(1.5 * DEVICE_RATE)
+
+    metrics = bus.metrics()["subscribers"]
+    assert metrics["stt"]["lag_ms"] == 0 and metrics["stt"]["overruns"] == 0
+    assert metrics["raw"]["lag_ms"] > 1000  # never read
+    assert abs(metrics["vad"]["delivered_s"] - 1.5) < 0.01
+
+def test_slow_subscriber_counts_overruns(tmp_path):
+    """Test that a reader that falls behind the ring skips ahead and reports what it lost"""
+    path = str(tmp_path / "long.wav")
+    write_wav(path, [("noise", 3.0)])
+    bus = AudioBus(WavStream(path, block_size=1024), buffer_seconds=1.0)
+    slow = bus.subscribe("slow", 16000)
+    bus.attach(slow)
+    bus.start()
+    bus._thread.join()
+
+    block = slow.read(timeout=1)
+    metrics = slow.metrics()
+    assert len(block) > 0 and metrics["overruns"] == 1
+    assert abs(metrics["lost_ms"] - 2000) < 100
+
+def test_capture_and_recorder_on_the_bus(tmp_path):
+    """Test AudioCapture slicing an utterance from a bus subscription while it is recorded"""
+    path = str(tmp_path / "command.wav")
+    write_wav(path, [("noise", 1.0), ("tone", 0.6), ("noise", 1.2)])
+    bus = AudioBus(WavStream(path, block_size=1024, realtime=True))
+    recording = str(tmp_path / "recording.wav")
+    recorder = WavRecorder(bus, recording, 16000)  # starts the bus
+    capture = AudioCapture(bus.subscribe("stt", 16000, block_size=512), pre_roll=0.3, pause_threshold=0.8)
+    capture.start()
+
+    utterance = capture.listen(timeout=5)
+    capture.stop()
+    bus.stop()
+    recorder.close()
+    # pre-roll + speech + trailing pause, give or take a read (up to 4 blocks)
+    assert utterance is not None and abs(len(utterance) / 16000 - (0.3 + 0.6 + 0.8)) < 4 * 512 / 16000
+    with wave.open(recording, "rb") as f:
+        assert f.getframerate() == 16000 and f.getnframes() > 16000
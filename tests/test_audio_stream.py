@@ -0,0 +1,79 @@
+"""
+Tests for continuous audio capture with a WAV file standing in for the microphone.
+"""
+import wave
+import numpy as np
+from interfaces.voice.audio_stream import AudioCapture, AudioRingBuffer, WavStream
+
+RATE = 16000
+
+def write_wav(path, segments):
+    """Write (kind, seconds) segments: quiet noise or a loud tone"""
+    rng = np.random.default_rng(0)
+    parts = []
+    for kind, seconds in segments:
+        n = int(seconds * RATE)
+        if kind == "tone":
+            parts.append(3000 * np.sin(2 * np.pi * 220 * np.arange(n) / RATE))
+        elif kind == "loud":
+            parts.append(rng.normal(0, 600, n))
+        else:
+            parts.append(rng.normal(0, 40, n))
+    samples = np.concatenate(parts).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(samples.tobytes())
+
+def test_ring_buffer_wraps():
+    """Test reads across the wrap point and clamping to retained audio"""
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(6, dtype=np.int16))
+    ring.write(np.arange(6, 11, dtype=np.int16))
+    assert ring.start == 3 and ring.end == 11
+    assert ring.read(0, 11).tolist() == [3, 4, 5, 6, 7, 8, 9, 10]
+    assert ring.read(9, 11).tolist() == [9, 10]
+
+def test_utterances_sliced_with_pre_roll(tmp_path):
+    """Test that both utterances are kept even though listen() is called after they were spoken"""
+    path = str(tmp_path / "two_commands.wav")
+    write_wav(path, [("noise", 1.0), ("tone", 0.6), ("noise", 1.2), ("tone", 0.5), ("noise", 1.0)])
+    capture = AudioCapture(WavStream(path), pre_roll=0.3, pause_threshold=0.8)
+    capture.start()
+    capture._thread.join()
+
+    first = capture.listen()
+    second = capture.listen()
+    assert capture.listen(timeout=0.5) is None
+    capture.stop()
+
+    # pre-roll + speech + trailing pause, give or take a block
+    block = 512 / RATE
+    assert abs(len(first) / RATE - (0.3 + 0.6 + 0.8)) < 2 * block
+    assert abs(len(second) / RATE - (0.3 + 0.5 + 0.8)) < 2 * block
+    # The pre-roll is quiet and the speech onset is inside the clip
+    assert np.abs(first[:int(0.25 * RATE)]).max() < 400
+    assert np.abs(first[int(0.35 * RATE):int(0.5 * RATE)]).max() > 2000
+    assert 20 < capture.noise_floor < 80
+
+def test_noise_floor_follows_louder_room(tmp_path):
+    """Test that a lasting rise in noise raises the floor instead of counting as endless speech"""
+    path = str(tmp_path / "fan_on.wav")
+    write_wav(path, [("noise", 1.0), ("loud", 8.0)])
+    capture = AudioCapture(WavStream(path), noise_window=3.0)
+    capture.start()
+    capture._thread.join()
+    capture.stop()
+
+    assert capture.noise_floor > 400
+    assert capture.threshold() > 1200
+    assert not any(is_speech for _, end, is_speech in capture._blocks if end > 6 * RATE)
+
+def test_timeout_without_speech(tmp_path):
+    """Test that silence returns None instead of blocking"""
+    path = str(tmp_path / "quiet.wav")
+    write_wav(path, [("noise", 2.0)])
+    capture = AudioCapture(WavStream(path))
+    assert capture.listen(timeout=1.0) is None
+    capture.stop()
@@ -0,0 +1,58 @@
+"""
+Tests for adaptive endpointing.
+"""
+from interfaces.voice.audio_stream import AudioCapture, WavStream
+from interfaces.voice.endpointing import Endpointer
+from tests.test_audio_stream import write_wav
+
+
+def speak(endpointer, words, gap, frame=0.032):
+    """Feed VAD frames: words of 0.3 s separated by gaps of the given length"""
+    for _ in range(words):
+        for _ in range(int(0.3 / frame)):
+            endpointer.update(True, frame)
+        for _ in range(int(gap / frame)):
+            endpointer.update(False, frame)
+
+
+def test_hangover_follows_speaking_rate():
+    """Test that slow speakers get a longer hang-over and fast ones a shorter one"""
+    slow, fast = Endpointer(), Endpointer()
+    speak(slow, 10, 0.5)
+    speak(fast, 10, 0.12)
+    assert slow.hangover() > 0.8
+    assert fast.hangover() < 0.4
+    assert slow.hangover() <= slow.max_hangover and fast.hangover() >= fast.min_hangover
+
+
+def test_partial_transcript_shifts_hangover():
+    """Test that complete commands end sooner and dangling phrases wait longer"""
+    endpointer = Endpointer(complete_check=lambda text: text == "next track")
+    default = endpointer.hangover()
+    endpointer.set_partial("Next track.")
+    assert endpointer.hangover() == endpointer.min_hangover < default
+    endpointer.set_partial("play something by the")
+    assert endpointer.hangover() == endpointer.max_hangover
+    endpointer.set_partial("tell me a story")
+    assert endpointer.hangover() == default
+    endpointer.reset()
+    assert endpointer.looks_complete() is None
+
+
+def test_long_request_is_not_cut(tmp_path):
+    """Test that a 15 s request with pauses between phrases comes back as one utterance"""
+    path = str(tmp_path / "long.wav")
+    write_wav(path, [("noise", 1.0)] + [("tone", 1.0), ("noise", 0.45)] * 10 + [("noise", 1.5)])
+    endpointer = Endpointer()
+    capture = AudioCapture(WavStream(path), endpointer=endpointer)
+    capture.start()
+    capture._thread.join()
+    utterance = capture.listen()
+    assert capture.listen(timeout=1.0) is None
+    capture.stop()
+
+    assert len(utterance) / 16000 > 14
+    stats = endpointer.stats()
+    assert stats["utterances"] == 1 and stats["reasons"] == {"pause": 1}
+    assert 0.4 < stats["pause_estimate_s"] < 0.5
+    assert stats["endpoint_ms"]["p50"] < 1000
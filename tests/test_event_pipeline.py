@@ -0,0 +1,114 @@
+"""
+Tests for the asyncio turn pipeline.
+"""
+import time
+import wave
+import threading
+import asyncio
+from core.event_pipeline import NullSpeaker, TextSource, TurnPipeline, WavSource
+from core.fake_engine import FakeStreamingEngine
+
+def route(text):
+    if text == "volume 40":
+        return "Set Spotify volume to 40%, sir.", False
+    if text.startswith("ignore"):
+        return False
+    return None
+
+def run(pipeline):
+    try:
+        return asyncio.run(pipeline.run())
+    finally:
+        pipeline.close()
+
+def test_turns_flow_through_every_stage():
+    """Test command and LLM turns reach the speaker in order, with dropped turns skipped"""
+    engine = FakeStreamingEngine({"tell me a joke": "Why did the robot cross the road? It was programmed to."})
+    speaker = NullSpeaker()
+    replies = []
+    pipeline = TurnPipeline(TextSource(["volume 40", "ignore this", "tell me a joke"]), transcribe=None,
+                            route=route, generate=engine.process_stream, speaker=speaker,
+                            on_reply=lambda turn: replies.append((turn.routed_to, turn.reply)))
+    report = run(pipeline)
+
+    assert speaker.sentences == [
+        "Set Spotify volume to 40%, sir.", "Why did the robot cross the road?", "It was programmed to.",
+    ]
+    assert replies == [("command", "Set Spotify volume to 40%, sir."),
+                       ("llm", "Why did the robot cross the road? It was programmed to.")]
+    assert report["turns"] == 2 and report["commands"] == 1 and report["llm"] == 1
+    assert report["first_audio_ms"]["max"] >= 0
+
+class SlowAudioSource:
+    """Yields fake audio items; transcription of each takes a while"""
+
+    def __init__(self, count):
+        self.items = [{"text": f"question {i}"} for i in range(count)]
+
+    def read(self):
+        return self.items.pop(0) if self.items else None
+
+def test_stages_overlap_when_full_duplex():
+    """Test that transcription of the next turn overlaps generation of the previous one"""
+    def transcribe(item):
+        time.sleep(0.05)
+        return item["text"]
+
+    engine = FakeStreamingEngine("Certainly, sir. Here you are.", first_token_delay=0.05)
+    pipeline = TurnPipeline(SlowAudioSource(6), transcribe, route, engine.process_stream, NullSpeaker(),
+                            half_duplex=False)
+    start = time.perf_counter()
+    report = run(pipeline)
+    elapsed = time.perf_counter() - start
+
+    assert report["turns"] == 6
+    # Serial execution would take 6 * (50 + 50) ms
+    assert elapsed < 0.5
+
+def test_wav_source(tmp_path):
+    """Test that WAV files are read as audio items for the transcriber"""
+    path = str(tmp_path / "hello.wav")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\x00\x00" * 1600)
+
+    seen = []
+    def transcribe(item):
+        seen.append((item["sample_rate"], len(item["pcm"])))
+        return "volume 40"
+
+    report = run(TurnPipeline(WavSource([path]), transcribe, route, None, NullSpeaker()))
+    assert seen == [(16000, 3200)]
+    assert report["commands"] == 1
+
+def test_routing_sees_previous_reply_when_full_duplex():
+    """Test that each turn is routed after the previous reply updated the follow-up state"""
+    state = {"followup": False}
+    seen = []
+
+    def route_followup(text):
+        seen.append((text, state["followup"]))
+        return ("Which one, sir?", True) if text == "open" else ("Done, sir.", False)
+
+    def on_reply(turn):
+        time.sleep(0.02)
+        state["followup"] = turn.expecting_followup
+
+    pipeline = TurnPipeline(TextSource(["open", "notes", "open", "calculator"]), None, route_followup, None,
+                            NullSpeaker(), on_reply=on_reply, half_duplex=False)
+    run(pipeline)
+    assert seen == [("open", False), ("notes", True), ("open", False), ("calculator", True)]
+
+def test_capture_reads_on_daemon_threads():
+    """Test that a blocked source read can't keep the process alive at exit"""
+    daemons = []
+
+    class Source(TextSource):
+        def read(self):
+            daemons.append(threading.current_thread().daemon)
+            return super().read()
+
+    run(TurnPipeline(Source(["volume 40"]), None, route, None, NullSpeaker()))
+    assert daemons and all(daemons)
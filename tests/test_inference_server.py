@@ -0,0 +1,120 @@
+"""
+Tests for the shared inference server and its client.
+"""
+import time
+import pytest
+from core.fake_engine import FakeStreamingEngine
+from core.inference_client import SERVER_ERROR_RESPONSE, InferenceClient
+from core.inference_server import FairScheduler, InferenceJob, InferenceServer
+
+class StubMemory:
+    """Minimal memory manager for the client"""
+
+    def get_recent_interactions(self, count=5):
+        return [{"timestamp": "2024-01-01T00:00:00", "speaker": "user", "text": "earlier"}]
+
+    def recall(self, query, k=3, exclude=()):
+        memories = [
+            {"timestamp": "2024-01-01T00:00:00", "speaker": "fact", "text": "The user likes jazz", "score": 0.8},
+            {"timestamp": "2024-01-01T00:00:00", "speaker": "user", "text": "earlier", "score": 0.5},
+        ]
+        return [m for m in memories if m["text"] not in exclude][:k]
+
+@pytest.fixture
+def server():
+    """Serve a fake engine on a free localhost port"""
+    engine = FakeStreamingEngine("Certainly, sir. It is done.")
+    srv = InferenceServer(engine, port=0)
+    srv.start()
+    yield srv
+    srv.stop()
+
+@pytest.fixture
+def client(server):
+    return InferenceClient(StubMemory(), host=server.host, port=server.port, client_id="test")
+
+def test_process_round_trip(client, server):
+    """Test a full reply through the server"""
+    assert client.is_available()
+    assert client.process("do it") == "Certainly, sir. It is done."
+    assert server.engine.calls == ["do it"]
+
+def test_recalled_memories_sent_with_request(client, server):
+    """Test that the client does the recall and the server hands it to the engine"""
+    client.process("play something")
+    list(client.process_stream("play something else"))
+    for recalled in server.engine.recalled:
+        assert [m["text"] for m in recalled] == ["The user likes jazz"]  # "earlier" is already in history
+
+def test_streaming_tokens(client):
+    """Test that tokens arrive as a stream and reassemble into the reply"""
+    tokens = list(client.process_stream("do it"))
+    assert len(tokens) > 1
+    assert "".join(tokens) == "Certainly, sir. It is done."
+
+def test_health_and_metrics(client):
+    """Test the health and latency endpoints"""
+    client.process("one")
+    list(client.process_stream("two"))
+    assert client.health()["status"] == "ok"
+    metrics = client.metrics()
+    assert metrics["requests"] == 1
+    assert metrics["streams"] == 1
+    assert "p95" in metrics["total_ms"]
+    assert "ttft_ms" in metrics
+
+class FailingEngine(FakeStreamingEngine):
+    """Streams one token, then fails"""
+
+    def process_stream(self, text, history=None, recalled=None):
+        yield "Certainly,"
+        raise RuntimeError("out of memory")
+
+def test_stream_error_after_tokens_ends_reply():
+    """Test that a failure mid-stream ends the reply instead of appending the error reply"""
+    srv = InferenceServer(FailingEngine(), port=0)
+    srv.start()
+    try:
+        client = InferenceClient(StubMemory(), host=srv.host, port=srv.port)
+        assert list(client.process_stream("do it")) == ["Certainly,"]
+    finally:
+        srv.stop()
+
+def test_stream_error_before_tokens_gives_error_reply():
+    """Test that a stream that fails before any token yields the error reply"""
+    client = InferenceClient(StubMemory(), host="127.0.0.1", port=1)
+    assert list(client.process_stream("do it")) == [SERVER_ERROR_RESPONSE]
+
+def test_client_disconnect_cancels_generation():
+    """Test that closing a stream early stops generation on the server"""
+    engine = FakeStreamingEngine(" ".join(["word"] * 300), token_delay=0.01)
+    srv = InferenceServer(engine, port=0)
+    srv.start()
+    try:
+        client = InferenceClient(StubMemory(), host=srv.host, port=srv.port)
+        stream = client.process_stream("talk for a while")
+        next(stream)
+        stream.close()
+        deadline = time.time() + 2.5
+        while srv.counters["cancelled"] == 0 and time.time() < deadline:
+            time.sleep(0.02)
+        assert srv.counters["cancelled"] == 1
+        assert srv.scheduler.depth() == 0
+    finally:
+        srv.stop()
+
+def test_unavailable_server():
+    """Test that a missing server is reported as unavailable"""
+    client = InferenceClient(StubMemory(), host="127.0.0.1", port=1)
+    assert not client.is_available(timeout=0.2)
+
+def test_fair_scheduler_round_robin():
+    """Test that a busy client cannot starve another"""
+    scheduler = FairScheduler()
+    for i in range(3):
+        scheduler.submit(InferenceJob("gui", f"gui-{i}"))
+    scheduler.submit(InferenceJob("voice", "voice-0"))
+
+    order = [scheduler.next_job(timeout=0).text for _ in range(4)]
+    assert order == ["gui-0", "voice-0", "gui-1", "gui-2"]
+    assert scheduler.next_job(timeout=0) is None
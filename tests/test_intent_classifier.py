@@ -0,0 +1,84 @@
+"""
+Tests for the offline intent classifier.
+"""
+import time
+import sqlite3
+import pytest
+from core.intent_classifier import IntentClassifier, build_training_set, holdout_report, load_or_train
+from core.intent_dispatcher import IntentDispatcher
+
+EXAMPLES = "config/intent_examples.json"
+
+@pytest.fixture(scope="module")
+def classifier():
+    texts, labels = build_training_set(EXAMPLES)
+    return IntentClassifier().fit(texts, labels)
+
+def test_paraphrased_commands(classifier):
+    """Test that commands the patterns miss are classified, and chat is not"""
+    assert classifier.predict("skip this song")[0] == "spotify.next"
+    assert classifier.predict("turn it down")[0] == "spotify.volume_down"
+    assert classifier.predict("why is the sky blue")[0] is None
+
+def test_prediction_latency(classifier):
+    """Test that a prediction stays well under a millisecond"""
+    classifier.predict("warm up")
+    start = time.perf_counter()
+    for _ in range(200):
+        classifier.predict("could you skip to the next one")
+    assert (time.perf_counter() - start) / 200 < 0.001
+
+def test_save_load_and_evaluate(classifier, tmp_path):
+    """Test the saved model predicts identically and the report has accuracy and latency"""
+    path = str(tmp_path / "intent.npz")
+    classifier.save(path)
+    loaded = load_or_train({"model_path": path, "examples": EXAMPLES, "threshold": 0.6})
+    assert loaded.labels == classifier.labels
+    assert loaded.predict("make it louder") == classifier.predict("make it louder")
+    report = loaded.evaluate(["skip this song", "tell me a joke"], ["spotify.next", "none"])
+    assert report["accuracy"] == 1.0
+    assert report["latency_ms"]["p95"] < 1.0
+
+def test_logged_commands_are_weakly_labeled(tmp_path):
+    """Test that dispatcher-matched user turns in long_term.db join the training set"""
+    db_path = str(tmp_path / "long_term.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE interactions (id INTEGER PRIMARY KEY, timestamp TEXT, speaker TEXT, text TEXT)")
+    conn.executemany("INSERT INTO interactions (speaker, text) VALUES (?, ?)", [
+        ("user", "volume 30"), ("jarvis", "Set Spotify volume to 30%, sir."), ("user", "what's up"),
+    ])
+    conn.commit()
+    conn.close()
+    base_texts, _ = build_training_set(EXAMPLES)
+    texts, labels = build_training_set(EXAMPLES, db_path)
+    assert texts[len(base_texts):] == ["volume 30"]
+    assert labels[-1] == "spotify.volume"
+
+def test_dispatcher_falls_back_to_classifier(classifier):
+    """Test that the dispatcher runs the classified intent's handler when no pattern matches"""
+    dispatcher = IntentDispatcher(classifier=classifier)
+    dispatcher.register("spotify.next", ["next track"], lambda slots: ("Playing next track, sir.", False))
+    assert dispatcher.dispatch("skip this song") == ("Playing next track, sir.", False)
+    assert dispatcher.dispatch("tell me about volcanoes") is None
+
+def test_held_out_false_actions():
+    """Test that chat is rarely executed as a command on examples the model never saw"""
+    texts, labels = build_training_set(EXAMPLES)
+    report, held_out = holdout_report(texts, labels, 0.75)
+    assert held_out > 50
+    assert report["false_action_rate"] < 0.03
+    assert report["per_intent"]["spotify.play"]["recall"] > 0
+
+def test_near_miss_chat_is_not_a_command(classifier):
+    """Test requests that share words with commands but aren't any"""
+    for text in ["could you stop", "stop asking questions", "open the pod bay doors hal"]:
+        assert classifier.predict(text)[0] is None, text
+
+def test_classifier_fallback_keeps_slots(classifier):
+    """Test that volume levels and song names survive the classifier fallback"""
+    dispatcher = IntentDispatcher(classifier=classifier)
+    dispatcher.register("spotify.volume", ["volume {level?:int}"], lambda slots: slots)
+    dispatcher.register("spotify.play", ["play {song?} on spotify"], lambda slots: slots,
+                        strip_words={"play", "spotify", "music", "on", "the"})
+    assert dispatcher.dispatch("turn the sound to 30") == {"level": 30}
+    assert dispatcher.dispatch("put on some radiohead") == {"song": "radiohead"}
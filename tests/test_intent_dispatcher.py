@@ -0,0 +1,89 @@
+"""
+Tests for the compiled intent dispatcher and the command modules.
+"""
+from core.commands import register_all
+from core.intent_dispatcher import IntentDispatcher
+
+class StubSpotify:
+    def __init__(self):
+        self.actions = []
+
+    def next_track(self):
+        self.actions.append("next")
+        return True
+
+    def previous_track(self):
+        self.actions.append("previous")
+        return True
+
+    def pause(self):
+        self.actions.append("pause")
+        return True
+
+    def search_and_play(self, song):
+        self.actions.append(("play", song))
+        return True
+
+    def set_volume(self, level):
+        self.actions.append(("volume", level))
+        return True
+
+class StubDesktop:
+    def __init__(self):
+        self.opened = []
+
+    def open_application(self, name):
+        self.opened.append(name)
+
+class StubJarvis:
+    def __init__(self):
+        self.spotify = StubSpotify()
+        self.desktop = StubDesktop()
+        self.screen_reader = None
+        self.screen_monitoring_thread = None
+
+def make_dispatcher():
+    jarvis = StubJarvis()
+    return register_all(IntentDispatcher(), jarvis), jarvis
+
+def test_slot_extraction():
+    """Test song, app and volume slots"""
+    dispatcher, _ = make_dispatcher()
+    match = dispatcher.match("Play Bohemian Rhapsody on Spotify")
+    assert match.name == "spotify.play" and match.slots == {"song": "bohemian rhapsody"}
+    match = dispatcher.match("please open the visual studio code app")
+    assert match.name == "desktop.open" and match.slots == {"app": "visual studio code"}
+    assert dispatcher.match("set the volume to 40 percent").slots == {"level": 40}
+
+def test_specific_intents_win_over_generic_ones():
+    """Test the ordering problems of the old substring chain"""
+    dispatcher, jarvis = make_dispatcher()
+    assert dispatcher.match("music volume 40").name == "spotify.volume"
+    assert dispatcher.match("start screen monitoring").name == "screen.start_monitoring"
+    assert dispatcher.match("open spotify").name == "desktop.open"
+    assert dispatcher.match("skip to the next song on spotify").name == "spotify.next"
+    dispatcher.dispatch("music volume 40")
+    assert jarvis.spotify.actions == [("volume", 40)]
+
+def test_followups_and_fallthrough():
+    """Test missing slots asking a follow-up and chat falling through to the LLM"""
+    dispatcher, _ = make_dispatcher()
+    assert dispatcher.dispatch("open") == ("Which application would you like me to open, sir?", True)
+    assert dispatcher.dispatch("play music")[1] is True
+    assert dispatcher.dispatch("what's the capital of France") is None
+
+def test_registration_and_overlapping_literals():
+    """Test decorator registration and literals that share a prefix"""
+    dispatcher = IntentDispatcher()
+
+    @dispatcher.intent("lights.on", ["turn on * lights", "lights on"])
+    def lights_on(slots):
+        return "on", False
+
+    @dispatcher.intent("lights.dim", ["dim * lights to {level:int}"])
+    def lights_dim(slots):
+        return f"dim {slots['level']}", False
+
+    assert dispatcher.dispatch("could you turn on the kitchen lights") == ("on", False)
+    assert dispatcher.dispatch("dim the lights to 30") == ("dim 30", False)
+    assert dispatcher.match("dim the lights") is None
@@ -0,0 +1,73 @@
+"""
+Tests for the NumPy keyword spotter on synthetic vowel-sequence "words".
+"""
+import time
+import numpy as np
+from interfaces.voice.keyword_spotter import KeywordSpotter
+from interfaces.voice.wake_word import WakeWordDetector
+
+RATE = 16000
+FORMANTS = {"a": (730, 1090), "i": (270, 2290), "u": (300, 870), "e": (530, 1840), "o": (570, 840)}
+
+
+def word(vowels, seed):
+    """Formant-shaped harmonics, 180 ms per vowel, with random tempo, pitch and noise"""
+    rng = np.random.default_rng(seed)
+    tempo, pitch = rng.uniform(0.9, 1.1), rng.uniform(100, 140)
+    parts = []
+    for vowel in vowels:
+        t = np.arange(int(0.18 / tempo * RATE)) / RATE
+        f1, f2 = FORMANTS[vowel]
+        harmonics = np.arange(1, int(4000 / pitch)) * pitch
+        gains = np.exp(-((harmonics - f1) / 120) ** 2) + 0.7 * np.exp(-((harmonics - f2) / 160) ** 2) + 0.02
+        parts.append((gains[:, None] * np.sin(2 * np.pi * harmonics[:, None] * t)).sum(axis=0))
+    speech = np.concatenate(parts)
+    speech *= 6000 / np.abs(speech).max()
+    pad = np.zeros(int(0.4 * RATE))
+    audio = np.concatenate([pad, speech, pad])
+    return (audio + rng.normal(0, 100, len(audio))).astype(np.int16)
+
+
+def detections(spotter, audio):
+    spotter.reset()
+    frames = [audio[i:i + 512] for i in range(0, len(audio) - 511, 512)] + [np.zeros(512, np.int16)] * 4
+    return sum(spotter.process(frame) >= 0 for frame in frames)
+
+
+def test_enrolled_keyword_detected_once_and_others_rejected():
+    """Test detection of new utterances of the keyword and silence for other words"""
+    spotter = KeywordSpotter().enroll([word("aiu", seed) for seed in range(5)])
+    for seed in range(100, 110):
+        assert detections(spotter, word("aiu", seed)) == 1
+    for seed, other in enumerate(["iau", "uai", "aeo", "oia", "eiu", "uiu"]):
+        assert detections(spotter, word(other, 200 + seed)) == 0
+
+
+def test_streaming_cost_is_small():
+    """Test that 10 s of audio takes well under 5% of a core"""
+    spotter = KeywordSpotter().enroll([word("aiu", seed) for seed in range(5)])
+    audio = np.concatenate([word("aiu", 300), word("oea", 301)] * 4 + [np.zeros(RATE, np.int16)])
+    audio = np.tile(audio, int(np.ceil(10 * RATE / len(audio))))[:10 * RATE]
+    start = time.thread_time()
+    detections(spotter, audio)
+    assert time.thread_time() - start < 0.05 * 10
+
+
+def test_detector_loads_enrolled_templates(tmp_path):
+    """Test that WakeWordDetector uses saved templates and its listen() sees the keyword"""
+    path = str(tmp_path / "wake_word.npz")
+    KeywordSpotter().enroll([word("aiu", seed) for seed in range(5)]).save(path)
+    detector = WakeWordDetector(sensitivity=0.5, model_path=path)
+    assert isinstance(detector.engine, KeywordSpotter)
+
+    audio = np.concatenate([word("aiu", 400), np.zeros(2048, np.int16)])
+    for i in range(0, len(audio), 1000):
+        detector.process(audio[i:i + 1000], i + len(audio[i:i + 1000]))
+    assert detector.listen(timeout=0)
+    assert not detector.listen(timeout=0)
+
+def test_detector_without_templates_or_access_key(tmp_path, monkeypatch):
+    """Test that Porcupine is not tried without PICOVOICE_ACCESS_KEY"""
+    monkeypatch.delenv("PICOVOICE_ACCESS_KEY", raising=False)
+    detector = WakeWordDetector(model_path=str(tmp_path / "missing.npz"))
+    assert not detector.available
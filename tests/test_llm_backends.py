@@ -0,0 +1,57 @@
+"""
+Tests for the LLM backend registry and fallback router.
+"""
+import pytest
+from core.fake_engine import MockBackend
+from core.llm_backends import (
+    BackendUnavailable, FallbackRouter, available_backends, build_engine, create_backend
+)
+
+def test_registry_builds_mock_backend():
+    """Test creating a backend by name and skipping unknown ones"""
+    assert {"phi3", "openai", "mock"} <= set(available_backends())
+    backend = create_backend("mock", None, replies="Hello, sir.")
+    assert backend.process("hi") == "Hello, sir."
+    with pytest.raises(BackendUnavailable):
+        create_backend("nonexistent", None)
+
+def test_build_engine_skips_unavailable(monkeypatch):
+    """Test that a chain with one usable backend returns that backend directly"""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    engine = build_engine(None, {"chain": ["openai", "mock"], "options": {"mock": {"replies": "Yes, sir."}}})
+    assert isinstance(engine, MockBackend)
+
+def test_failover_on_error():
+    """Test that a failing primary falls over to the next backend"""
+    primary = MockBackend("primary", replies="primary", fail_every=1)
+    secondary = MockBackend("secondary", replies="secondary")
+    router = FallbackRouter([primary, secondary], timeout=1.0)
+    assert router.process("hi") == "secondary"
+    stats = router.get_stats()
+    assert stats["primary"]["failures"] == 1
+    assert stats["secondary"]["wins"] == 1
+
+def test_timeout_falls_over_to_faster_backend():
+    """Test that a slow primary is overtaken once its latency budget runs out"""
+    primary = MockBackend("primary", replies="slow", latencies=[0.5])
+    secondary = MockBackend("secondary", replies="fast")
+    router = FallbackRouter([primary, secondary], timeout=0.05)
+    assert router.process("hi") == "fast"
+    assert router.get_stats()["secondary"]["timeouts"] == 1
+
+def test_hedge_fires_after_p95_delay():
+    """Test that hedging starts the backup after the primary's usual latency"""
+    primary = MockBackend("primary", replies="primary", latencies=[0.01] * 5 + [0.5])
+    secondary = MockBackend("secondary", replies="backup")
+    router = FallbackRouter([primary, secondary], timeout=5.0, hedge=True, min_samples=5)
+    for _ in range(5):
+        assert router.process("hi") == "primary"
+    assert router.process("hi") == "backup"
+    stats = router.get_stats()
+    assert stats["secondary"]["hedges"] == 1
+    assert stats["primary"]["wins"] == 5
+
+def test_all_backends_failing():
+    """Test the spoken apology when nothing can answer"""
+    router = FallbackRouter([MockBackend("a", fail_every=1), MockBackend("b", fail_every=1)])
+    assert router.process("hi") == router.failure_reply
@@ -0,0 +1,267 @@
+"""
+Tests for the Memory Manager module.
+"""
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import pytest
+from core.memory_journal import ShortTermJournal
+from core.memory_manager import MemoryManager
+
+@pytest.fixture
+def memory(tmp_path):
+    """Create a MemoryManager backed by a temporary directory"""
+    manager = MemoryManager(memory_dir=str(tmp_path))
+    yield manager
+    manager.close()
+
+def test_interactions_are_batched_and_persisted(memory):
+    """Test that queued interactions reach the database after a flush"""
+    for i in range(20):
+        memory.add_interaction("user", f"Message {i}")
+    memory.save()
+
+    conn = sqlite3.connect(memory.long_term_db)
+    count = conn.execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+    conn.close()
+
+    assert count == 20
+    metrics = memory.get_metrics()
+    assert metrics["statements"] == 20
+    assert metrics["batches"] <= 20
+    assert metrics["queue_depth"] == 0
+
+def test_database_uses_wal(memory):
+    """Test that the long-lived connection runs in WAL mode"""
+    mode = memory.db.query("PRAGMA journal_mode")[0][0]
+    assert mode.lower() == "wal"
+
+def test_search_sees_queued_writes(memory):
+    """Test that searching flushes pending writes first"""
+    memory.add_interaction("user", "Remember the blue notebook")
+    results = memory.search_memory("notebook")
+    assert len(results) == 1
+    assert results[0]["text"] == "Remember the blue notebook"
+
+def test_preferences_and_facts(memory, tmp_path):
+    """Test preference and fact writes survive close"""
+    memory.save_user_preference("units", "metric")
+    memory.learn_fact("The user likes jazz")
+    memory.close()
+
+    conn = sqlite3.connect(str(tmp_path / "long_term.db"))
+    assert conn.execute("SELECT value FROM user_preferences WHERE key='units'").fetchone()[0] == '"metric"'
+    assert conn.execute("SELECT fact FROM learned_facts").fetchone()[0] == "The user likes jazz"
+    conn.close()
+
+def test_short_term_memory_recovers_from_journal(tmp_path):
+    """Test that interactions written only to the journal survive a restart"""
+    memory = MemoryManager(memory_dir=str(tmp_path))
+    memory.add_interaction("user", "Hello")
+    memory.add_interaction("jarvis", "Good evening, sir.")
+    memory.save_user_preference("voice", "ryan")
+    memory.db.close()  # simulate a crash: no snapshot compaction
+
+    restored = MemoryManager(memory_dir=str(tmp_path))
+    texts = [i["text"] for i in restored.get_recent_interactions(5)]
+    assert texts == ["Hello", "Good evening, sir."]
+    assert restored.get_user_preference("voice") == "ryan"
+    restored.close()
+
+def test_torn_journal_line_is_ignored(tmp_path):
+    """Test that a truncated trailing journal entry does not break recovery"""
+    memory = MemoryManager(memory_dir=str(tmp_path))
+    memory.add_interaction("user", "First")
+    memory.db.close()
+    with open(memory.journal.journal_path, "a") as f:
+        f.write('{"op":"append","path":"interac')
+
+    restored = MemoryManager(memory_dir=str(tmp_path))
+    assert [i["text"] for i in restored.get_recent_interactions(5)] == ["First"]
+    restored.close()
+
+def test_compaction_writes_snapshot_and_truncates_journal(tmp_path):
+    """Test that saving folds the journal into the JSON snapshot"""
+    memory = MemoryManager(memory_dir=str(tmp_path))
+    for i in range(60):
+        memory.add_interaction("user", f"Message {i}")
+    memory.save()
+
+    with open(memory.short_term_file) as f:
+        snapshot = json.load(f)
+    assert len(snapshot["interactions"]) == 50
+    assert snapshot["interactions"][-1]["text"] == "Message 59"
+    assert open(memory.journal.journal_path).read() == ""
+    memory.close()
+
+def test_journal_shared_between_processes_keeps_every_entry(tmp_path):
+    """Test that two journals on one snapshot get unique seqs and a compaction keeps the other's appends"""
+    path = str(tmp_path / "short_term.json")
+    first = ShortTermJournal(path, {"items": []})
+    second = ShortTermJournal(path, {"items": []})
+    first.append("items", "a")
+    second.append("items", "b")
+    first.compact()  # folds in b, which it never wrote
+    second.append("items", "c")
+    first.append("items", "d")
+    second.close()  # must not write a snapshot without d
+    first.close()
+
+    with open(path) as f:
+        snapshot = json.load(f)
+    assert snapshot["items"] == ["a", "b", "c", "d"]
+    assert snapshot["journal_seq"] == 4
+    assert ShortTermJournal(path, {"items": []}).state["items"] == ["a", "b", "c", "d"]
+
+def test_journal_concurrent_writer_processes(tmp_path):
+    """Test that entries from several processes survive each other's compactions"""
+    path = str(tmp_path / "short_term.json")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        "import sys\n"
+        "from core.memory_journal import ShortTermJournal\n"
+        "journal = ShortTermJournal(sys.argv[1], {'items': []}, compact_every=7)\n"
+        "for i in range(40):\n"
+        "    journal.append('items', sys.argv[2] + str(i))\n"
+        "journal.close()\n"
+    )
+    writers = [
+        subprocess.Popen([sys.executable, "-c", script, path, name], cwd=root)
+        for name in ("p", "q", "r")
+    ]
+    assert all(w.wait(timeout=60) == 0 for w in writers)
+
+    items = ShortTermJournal(path, {"items": []}).state["items"]
+    assert sorted(items) == sorted(f"{name}{i}" for name in "pqr" for i in range(40))
+    for name in "pqr":
+        assert [x for x in items if x[0] == name] == [f"{name}{i}" for i in range(40)]
+
+def test_full_text_search_modes(memory):
+    """Test BM25, phrase, prefix and time-range searches"""
+    memory.add_interaction("user", "Play some jazz music")
+    memory.add_interaction("jarvis", "Playing jazz on Spotify, sir.")
+    memory.add_interaction("user", "Open the notebook application")
+
+    assert {r["text"] for r in memory.search_memory("jazz")} == {
+        "Play some jazz music", "Playing jazz on Spotify, sir."
+    }
+    assert [r["text"] for r in memory.search_memory("jazz music", mode="phrase")] == ["Play some jazz music"]
+    assert [r["text"] for r in memory.search_memory("note", mode="prefix")] == ["Open the notebook application"]
+    assert memory.search_memory("jazz", since="2999-01-01") == []
+    assert len(memory.search_memory('jazz" (*')) == 2
+
+def test_fact_search_time_range(memory):
+    """Test that fact search honours since/until like interaction search"""
+    memory.learn_fact("The user owns a telescope")
+    memory.db.execute("INSERT INTO learned_facts (fact, source, timestamp) VALUES (?, ?, ?)",
+                      ("The user sold the old telescope", "user", "2024-01-01T00:00:00"))
+
+    assert len(memory.search_facts("telescope")) == 2
+    assert [r["fact"] for r in memory.search_facts("telescope", since="2025-01-01")] == ["The user owns a telescope"]
+    assert [r["fact"] for r in memory.search_facts("telescope", until="2024-12-31")] == [
+        "The user sold the old telescope"
+    ]
+    assert memory.search_facts("telescope", since="2999-01-01") == []
+
+def test_fts_backfill_for_existing_database(tmp_path):
+    """Test that rows written before the index existed become searchable"""
+    conn = sqlite3.connect(str(tmp_path / "long_term.db"))
+    conn.execute("CREATE TABLE interactions (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, speaker TEXT, text TEXT)")
+    conn.execute("CREATE TABLE learned_facts (id INTEGER PRIMARY KEY AUTOINCREMENT, fact TEXT, source TEXT, timestamp TEXT)")
+    conn.execute("INSERT INTO interactions (timestamp, speaker, text) VALUES ('2024-01-01T00:00:00', 'user', 'legacy telescope question')")
+    conn.execute("INSERT INTO learned_facts (fact, source, timestamp) VALUES ('The user owns a telescope', 'user', '2024-01-01T00:00:00')")
+    conn.commit()
+    conn.close()
+
+    memory = MemoryManager(memory_dir=str(tmp_path))
+    assert [r["text"] for r in memory.search_memory("telescope")] == ["legacy telescope question"]
+    assert [r["fact"] for r in memory.search_facts("telescope")] == ["The user owns a telescope"]
+    memory.close()
+
+def test_semantic_recall(memory):
+    """Test that related earlier interactions are recalled and exclusions apply"""
+    memory.add_interaction("user", "My dentist appointment is on Friday afternoon")
+    memory.add_interaction("user", "Play some jazz music")
+    memory.learn_fact("The user's sister is called Emma")
+
+    recalled = memory.recall("when is my dentist appointment", k=1)
+    assert recalled[0]["text"] == "My dentist appointment is on Friday afternoon"
+    assert memory.recall("what is my sister called", k=1)[0]["speaker"] == "fact"
+    recalled = memory.recall("Play some jazz music", exclude=["Play some jazz music"], k=3)
+    assert all(r["text"] != "Play some jazz music" for r in recalled)
+
+def test_semantic_index_backfills_existing_memory(tmp_path):
+    """Test that a fresh semantic index is built from long_term.db"""
+    memory = MemoryManager(memory_dir=str(tmp_path))
+    memory.add_interaction("user", "The garage code is 4321")
+    memory.close()
+    shutil.rmtree(tmp_path / "semantic")
+
+    restored = MemoryManager(memory_dir=str(tmp_path))
+    restored.add_interaction("user", "The shed code is 1234")  # while the backfill may still run
+    restored.wait_for_indexing()
+    assert restored.recall("garage code", k=1)[0]["text"] == "The garage code is 4321"
+    assert len(restored.semantic_index) == 2  # nothing indexed twice
+    restored.close()
+
+def test_semantic_backfill_resumes_after_interruption(tmp_path):
+    """Test that a backfill cut short carries on from its recorded progress instead of stopping for good"""
+    from core.semantic_index import SemanticIndex
+    texts = [f"Reminder number {i} about the {word}" for i, word in enumerate(["boiler", "car", "dog", "roof", "bank"])]
+    memory = MemoryManager(memory_dir=str(tmp_path))
+    for text in texts:
+        memory.add_interaction("user", text)
+    memory.close()
+    shutil.rmtree(tmp_path / "semantic")
+
+    # A previous run indexed the first two rows, then died
+    index = SemanticIndex(str(tmp_path / "semantic"))
+    index.add_many([(text, {"speaker": "user"}) for text in texts[:2]])
+    index.close()
+    with open(tmp_path / "semantic" / "backfill.json", "w") as f:
+        json.dump({"interactions": [2, 5], "learned_facts": [0, 0]}, f)
+
+    restored = MemoryManager(memory_dir=str(tmp_path))
+    restored.wait_for_indexing()
+    assert len(restored.semantic_index) == 5
+    assert restored.recall("the roof", k=1)[0]["text"] == texts[3]
+    with open(tmp_path / "semantic" / "backfill.json") as f:
+        assert json.load(f)["interactions"] == [5, 5]
+    restored.close()
+
+def test_semantic_index_shared_between_processes(tmp_path):
+    """Test that two handles on one index keep the row files aligned and see each other's rows"""
+    from core.semantic_index import SemanticIndex
+    path = str(tmp_path / "semantic")
+    first = SemanticIndex(path, train_size=64)
+    second = SemanticIndex(path, train_size=64)
+    first.add_many([(f"seed note {i} on topic {i % 5}", None) for i in range(100)])
+    first._retrain_thread.join()  # clustered in the first handle only
+
+    for i in range(20):
+        (first if i % 2 else second).add(f"shared entry {i} mentioning kiwi{i}")
+    assert second.search("kiwi7", k=1)[0]["text"] == "shared entry 7 mentioning kiwi7"
+    assert first.search("kiwi8", k=1)[0]["text"] == "shared entry 8 mentioning kiwi8"
+    first.close()
+    second.close()
+
+    reopened = SemanticIndex(path)
+    assert len(reopened) == 120
+    for i in range(20):
+        assert reopened.search(f"kiwi{i}", k=1)[0]["text"] == f"shared entry {i} mentioning kiwi{i}"
+    reopened.close()
+
+def test_semantic_index_batch_add(tmp_path):
+    """Test that add_many assigns consecutive rows, skips blanks and is searchable like add"""
+    from core.semantic_index import SemanticIndex
+    index = SemanticIndex(str(tmp_path / "semantic"))
+    assert index.add("Water the plants on Sunday") == 0
+    rows = index.add_many([("Buy milk and eggs", {"speaker": "user"}), ("   ", None), ("Call the plumber", None)])
+    assert rows == [1, None, 2]
+    best = index.search("milk", k=1)[0]
+    assert (best["text"], best["speaker"]) == ("Buy milk and eggs", "user")
+    assert index.search("plumber", k=1)[0]["text"] == "Call the plumber"
+    index.close()
@@ -0,0 +1,83 @@
+"""
+Tests for cascaded model routing.
+"""
+from core.fake_engine import MockBackend
+from core.model_router import CascadeRouter, ComplexityScorer, build_cascade, reply_confidence
+
+def test_complexity_scoring():
+    """Test that small talk, short questions and reasoning requests score in order"""
+    scorer = ComplexityScorer()
+    assert scorer.score("Thank you, Jarvis!") == (0.0, "thanks")
+    easy, _ = scorer.score("what is the capital of France")
+    hard, intent = scorer.score("Explain why the sky is blue and compare it with sunsets, in detail")
+    assert intent is None
+    assert easy <= 0.35 < hard
+
+def test_templates_match_filler_and_wake_word():
+    """Test that templates see the words normalize_query would strip"""
+    scorer = ComplexityScorer()
+    for text, intent in [("Hi there!", "greeting"), ("hey there, Jarvis", "greeting"), ("Hey Jarvis", "greeting"),
+                         ("Ok.", "acknowledge"), ("okay", "acknowledge"), ("ok thanks", "thanks"),
+                         ("Good morning, Jarvis", "greeting"), ("How's it going?", "how_are_you")]:
+        assert scorer.score(text) == (0.0, intent), text
+    assert scorer.template_intent("hi there what is the capital of France") is None
+
+def test_time_questions_answered_from_the_clock():
+    """Test that time and date questions never reach a model, and other time-sensitive ones skip the small one"""
+    small = MockBackend("small", replies="It is 3 PM, sir.")
+    large = MockBackend("large", replies="I can't check the weather, sir.")
+    router = CascadeRouter(large, small)
+    for text, intent in [("What time is it?", "time"), ("what's the time, Jarvis", "time"),
+                         ("What's the date today?", "date"), ("what day is it", "date")]:
+        reply = router.process(text)
+        assert router.last_route == {"tier": "template", "intent": intent, "complexity": 0.0}
+        assert reply.startswith("It's" if intent == "time" else "Today is")
+    assert router.process("what is the weather") == "I can't check the weather, sir."
+    assert router.last_route["tier"] == "large"
+    assert small.calls == []
+
+def test_reply_confidence():
+    """Test the heuristics that decide escalation"""
+    assert reply_confidence("capital of France?", "Paris, sir.") >= 0.6
+    assert reply_confidence("who won the 1954 world cup", "I'm not sure, sir.") < 0.6
+    assert reply_confidence("tell me a fact", "The tallest mountain on Earth is") < 0.8
+
+def test_tiers_and_stats():
+    """Test template, small and large routing with escalation on low confidence"""
+    small = MockBackend("small", replies={"what is the capital of France": "Paris, sir.",
+                                          "who painted the ceiling": "I don't know, sir."})
+    large = MockBackend("large", replies="The Sistine Chapel ceiling was painted by Michelangelo, sir.",
+                        latencies=[0.02])
+    router = CascadeRouter(large, small)
+
+    assert router.process("thanks") in ("You're welcome, sir.", "My pleasure, sir.", "Anytime, sir.")
+    assert router.last_route["tier"] == "template"
+    assert router.process("what is the capital of France") == "Paris, sir."
+    assert router.last_route["tier"] == "small"
+    assert "Michelangelo" in router.process("who painted the ceiling")
+    assert router.last_route["tier"] == "large"
+    assert large.calls == ["who painted the ceiling"]
+
+    stats = router.get_stats()
+    assert stats["turns"] == 3
+    assert stats["tiers"]["small"]["escalated"] == 1
+    assert stats["tiers"]["template"]["hit_rate"] == 1 / 3
+    assert stats["estimated_saved_ms"] > 0
+
+def test_hard_turns_skip_small_model():
+    """Test that complex requests go straight to the large model"""
+    small = MockBackend("small")
+    router = CascadeRouter(MockBackend("large", replies="Certainly, sir."), small)
+    router.process("Write a detailed plan to migrate my database, and explain the trade-offs")
+    assert small.calls == []
+
+def test_missing_small_model_disables_tier(monkeypatch, tmp_path):
+    """Test that the cascade runs without the small tier when its model file is missing"""
+    large = MockBackend("large", replies="Certainly, sir.")
+    monkeypatch.setattr("core.model_router.build_engine", lambda memory_manager: large)
+    router = build_cascade(None, {
+        "small_backend": "phi3-small",
+        "small_options": {"model_path": str(tmp_path / "missing.gguf")},
+    })
+    assert router.small is None
+    assert router.process("what is the capital of France") == "Certainly, sir."
@@ -0,0 +1,78 @@
+"""
+Tests for the llama.cpp prompt state cache.
+"""
+import os
+import pytest
+from core.prompt_cache import PromptStateCache, model_fingerprint
+
+class FakeState:
+    """Stand-in for llama_cpp.LlamaState"""
+
+    def __init__(self, name, size=100):
+        self.name = name
+        self.llama_state_size = size
+
+SYSTEM = list(range(100))
+
+def test_longest_prefix_hit():
+    """Test that the entry sharing the longest prefix is returned"""
+    cache = PromptStateCache(min_prefix_tokens=16)
+    cache[SYSTEM] = FakeState("system")
+    cache[SYSTEM + [500, 501, 502]] = FakeState("turn1")
+
+    assert cache[SYSTEM + [500, 501, 999]].name == "turn1"
+    assert cache[SYSTEM + [777]].name in ("system", "turn1")
+    assert cache.get_stats()["hits"] == 2
+    assert cache.reused_tokens >= 2 * 100
+
+def test_short_prefix_is_a_miss():
+    """Test that tiny shared prefixes don't count as hits"""
+    cache = PromptStateCache(min_prefix_tokens=16)
+    cache[SYSTEM] = FakeState("system")
+    with pytest.raises(KeyError):
+        cache[list(range(5)) + [999] * 50]
+    assert [1, 2, 3] not in cache
+    assert cache.hit_rate == 0.0
+
+def test_capacity_evicts_least_recently_used():
+    """Test that RAM usage stays bounded"""
+    cache = PromptStateCache(capacity_bytes=250, min_prefix_tokens=1)
+    cache[[1] * 20] = FakeState("a")
+    cache[[2] * 20] = FakeState("b")
+    cache[[1] * 20 + [3]]  # touch "a"
+    cache[[3] * 20] = FakeState("c")
+
+    assert cache.cache_size <= 250
+    assert cache[[1] * 20].name == "a"
+    with pytest.raises(KeyError):
+        cache[[2] * 20]
+
+def test_persist_and_reload(tmp_path):
+    """Test that persisted states survive a restart and load lazily"""
+    cache = PromptStateCache(cache_dir=str(tmp_path), persist_entries=1)
+    cache[SYSTEM] = FakeState("old")
+    cache[SYSTEM + [1, 2]] = FakeState("recent")
+    cache.persist()
+
+    reloaded = PromptStateCache(cache_dir=str(tmp_path))
+    assert reloaded.cache_size == 0
+    assert reloaded[SYSTEM + [1, 2, 3]].name == "recent"
+    assert reloaded.get_stats()["entries"] == 1
+
+def test_persisted_states_from_another_model_are_discarded(tmp_path):
+    """Test that a changed model fingerprint drops the persisted states"""
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"weights")
+    cache_dir = str(tmp_path / "cache")
+    cache = PromptStateCache(cache_dir=cache_dir, fingerprint=model_fingerprint(str(model), 4096))
+    cache[SYSTEM] = FakeState("state")
+    cache.persist()
+
+    same = PromptStateCache(cache_dir=cache_dir, fingerprint=model_fingerprint(str(model), 4096))
+    assert same.get_stats()["entries"] == 1
+
+    other_ctx = PromptStateCache(cache_dir=cache_dir, fingerprint=model_fingerprint(str(model), 2048))
+    assert other_ctx.get_stats()["entries"] == 0
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".pkl")]
+    with pytest.raises(KeyError):
+        other_ctx[SYSTEM]
@@ -0,0 +1,92 @@
+"""
+Tests for the prompt packer.
+"""
+import pytest
+from core.prompt_packer import HistoryWindow, PromptPacker, TokenCounter
+
+def word_tokenize(text):
+    """One token per whitespace-separated word"""
+    return text.split()
+
+@pytest.fixture
+def packer():
+    """Create a packer with a tiny context window"""
+    return PromptPacker(TokenCounter(word_tokenize), context_window=60, reserve_tokens=10, message_overhead=1)
+
+def _turn(speaker, text):
+    return {"timestamp": "2024-01-01T00:00:00", "speaker": speaker, "text": text}
+
+def test_everything_fits(packer):
+    """Test that small prompts keep every section in order"""
+    history = [_turn("user", "hello there"), _turn("jarvis", "good evening sir")]
+    recalled = [{"speaker": "fact", "text": "user likes jazz"}]
+    messages, report = packer.pack("be brief", "play music", history, recalled)
+
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "system", "user"]
+    assert messages[-1]["content"] == "play music"
+    assert messages[0]["content"] == "be brief"  # unchanged, so it stays a cached prefix
+    assert "user likes jazz" in messages[-2]["content"]
+    assert report["dropped"] == 0
+    assert report["total"] <= report["budget"]
+
+def test_long_history_entry_is_truncated_and_older_dropped(packer):
+    """Test that an oversized stored answer is cut instead of overflowing"""
+    listing = " ".join(f"line{i}" for i in range(200))
+    history = [_turn("user", "old question"), _turn("jarvis", listing)]
+    messages, report = packer.pack("be brief", "and then?", history)
+
+    assert report["total"] <= report["budget"]
+    assert messages[1]["content"].endswith("...")
+    assert report["truncated"] == 1
+    assert report["dropped"] == 1
+    assert all(m["content"] != "old question" for m in messages)
+
+def test_recalled_memory_has_lowest_priority(packer):
+    """Test that recall is dropped before recent turns"""
+    history = [_turn("user", " ".join(["word"] * 35))]
+    recalled = [{"speaker": "fact", "text": " ".join(["fact"] * 20)}]
+    messages, report = packer.pack("be brief", "hi", history, recalled)
+
+    assert report["recalled"] == 0
+    assert report["dropped"] == 1
+    assert all("fact" not in m["content"] for m in messages)
+
+def _log(n):
+    """n alternating turns with distinct timestamps"""
+    return [
+        {"timestamp": f"2024-01-01T00:00:{i:02d}", "speaker": "user" if i % 2 == 0 else "jarvis", "text": f"turn {i}"}
+        for i in range(n)
+    ]
+
+def test_history_window_moves_in_blocks():
+    """Test that the window keeps its first turn until it is full, then drops half"""
+    window = HistoryWindow(max_turns=4)
+    log = _log(10)
+    starts = [window.select(log[max(0, n - 4):n])[0]["text"] for n in range(1, 11)]
+    assert starts == ["turn 0"] * 4 + ["turn 3"] * 3 + ["turn 6"] * 3
+
+def test_consecutive_prompts_share_a_prefix(packer):
+    """Test that most prompts start with the previous prompt's system message and history"""
+    window = HistoryWindow(max_turns=4)
+    log = _log(13)
+    prompts = []
+    for n in range(1, 13):
+        recalled = [{"speaker": "fact", "text": f"note {n}"}]
+        messages, _ = packer.pack("be brief", f"question {n}", window.select(log[max(0, n - 4):n]), recalled)
+        prompts.append(messages)
+
+    kept = sum(
+        after[:len(before) - 2] == before[:-2]  # the notes and the input change every turn
+        for before, after in zip(prompts, prompts[1:])
+    )
+    assert prompts[0][0] == prompts[-1][0]
+    assert kept >= 8  # the start only moves when the window is cut in half
+
+def test_token_counts_are_cached():
+    """Test that repeated texts are tokenized only once"""
+    calls = []
+    counter = TokenCounter(lambda text: calls.append(text) or text.split())
+    counter.count("hello world")
+    counter.count("hello world")
+    assert calls == ["hello world"]
+    assert counter.hits == 1
@@ -0,0 +1,82 @@
+"""
+Tests for the response cache.
+"""
+import time
+from core.response_cache import ResponseCache, normalize_query
+
+def test_normalization_shares_keys():
+    """Test that trivial variations of a query normalize identically"""
+    assert normalize_query("Hey Jarvis, how's it going?") == normalize_query("how is it going")
+    assert normalize_query("Thank you!") == normalize_query("thank   you")
+
+def test_hit_miss_and_counters(tmp_path):
+    """Test basic get/put and hit-rate accounting"""
+    cache = ResponseCache(db_path=str(tmp_path / "responses.db"))
+    assert cache.get("How are you?") is None
+    cache.put("How are you?", "Splendid, sir.")
+    assert cache.get("how are you") == "Splendid, sir."
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    cache.close()
+
+def test_time_sensitive_queries_bypass(tmp_path):
+    """Test the per-intent opt-out for answers that go stale"""
+    cache = ResponseCache(db_path=None)
+    cache.put("What time is it?", "It is 3 PM, sir.")
+    assert cache.get("What time is it?") is None
+    assert cache.get_stats()["bypassed"] == 1
+
+def test_ttl_expiry():
+    """Test that expired responses are not served"""
+    cache = ResponseCache(db_path=None, ttl_seconds=0.01)
+    cache.put("tell me a joke", "Why did the robot cross the road?")
+    time.sleep(0.02)
+    assert cache.get("tell me a joke") is None
+
+def test_lru_bound():
+    """Test that the in-memory tier is bounded"""
+    cache = ResponseCache(db_path=None, max_entries=2)
+    cache.put("one", "1")
+    cache.put("two", "2")
+    cache.get("one")
+    cache.put("three", "3")
+    assert cache.get("two") is None
+    assert cache.get("one") == "1"
+
+def test_context_fingerprint_for_follow_ups():
+    """Test that follow-up queries depend on the previous turn, small talk does not"""
+    cache = ResponseCache(db_path=None)
+    turn_a = [{"speaker": "jarvis", "text": "Paris is the capital of France."}]
+    turn_b = [{"speaker": "jarvis", "text": "Jupiter is the largest planet."}]
+    cache.put("tell me more about it", "It has the Eiffel Tower.", history=turn_a)
+    assert cache.get("tell me more about it", history=turn_b) is None
+    assert cache.get("tell me more about it", history=turn_a) == "It has the Eiffel Tower."
+
+    cache.put("how are you", "Very well, sir.", history=turn_a)
+    assert cache.get("how are you", history=turn_b) == "Very well, sir."
+    assert cache.get("how are you", context="other-model") is None
+
+def test_recalled_memories_are_part_of_the_key():
+    """Test that an answer built on recalled facts isn't replayed once those facts change"""
+    cache = ResponseCache(db_path=None)
+    jazz = [{"speaker": "fact", "text": "The user likes jazz"}]
+    blues = [{"speaker": "fact", "text": "The user likes blues"}]
+    cache.put("what music do i like", "Jazz, sir.", recalled=jazz)
+    assert cache.get("what music do i like", recalled=jazz) == "Jazz, sir."
+    assert cache.get("what music do i like", recalled=blues) is None
+    assert cache.get("what music do i like") is None
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test that the persistent tier keeps the cache warm across restarts"""
+    path = str(tmp_path / "responses.db")
+    cache = ResponseCache(db_path=path)
+    cache.put("thank you", "You're welcome, sir.")
+    cache.close()
+
+    restarted = ResponseCache(db_path=path)
+    assert restarted.get("Thank you!") == "You're welcome, sir."
+    assert restarted.get_stats()["disk_hits"] == 1
+    restarted.close()
@@ -0,0 +1,48 @@
+"""
+Tests for the short-term interaction ring buffer.
+"""
+import pytest
+from core.ring_buffer import Interaction, InteractionRing
+
+def _entry(i):
+    return {"timestamp": f"2024-01-01T00:00:{i:02d}", "speaker": "user", "text": f"Message {i}"}
+
+def test_append_wraps_at_capacity():
+    """Test that the oldest entries are overwritten once full"""
+    ring = InteractionRing(capacity=3)
+    for i in range(5):
+        ring.append(_entry(i))
+
+    assert len(ring) == 3
+    assert [item.text for item in ring] == ["Message 2", "Message 3", "Message 4"]
+    assert ring[-1]["text"] == "Message 4"
+    assert ring[0]["text"] == "Message 2"
+
+def test_tail_across_wrap_boundary():
+    """Test tail reads that span the end of the backing array"""
+    ring = InteractionRing(capacity=4)
+    for i in range(6):
+        ring.append(_entry(i))
+
+    assert [item.text for item in ring.tail(3)] == ["Message 3", "Message 4", "Message 5"]
+    assert [item.text for item in ring.tail(10)] == ["Message 2", "Message 3", "Message 4", "Message 5"]
+    assert ring.tail(0) == []
+
+def test_serialization_matches_json_format():
+    """Test round-tripping through the short_term.json list format"""
+    items = [_entry(i) for i in range(4)]
+    ring = InteractionRing.from_list(items, capacity=3)
+
+    assert ring.to_list() == items[-3:]
+    assert ring[0] == items[1]
+
+def test_speaker_is_interned():
+    """Test that speaker strings are shared between records"""
+    a = Interaction("t", "".join(["jar", "vis"]), "hi")
+    b = Interaction("t", "".join(["ja", "rvis"]), "hello")
+    assert a.speaker is b.speaker
+
+def test_invalid_capacity():
+    """Test that a zero capacity is rejected"""
+    with pytest.raises(ValueError):
+        InteractionRing(capacity=0)
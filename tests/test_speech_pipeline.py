@@ -0,0 +1,68 @@
+"""
+Tests for the streaming response pipeline.
+"""
+import time
+from core.fake_engine import FakeStreamingEngine
+from core.sentence_segmenter import SentenceSegmenter
+from core.speech_pipeline import StreamingResponder
+
+class RecordingSpeaker:
+    """Null TTS sink that records when each sentence was queued"""
+
+    def __init__(self):
+        self.sentences = []
+
+    def speak_queued(self, text, on_start=None):
+        self.sentences.append((text, time.perf_counter()))
+        if on_start:
+            on_start()
+
+def test_segmenter_handles_streamed_tokens():
+    """Test sentence boundaries across token splits, abbreviations and decimals"""
+    segmenter = SentenceSegmenter(min_chars=1)
+    out = []
+    for token in ["Hello", " sir", ".", " Dr", ". Smith", " paid 3", ".5 dollars", "! Next", " line"]:
+        out.extend(segmenter.feed(token))
+    out.append(segmenter.flush())
+    assert out == ["Hello sir.", "Dr. Smith paid 3.5 dollars!", "Next line"]
+
+def test_segmenter_merges_short_fragments():
+    """Test that tiny fragments wait for the next sentence"""
+    segmenter = SentenceSegmenter(min_chars=10)
+    assert segmenter.feed("Yes. ") == []
+    assert segmenter.feed("I can do that. ") == ["Yes. I can do that."]
+
+def test_first_sentence_is_spoken_before_generation_ends():
+    """Test that speech starts while later tokens are still generating"""
+    engine = FakeStreamingEngine(
+        "Certainly, sir. Here is a much longer second sentence that takes a while to generate.",
+        token_delay=0.01
+    )
+    speaker = RecordingSpeaker()
+    responder = StreamingResponder(engine, speaker)
+
+    start = time.perf_counter()
+    reply, metrics = responder.respond("hello")
+    end = time.perf_counter()
+
+    assert reply == engine.replies
+    assert [s for s, _ in speaker.sentences] == [
+        "Certainly, sir.",
+        "Here is a much longer second sentence that takes a while to generate."
+    ]
+    first_queued = speaker.sentences[0][1]
+    assert first_queued - start < (end - start) / 2
+    assert metrics["ttft_ms"] is not None
+    assert metrics["ttfa_ms"] < metrics["generation_ms"]
+    assert metrics["sentences"] == 2
+
+def test_non_streaming_engine_falls_back():
+    """Test engines without process_stream are spoken in one piece"""
+    class PlainEngine:
+        def process(self, text):
+            return "Done, sir."
+
+    speaker = RecordingSpeaker()
+    reply, metrics = StreamingResponder(PlainEngine(), speaker).respond("hi")
+    assert reply == "Done, sir."
+    assert [s for s, _ in speaker.sentences] == ["Done, sir."]
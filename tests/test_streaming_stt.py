@@ -0,0 +1,102 @@
+"""
+Tests for incremental offline speech-to-text, using a fake decoder instead of Whisper.
+"""
+import time
+import numpy as np
+from interfaces.voice.audio_stream import AudioCapture, WavStream
+from interfaces.voice.streaming_stt import StreamingSession, common_prefix
+from tests.test_audio_stream import RATE, write_wav
+
+
+def fake_decode(audio):
+    """One word per loud quarter second, so hypotheses grow with the audio"""
+    quarter = RATE // 4
+    words = []
+    for i in range(0, len(audio) - quarter + 1, quarter):
+        if np.abs(audio[i:i + quarter]).max() > 0.05:
+            words.append(f"w{len(words)}")
+    return " ".join(words)
+
+
+def tone(seconds):
+    return (3000 * np.sin(2 * np.pi * 220 * np.arange(int(seconds * RATE)) / RATE)).astype(np.int16)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_partials_then_final():
+    """Test that partial hypotheses grow while audio arrives and the final covers everything"""
+    seen = []
+    session = StreamingSession(fake_decode, RATE, partial_interval=0.5, on_partial=lambda t, s: seen.append((t, s)))
+    for _ in range(3):
+        session.feed(tone(0.5))
+        count = len(seen)
+        assert wait_for(lambda: len(seen) > count)
+    session.feed(tone(0.25))
+    text = session.finish()
+
+    assert [t for t, _ in seen] == ["w0 w1", "w0 w1 w2 w3", "w0 w1 w2 w3 w4 w5"]
+    assert seen[-1][1] == "w0 w1 w2 w3"  # agreed between the last two partials
+    assert text == "w0 w1 w2 w3 w4 w5 w6"
+    assert session.metrics["partials"] == 3
+    assert not session.metrics["reused_partial"]
+    assert abs(session.metrics["audio_s"] - 1.75) < 1e-6
+
+
+def test_final_reuses_up_to_date_partial():
+    """Test that no second decode is needed when the last partial saw all the audio"""
+    calls = []
+    session = StreamingSession(lambda audio: calls.append(len(audio)) or fake_decode(audio), RATE, 0.5)
+    session.feed(tone(1.0))
+    assert wait_for(lambda: len(session.partials) == 1)
+    assert session.finish() == "w0 w1 w2 w3"
+    assert len(calls) == 1
+    assert session.metrics["reused_partial"] and session.metrics["final_decode_s"] == 0.0
+
+
+def test_trailing_pause_needs_no_decode():
+    """Test that audio fed after the end of speech doesn't force a final decode"""
+    calls = []
+    session = StreamingSession(lambda audio: calls.append(len(audio)) or fake_decode(audio), RATE, 0.5)
+    session.feed(tone(1.0))
+    assert wait_for(lambda: len(session.partials) == 1)
+    session.feed(np.zeros(int(0.3 * RATE), np.int16))
+    assert session.finish(speech_end=RATE) == "w0 w1 w2 w3"
+    assert len(calls) == 1
+
+
+def test_false_start_discarded():
+    """Test that feed(None) drops the audio and hypotheses heard so far"""
+    session = StreamingSession(fake_decode, RATE, partial_interval=10.0)
+    session.feed(tone(0.5))
+    session.feed(None)
+    session.feed(tone(0.25))
+    assert session.finish() == "w0"
+
+
+def test_capture_streams_utterance_to_session(tmp_path):
+    """Test that AudioCapture hands the session exactly the utterance listen() returns"""
+    path = str(tmp_path / "command.wav")
+    write_wav(path, [("noise", 1.0), ("tone", 0.05), ("noise", 1.0), ("tone", 1.0), ("noise", 1.0)])
+    capture = AudioCapture(WavStream(path), pre_roll=0.3, pause_threshold=0.8)
+    fed = []
+    samples = capture.listen(on_audio=lambda chunk: fed.append(chunk))
+    capture.stop()
+
+    # The 50 ms click was a false start and was retracted
+    assert any(chunk is None for chunk in fed)
+    last_reset = max(i for i, chunk in enumerate(fed) if chunk is None)
+    streamed = np.concatenate(fed[last_reset + 1:])
+    assert np.array_equal(streamed, samples)
+    assert abs(capture.trailing_silence / RATE - 0.8) < 2 * 512 / RATE
+
+
+def test_common_prefix():
+    """Test word-level agreement between hypotheses"""
+    assert common_prefix("turn the volume up", "turn the volume down") == "turn the volume"
+    assert common_prefix("", "play music") == ""
@@ -0,0 +1,78 @@
+"""
+Tests for the on-disk TTS phrase cache.
+"""
+import os
+import ast
+import inspect
+from core import commands
+from interfaces.voice.tts_cache import PhraseCache, phrase_key
+
+VOICE = "en-GB-RyanNeural"
+
+def test_hit_after_store(tmp_path):
+    """Test that a stored phrase comes back from disk and counts toward the stats"""
+    cache = PhraseCache(str(tmp_path))
+    assert cache.get(VOICE, "Paused music, sir.") is None
+    cache.put(VOICE, "Paused music, sir.", "+0%", b"mp3" * 100, synthesis_s=0.4, canned=True)
+    assert cache.get(VOICE, "Paused  music, sir. ") == b"mp3" * 100
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+    assert stats["bytes_saved"] == 300 and abs(stats["synthesis_s_saved"] - 0.4) < 1e-9
+
+def test_key_covers_voice_and_rate():
+    """Test that the same text in another voice or rate is a different clip"""
+    text = "Playing next track, sir."
+    keys = {phrase_key(VOICE, text), phrase_key("en-US-GuyNeural", text), phrase_key(VOICE, text, "+20%")}
+    assert len(keys) == 3
+
+def test_lru_eviction_survives_restart(tmp_path):
+    """Test eviction of the least recently played clip, with recency kept in file times"""
+    cache = PhraseCache(str(tmp_path), max_bytes=250)
+    for i, text in enumerate(["one", "two"]):
+        path = cache.put(VOICE, text, "+0%", b"x" * 100, canned=True)
+        os.utime(path, (1000 + i, 1000 + i))
+    cache.get(VOICE, "one")  # now the most recent
+
+    reopened = PhraseCache(str(tmp_path), max_bytes=250)
+    reopened.put(VOICE, "three", "+0%", b"x" * 100, canned=True)
+    assert reopened.contains(VOICE, "one") and reopened.contains(VOICE, "three")
+    assert not reopened.contains(VOICE, "two")
+    assert reopened.get_stats()["evictions"] == 1
+    assert sorted(os.listdir(tmp_path)) == sorted(phrase_key(VOICE, t) + ".mp3" for t in ("one", "three"))
+
+def test_only_canned_or_repeated_phrases_are_stored(tmp_path):
+    """Test that one-off sentences and empty clips don't take space from the pre-warmed phrases"""
+    cache = PhraseCache(str(tmp_path))
+    assert cache.put(VOICE, "Paris is the capital of France, sir.", "+0%", b"x" * 100) is None
+    assert not cache.contains(VOICE, "Paris is the capital of France, sir.")
+    assert cache.put(VOICE, "Paris is the capital of France, sir.", "+0%", b"x" * 100) is not None
+    assert cache.put(VOICE, "Paused music, sir.", "+0%", b"", canned=True) is None
+    assert cache.get_stats()["entries"] == 1 and cache.get_stats()["skipped"] == 1
+
+def test_clip_removed_after_lookup_is_a_miss(tmp_path):
+    """Test that a clip deleted behind the cache's back is resynthesized, not served"""
+    cache = PhraseCache(str(tmp_path))
+    path = cache.put(VOICE, "Paused music, sir.", "+0%", b"x" * 100, canned=True)
+    os.remove(path)
+    assert cache.get(VOICE, "Paused music, sir.") is None
+    assert not cache.contains(VOICE, "Paused music, sir.")
+
+def test_interrupted_writes_are_discarded(tmp_path):
+    """Test that a temporary file left by a crash is neither served nor kept"""
+    (tmp_path / (phrase_key(VOICE, "hello") + ".mp3.123.tmp")).write_bytes(b"half")
+    cache = PhraseCache(str(tmp_path))
+    assert cache.get(VOICE, "hello") is None
+    assert os.listdir(tmp_path) == []
+
+def test_command_replies_are_listed_for_prewarming():
+    """Test that every fixed reply a command returns is in its module's PHRASES"""
+    for module in commands.MODULES:
+        literals = {
+            node.value.elts[0].value
+            for node in ast.walk(ast.parse(inspect.getsource(module)))
+            if isinstance(node, ast.Return) and isinstance(node.value, ast.Tuple)
+            and isinstance(node.value.elts[0], ast.Constant)
+        }
+        assert literals and literals <= set(module.PHRASES), module.__name__
+    assert len(commands.canned_phrases()) == len(set(commands.canned_phrases()))
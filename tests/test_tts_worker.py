@@ -0,0 +1,77 @@
+"""
+Tests for the persistent TTS worker with a fake synthesizer and a silent sink.
+"""
+import time
+import threading
+from interfaces.voice.tts_worker import FakeSynthesizer, NullSink, TTSWorker
+
+SENTENCES = ["The first sentence of the reply.", "A second one.", "And a third to finish it off."]
+
+def make_worker(latency=0.05, seconds_per_char=0.004, **options):
+    sink = NullSink(seconds_per_char)
+    return TTSWorker(FakeSynthesizer(latency, 0.0), sink, **options), sink
+
+def test_sentences_play_in_order_with_on_start():
+    """Test queue order, on_start callbacks and completion without polling"""
+    worker, sink = make_worker()
+    started = []
+    for text in SENTENCES:
+        worker.say(text, on_start=lambda text=text: started.append(text))
+    assert worker.busy
+    assert worker.wait_until_done(timeout=5)
+    assert sink.played == SENTENCES and started == SENTENCES
+    assert not worker.busy
+    worker.close()
+
+def test_next_sentence_is_synthesized_while_one_plays():
+    """Test that back-to-back sentences don't wait for synthesis (gap far below its latency)"""
+    worker, sink = make_worker(latency=0.1)
+    for text in SENTENCES:
+        worker.say(text)
+    worker.wait_until_done(timeout=5)
+    report = worker.report()
+    worker.close()
+    assert report["sentences"] == 3
+    assert len(worker.stats["gaps_ms"]) == 2 and report["gap_ms"]["max"] < 30
+
+def test_cancel_drops_queue_and_interrupts_playback():
+    """Test that cancel() returns promptly, nothing stale plays afterwards and the worker is reusable"""
+    worker, sink = make_worker(latency=0.02, seconds_per_char=0.05)  # ~1.5 s per sentence
+    for text in SENTENCES * 2:
+        worker.say(text)
+    time.sleep(0.2)
+    start = time.perf_counter()
+    worker.cancel()
+    assert time.perf_counter() - start < 0.2
+    assert worker.wait_until_done(timeout=1)
+    assert sink.played == SENTENCES[:1]
+    assert worker.report()["cancelled"] == 6
+
+    worker.say("Still here.")
+    assert worker.wait_until_done(timeout=2)
+    assert sink.played[-1] == "Still here."
+    worker.close()
+
+def test_activity_callbacks_and_failed_synthesis():
+    """Test music ducking hooks around a burst, and that a failed sentence is skipped"""
+    calls = []
+    done = threading.Event()
+
+    def on_active(active):
+        calls.append(active)
+        if not active:
+            done.set()
+
+    async def synthesize(text):
+        if text == "bad":
+            raise RuntimeError("network down")
+        return text
+
+    sink = NullSink(0.001)
+    worker = TTSWorker(synthesize, sink, on_active=on_active)
+    for text in ["one", "bad", "three"]:
+        worker.say(text)
+    assert worker.wait_until_done(timeout=2) and done.wait(timeout=2)
+    assert sink.played == ["one", "three"] and calls == [True, False]
+    assert worker.report()["failed"] == 1
+    worker.close()
@@ -0,0 +1,77 @@
+"""
+Tests for VAD model loading: the checksummed local cache and the NumPy backend.
+"""
+import socket
+import time
+import pytest
+from interfaces.voice.vad_model import SpectralVAD, ensure_model, load_vad, sha256_of
+from interfaces.voice.voice_detector import VoiceDetector
+from tests.test_audio_stream import write_wav
+from tests.test_voice_detector import run
+
+
+def test_model_cached_and_verified(tmp_path):
+    """Test that the model is fetched once, pinned by checksum and re-fetched if corrupted"""
+    source = tmp_path / "upstream.onnx"
+    source.write_bytes(b"model weights v1")
+    url = source.as_uri()
+    path = str(tmp_path / "models" / "vad.onnx")
+
+    assert ensure_model(path, url) == path
+    with open(path + ".sha256") as f:
+        assert f.read() == sha256_of(str(source))
+
+    # A damaged copy is replaced from the URL
+    with open(path, "wb") as f:
+        f.write(b"truncated")
+    ensure_model(path, url)
+    assert open(path, "rb").read() == b"model weights v1"
+
+    # Upstream changing under us is refused
+    source.write_bytes(b"model weights v2")
+    with open(path, "wb") as f:
+        f.write(b"truncated")
+    with pytest.raises(ValueError):
+        ensure_model(path, url)
+
+
+def test_missing_model_without_url(tmp_path):
+    """Test that a missing model with nowhere to fetch it from is an error"""
+    with pytest.raises(FileNotFoundError):
+        ensure_model(str(tmp_path / "vad.onnx"))
+
+
+def test_stalled_download_times_out(tmp_path):
+    """Test that a server that never answers can't hang startup on the first download"""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)  # connections are queued but never answered
+    url = f"http://127.0.0.1:{listener.getsockname()[1]}/silero_vad.onnx"
+    try:
+        start = time.perf_counter()
+        with pytest.raises(OSError):
+            ensure_model(str(tmp_path / "vad.onnx"), url, timeout=0.3)
+        assert time.perf_counter() - start < 5
+        assert not (tmp_path / "vad.onnx.download").exists()
+    finally:
+        listener.close()
+
+
+def test_numpy_backend_detects_speech(tmp_path):
+    """Test the dependency-free model through the streaming detector"""
+    assert isinstance(load_vad({"backend": "numpy"}), SpectralVAD)
+    path = str(tmp_path / "speech.wav")
+    write_wav(path, [("noise", 1.5), ("tone", 0.8), ("noise", 1.0), ("tone", 0.5), ("noise", 1.0)])
+    _, _, starts, ends = run(path, model=SpectralVAD())
+    assert (starts, ends) == (2, 2)
+
+    quiet = str(tmp_path / "quiet.wav")
+    write_wav(quiet, [("noise", 4.0)])
+    assert run(quiet, model=SpectralVAD())[2] == 0
+
+
+def test_detector_starts_fast():
+    """Test that constructing a detector with the NumPy backend is far under 200 ms"""
+    start = time.perf_counter()
+    VoiceDetector(lambda: None, config={"backend": "numpy"})
+    assert time.perf_counter() - start < 0.05
@@ -0,0 +1,59 @@
+"""
+Tests for the streaming voice detector, driven by WAV files with a stand-in model.
+"""
+import numpy as np
+from interfaces.voice.audio_stream import WavStream
+from interfaces.voice.voice_detector import VoiceDetector
+from tests.test_audio_stream import write_wav
+
+
+class LoudnessModel:
+    """Says 'speech' for loud frames and counts how often it is asked"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, frame):
+        self.calls += 1
+        return 0.9 if np.sqrt(np.mean(frame * frame)) > 0.02 else 0.1
+
+
+def run(path, model=None, **options):
+    starts, ends = [], []
+    model = model or LoudnessModel()
+    detector = VoiceDetector(lambda: starts.append(1), model=model, on_speech_end=lambda: ends.append(1), **options)
+    detector.start(microphone=False)
+    stream = WavStream(path, block_size=8000)  # 0.5 s blocks, like the old callback
+    stream.open()
+    while True:
+        block = stream.read()
+        if block is None:
+            break
+        detector.feed(block)
+    assert detector.flush()
+    detector.stop()
+    return detector, model, len(starts), len(ends)
+
+
+def test_speech_detected_once_with_hysteresis(tmp_path):
+    """Test that a short dip inside speech doesn't split it and a click doesn't trigger"""
+    path = str(tmp_path / "speech.wav")
+    write_wav(path, [("noise", 1.0), ("tone", 0.02), ("noise", 1.0), ("tone", 0.6), ("noise", 0.1),
+                     ("tone", 0.6), ("noise", 1.0)])
+    detector, _, starts, ends = run(path)
+    assert (starts, ends) == (1, 1)
+    detection = detector.stats["detections"][0]
+    assert abs(detection["onset_s"] - 2.02) < 0.05
+    assert detection["latency_ms"] < 150
+
+
+def test_pre_gate_skips_silence(tmp_path):
+    """Test that quiet audio never reaches the model and is never speech"""
+    path = str(tmp_path / "quiet.wav")
+    write_wav(path, [("noise", 5.0)])
+    detector, model, starts, _ = run(path)
+    assert starts == 0
+    report = detector.report()
+    assert report["gated_fraction"] > 0.95
+    assert model.calls == detector.stats["model_calls"] < 10
+    assert report["cpu_ms_per_s"] < 50
@@ -0,0 +1,86 @@
+"""
+Tests for the wake-word gate, with a tone detector standing in for Porcupine.
+"""
+import pytest
+import wave
+import numpy as np
+from core.event_pipeline import MicrophoneSource
+from interfaces.voice.audio_stream import AudioCapture, WavStream
+from interfaces.voice.wake_word import WakeWordDetector
+
+RATE = 16000
+
+
+class ToneEngine:
+    """'Hears' the wake word when a run of loud, high-pitched frames ends"""
+    frame_length = 512
+    sample_rate = RATE
+
+    def __init__(self):
+        self.run = 0
+
+    def process(self, frame):
+        crossings = np.count_nonzero(np.diff(np.signbit(frame)))
+        loud_high = np.abs(frame).mean() > 1000 and crossings > 40
+        ended = not loud_high and self.run >= 2
+        self.run = self.run + 1 if loud_high else 0
+        return 0 if ended else -1
+
+
+def tone(seconds, freq):
+    return 3000 * np.sin(2 * np.pi * freq * np.arange(int(seconds * RATE)) / RATE)
+
+
+def write(path, parts):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(np.concatenate(parts).astype(np.int16).tobytes())
+
+
+def test_detection_position_with_odd_block_sizes():
+    """Test that blocks are re-framed and detections carry absolute sample positions"""
+    detector = WakeWordDetector(engine=ToneEngine())
+    audio = np.concatenate([np.zeros(5120), tone(0.512, 880), np.zeros(2000)]).astype(np.int16)
+    for i in range(0, len(audio), 300):
+        block = audio[i:i + 300]
+        detector.process(block, i + len(block))
+    assert detector.frames == len(audio) // 512
+    assert detector.wait(0) == 5120 + 8192 + 512
+    assert detector.wait(0) is None
+    assert detector.cpu_s > 0
+
+
+class CaptureOnly:
+    """The part of SpeechToText the microphone source uses"""
+
+    def __init__(self, capture):
+        self.audio = capture
+
+    def capture(self):
+        return self.audio.listen(timeout=2.0)
+
+
+@pytest.mark.parametrize("started", [True, False])
+def test_gate_skips_chatter_and_wake_word(tmp_path, started):
+    """Test that only the command after the wake word is captured, whether or not capture was started"""
+    path = str(tmp_path / "wake.wav")
+    noise = lambda s: np.random.default_rng(0).normal(0, 40, int(s * RATE))
+    write(path, [noise(0.5), tone(1.0, 220), noise(1.0), tone(0.4, 880), noise(0.2), tone(0.6, 220), noise(1.0)])
+    capture = AudioCapture(WavStream(path), pre_roll=0.1)
+    detector = WakeWordDetector(engine=ToneEngine())
+    detector.attach(capture)
+    woken = []
+    source = MicrophoneSource(CaptureOnly(capture), awake=lambda: bool(woken), wake=detector,
+                              on_wake=lambda: woken.append(True))
+    if started:
+        capture.start()
+
+    command = source.read()
+    capture.stop()
+    assert woken == [True]
+    # Only the 0.6 s command (plus pre-roll and the closing pause), no chatter, no wake tone
+    assert 1.2 < len(command) / RATE < 1.6
+    crossings = np.count_nonzero(np.diff(np.signbit(command[int(0.2 * RATE):int(0.6 * RATE)])))
+    assert abs(crossings - 0.4 * 220 * 2) < 10
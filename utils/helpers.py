@@ -21,3 +21,48 @@ def ensure_dir(directory):
     """Ensure that a directory exists; create it if it doesn't."""
     if not os.path.exists(directory):
         os.makedirs(directory)
+
+def atomic_write_text(file_path, text):
+    """Write text to a file atomically (temp file + fsync + rename) so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{file_path}.tmp.{os.getpid()}"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, file_path)
+
+class FileLock:
+    """Exclusive inter-process lock on a file, used as a context manager (not re-entrant)."""
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self._file = open(lock_path, "a+b")
+
+    def __enter__(self):
+        if os.name == "nt":
+            import msvcrt
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after ten seconds; keep waiting
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if os.name == "nt":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def close(self):
+        self._file.close()